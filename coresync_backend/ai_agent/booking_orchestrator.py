@@ -45,9 +45,6 @@ class BookingOrchestrator:
             }
         """
         try:
-            from services.models import Service, Booking
-            from users.models import User
-            
             # Get service
             service = await self._get_service(service_id)
             
@@ -65,25 +62,17 @@ class BookingOrchestrator:
                 }
             
             # TODO: Check Google Calendar API (після payment card)
-            # For now: check Django Booking model
-            
-            from asgiref.sync import sync_to_async
-            
-            # Query existing bookings
-            existing_bookings = await sync_to_async(
-                lambda: list(Booking.objects.filter(
-                    service=service,
-                    booking_date=preferred_date.date(),
-                    status__in=['confirmed', 'pending']
-                ))
-            )()
-            
-            # Simple availability check (буде замінено Google Calendar)
-            is_available = len(existing_bookings) < 10  # Placeholder logic
-            
-            # Generate suggested slots
+            # Real openings: room slots + technician free/busy + priority windows
             suggested_slots = await self._generate_suggested_slots(
-                preferred_date, duration_minutes, existing_bookings
+                service, preferred_date, duration_minutes, user_id
+            )
+            
+            # Preferred time is available якщо перша можлива opening - саме вона
+            preferred_local = preferred_date
+            if timezone.is_aware(preferred_local):
+                preferred_local = timezone.localtime(preferred_local).replace(tzinfo=None)
+            is_available = bool(suggested_slots) and (
+                suggested_slots[0] == preferred_local.replace(second=0, microsecond=0)
             )
             
             return {
@@ -241,45 +230,32 @@ class BookingOrchestrator:
             }
         """
         try:
-            from services.models import Service
-            from memberships.models import Membership
+            from asgiref.sync import sync_to_async
             from decimal import Decimal
+            from memberships.context import ANONYMOUS_CONTEXT, get_membership_context
+            from services.models import Service
+            from services.pricing_matrix import pricing_matrix
             
             # Get service
             service = await self._get_service(service_id)
-            base_price = service.base_price
-            
-            # Check membership tier
-            membership_tier = None
-            discount_percent = Decimal('0')
             
+            # Membership context (cached per user)
+            membership = ANONYMOUS_CONTEXT
             if user_id:
                 try:
-                    from asgiref.sync import sync_to_async
-                    
-                    membership = await sync_to_async(
-                        lambda: Membership.objects.filter(
-                            user_id=user_id,
-                            status='active'
-                        ).first()
-                    )()
-                    
-                    if membership:
-                        membership_tier = membership.tier
-                        # Discount mapping (згідно CORESYNC_PROJECT_FINAL.md)
-                        discount_mapping = {
-                            'base': Decimal('0.30'),  # 30%
-                            'premium': Decimal('0.40'),  # 40%
-                            'unlimited': Decimal('1.00')  # Free
-                        }
-                        discount_percent = discount_mapping.get(
-                            membership_tier, 
-                            Decimal('0')
-                        )
-                
+                    user = await self._get_user(user_id)
+                    membership = await sync_to_async(get_membership_context)(user)
                 except Exception as e:
                     logger.warning(f"Error checking membership: {str(e)}")
             
+            # List price з pricing matrix (member / non-member)
+            tier = Service.get_price_tier(None, context=membership)
+            entry = await sync_to_async(pricing_matrix.service_prices)(service.id, tier)
+            base_price = entry['list'] if entry else service.get_price_for_user(None, context=membership)
+            
+            membership_tier = membership.plan_name.lower() if membership.is_active else None
+            discount_percent = Decimal(membership.active_discount) / 100
+            
             # Calculate discount
             discount_amount = base_price * discount_percent
             total_price = base_price - discount_amount
@@ -374,22 +350,47 @@ class BookingOrchestrator:
     
     async def _generate_suggested_slots(
         self,
+        service,
         preferred_date: datetime,
         duration_minutes: int,
-        existing_bookings: List
+        user_id: Optional[int] = None,
+        count: int = 10
     ) -> List[datetime]:
-        """Generate alternative time slots."""
-        suggestions = []
+        """
+        Найближчі openings від preferred_date через slot_search
+        (той самий engine, що й REST next_available).
+        """
+        from asgiref.sync import sync_to_async
+        from services.slot_search import slot_search
         
-        # Simple logic: next 5 days, 10AM-8PM slots
-        for day_offset in range(5):
-            date = preferred_date + timedelta(days=day_offset)
+        def search():
+            from memberships.context import get_membership_context, ANONYMOUS_CONTEXT
+            from users.models import User
             
-            for hour in range(10, 20):  # 10AM to 8PM
-                slot = date.replace(hour=hour, minute=0, second=0)
-                suggestions.append(slot)
+            context = ANONYMOUS_CONTEXT
+            if user_id:
+                user = User.objects.filter(id=user_id).first()
+                if user:
+                    context = get_membership_context(user)
+            
+            after = preferred_date
+            if timezone.is_naive(after):
+                after = timezone.make_aware(after)
+            
+            return slot_search.find_next(
+                service,
+                count=count,
+                after=max(after, timezone.now()),
+                duration=duration_minutes,
+                context=context
+            )
+        
+        result = await sync_to_async(search)()
         
-        return suggestions[:10]  # Top 10
+        return [
+            datetime.strptime(f"{slot['date']} {slot['start_time']}", '%Y-%m-%d %H:%M')
+            for slot in result['results']
+        ]
     
     async def _get_service(self, service_id: int):
         """Get service by ID."""
@@ -423,51 +424,34 @@ class BookingOrchestrator:
         """
         try:
             from technicians.models import Technician
-            from services.models import Booking
-            from django.db import models
+            from technicians.availability import technician_availability
             from asgiref.sync import sync_to_async
             
             # Визначаємо тип сервісу для matching specialties
             service_type = self._get_service_type(service.name)
             
-            # Знаходимо technicians з потрібною спеціалізацією
-            technicians = await sync_to_async(
-                lambda: list(Technician.objects.filter(
-                    is_active=True
-                ).filter(
-                    models.Q(specialties__contains=[service_type]) |
-                    models.Q(specialties__contains=['all'])
-                ))
-            )()
-            
-            if not technicians:
-                logger.warning(f"No technicians found for service type: {service_type}")
-                return None
-            
             # Обчислюємо end_time
             end_datetime = booking_datetime + timedelta(minutes=service.duration)
             
-            # Перевіряємо кожного technician на конфлікти
-            for tech in technicians:
-                has_conflict = await sync_to_async(
-                    lambda: Booking.objects.filter(
-                        technician=tech,
-                        booking_date=booking_datetime.date(),
-                        status__in=['confirmed', 'pending', 'in_progress']
-                    ).filter(
-                        # Перевірка overlap: new_start < existing_end AND new_end > existing_start
-                        models.Q(start_time__lt=end_datetime.time()) &
-                        models.Q(end_time__gt=booking_datetime.time())
-                    ).exists()
-                )()
-                
-                if not has_conflict:
-                    logger.info(f"Found available technician: {tech.full_name}")
-                    return tech
+            # Вільні technicians з free/busy index (schedule + bookings)
+            free_ids = await sync_to_async(technician_availability.free_technicians)(
+                booking_datetime.date(),
+                booking_datetime.time(),
+                end_datetime.time(),
+                specialty=service_type
+            )
             
-            # Жоден technician не вільний
-            logger.warning(f"All technicians busy for {booking_datetime}")
-            return None
+            if not free_ids:
+                # Жоден technician не вільний
+                logger.warning(f"All technicians busy for {booking_datetime}")
+                return None
+            
+            tech = await sync_to_async(
+                lambda: Technician.objects.select_related('user').get(id=free_ids[0])
+            )()
+            
+            logger.info(f"Found available technician: {tech.full_name}")
+            return tech
         
         except Exception as e:
             logger.error(f"Error finding available technician: {str(e)}")
@@ -475,18 +459,9 @@ class BookingOrchestrator:
     
     def _get_service_type(self, service_name: str) -> str:
         """Визначає тип сервісу з назви."""
-        service_name_lower = service_name.lower()
+        from services.management.commands.assign_technician import get_service_type
         
-        if 'massage' in service_name_lower or 'масаж' in service_name_lower:
-            return 'massage'
-        elif 'facial' in service_name_lower or 'фейшал' in service_name_lower:
-            return 'facial'
-        elif 'barber' in service_name_lower or 'барбер' in service_name_lower or 'cut' in service_name_lower:
-            return 'barber'
-        elif 'mani' in service_name_lower or 'pedi' in service_name_lower:
-            return 'manicure'
-        else:
-            return 'all'
+        return get_service_type(service_name)
     
     async def _link_conversation_to_booking(
         self,
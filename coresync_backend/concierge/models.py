@@ -1,10 +1,11 @@
 """
 Concierge request models with all fixes applied.
 """
-from django.db import models, transaction
+from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from core.models import BaseModel
+from core.reference_allocator import reference_allocator
 
 
 class ConciergeRequest(BaseModel):
@@ -153,24 +154,11 @@ class ConciergeRequest(BaseModel):
             })
     
     def save(self, *args, **kwargs):
-        """Generate unique request number - RACE CONDITION FIXED"""
+        """Generate unique request number from the shared counter"""
         if not self.request_number:
-            from django.utils import timezone
-            
-            year = timezone.now().year
-            
-            with transaction.atomic():
-                last_request = ConciergeRequest.objects.select_for_update().filter(
-                    request_number__startswith=f'CR-{year}-'
-                ).order_by('-request_number').first()
-                
-                if last_request:
-                    last_num = int(last_request.request_number.split('-')[-1])
-                    next_num = last_num + 1
-                else:
-                    next_num = 1
-                
-                self.request_number = f'CR-{year}-{next_num:06d}'
+            self.request_number = reference_allocator.allocate(
+                'CR', model=ConciergeRequest, field='request_number'
+            )
         
         self.full_clean()
         super().save(*args, **kwargs)
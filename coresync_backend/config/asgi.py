@@ -16,6 +16,7 @@ try:
     from django.urls import re_path
     from ai_agent.consumers import ChatConsumer
     from iot_control import consumers as iot_consumers
+    from services import consumers as booking_consumers
     
     websocket_urlpatterns = [
         # AI Chat WebSocket
@@ -25,6 +26,9 @@ try:
         re_path(r'ws/iot/control/(?P<location>[\w_]+)/$', iot_consumers.IoTControlConsumer.as_asgi()),
         re_path(r'ws/iot/device/(?P<device_id>\d+)/$', iot_consumers.DeviceStatusConsumer.as_asgi()),
         re_path(r'ws/iot/sensors/(?P<device_id>\d+)/$', iot_consumers.SensorDataConsumer.as_asgi()),
+        
+        # Booking availability (snapshot + deltas per room-day)
+        re_path(r'ws/availability/(?P<room_id>\d+)/(?P<date>\d{4}-\d{2}-\d{2})/$', booking_consumers.AvailabilityConsumer.as_asgi()),
     ]
     
     application = ProtocolTypeRouter({
@@ -25,6 +25,42 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=9, minute=0),
     },
     
+    # Nightly availability slot generation at 1 AM EST
+    'nightly-availability-horizon': {
+        'task': 'services.tasks.extend_availability_horizon',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    
+    # Next-day technician assignment at 8 PM EST
+    'nightly-technician-assignment': {
+        'task': 'technicians.tasks.auto_assign_technicians',
+        'schedule': crontab(hour=20, minute=0),
+    },
+    
+    # Write-behind of live IoT device state (Redis -> DB)
+    'iot-device-state-flush': {
+        'task': 'iot_control.tasks.flush_device_state',
+        'schedule': 10.0,  # seconds
+    },
+    
+    # Heartbeat liveness sweep (expired devices -> offline)
+    'iot-heartbeat-sweep': {
+        'task': 'iot_control.tasks.sweep_device_heartbeats',
+        'schedule': 15.0,  # seconds
+    },
+    
+    # Sensor rollups (minute / hour / day) every minute
+    'iot-sensor-rollups': {
+        'task': 'iot_control.tasks.rollup_sensor_readings',
+        'schedule': 60.0,  # seconds
+    },
+    
+    # Raw sensor reading retention, hourly
+    'iot-sensor-retention': {
+        'task': 'iot_control.tasks.prune_sensor_readings',
+        'schedule': crontab(minute=30),
+    },
+    
     # Hourly QuickBooks sync
     'hourly-quickbooks-sync': {
         'task': 'payments.tasks.hourly_qb_sync',
@@ -93,6 +93,25 @@ IOT_CONTROL_ENABLED = config('IOT_CONTROL_ENABLED', default=True, cast=bool)
 IOT_WEBSOCKET_TIMEOUT = int(config('IOT_WEBSOCKET_TIMEOUT', default='300'))
 IOT_MAX_DEVICES_PER_LOCATION = int(config('IOT_MAX_DEVICES_PER_LOCATION', default='50'))
 IOT_COMMAND_RATE_LIMIT = int(config('IOT_COMMAND_RATE_LIMIT', default='100'))  # commands per minute
+IOT_DEVICE_TIMEOUT = float(config('IOT_DEVICE_TIMEOUT', default='2.0'))  # seconds per device command
+IOT_DISPATCH_CONCURRENCY = int(config('IOT_DISPATCH_CONCURRENCY', default='20'))
+IOT_CONNECTIONS_PER_DEVICE = int(config('IOT_CONNECTIONS_PER_DEVICE', default='2'))
+IOT_GATEWAY_PORT = int(config('IOT_GATEWAY_PORT', default='8765'))
+IOT_UPDATE_COALESCE_WINDOW = float(config('IOT_UPDATE_COALESCE_WINDOW', default='0.1'))  # seconds per WebSocket delta frame
+IOT_LOG_BUFFER_SIZE = int(config('IOT_LOG_BUFFER_SIZE', default='10000'))  # max buffered ControlLog rows
+IOT_LOG_BATCH_SIZE = int(config('IOT_LOG_BATCH_SIZE', default='500'))
+IOT_LOG_FLUSH_INTERVAL = float(config('IOT_LOG_FLUSH_INTERVAL', default='1.0'))  # seconds
+IOT_LOG_BACKGROUND_FLUSH = config('IOT_LOG_BACKGROUND_FLUSH', default=True, cast=bool)
+IOT_SCENE_SCHEDULER_RELOAD = float(config('IOT_SCENE_SCHEDULER_RELOAD', default='300'))  # seconds, full reload without Redis pub/sub
+IOT_HEARTBEAT_TTL = int(config('IOT_HEARTBEAT_TTL', default='90'))  # seconds without heartbeat before offline
+SENSOR_INGEST_BATCH_SIZE = int(config('SENSOR_INGEST_BATCH_SIZE', default='1000'))  # rows per bulk_create
+SENSOR_INGEST_MAX_READINGS = int(config('SENSOR_INGEST_MAX_READINGS', default='10000'))  # per request
+SENSOR_BROADCAST_INTERVAL = float(config('SENSOR_BROADCAST_INTERVAL', default='1.0'))  # seconds per device/reading_type
+SENSOR_RAW_RETENTION_DAYS = int(config('SENSOR_RAW_RETENTION_DAYS', default='7'))
+SENSOR_MINUTE_ROLLUP_RETENTION_DAYS = int(config('SENSOR_MINUTE_ROLLUP_RETENTION_DAYS', default='30'))
+SENSOR_PRUNE_BATCH_SIZE = int(config('SENSOR_PRUNE_BATCH_SIZE', default='5000'))  # rows per DELETE
+# Driver per device_type ('default' applies to the rest); simulated unless configured
+IOT_DRIVERS = {}
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
@@ -102,6 +121,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'memberships.middleware.MembershipContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -160,6 +180,10 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Scopes для core.rate_limit throttles (sliding window у Redis)
+    'DEFAULT_THROTTLE_RATES': {
+        'iot_command': f'{IOT_COMMAND_RATE_LIMIT}/min',
+    },
 }
 
 # JWT Configuration
@@ -223,12 +247,37 @@ QUICKBOOKS_CLIENT_ID = config('QUICKBOOKS_CLIENT_ID', default='')
 QUICKBOOKS_CLIENT_SECRET = config('QUICKBOOKS_CLIENT_SECRET', default='')
 QUICKBOOKS_REDIRECT_URI = config('QUICKBOOKS_REDIRECT_URI', default='')
 
-# Redis Configuration for Channels
+# Redis Configuration (Channels, live IoT state)
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Shared cache: availability index, technician free/busy, membership context
+# and pricing matrix must be one for all gunicorn workers, Celery and ASGI.
+# Per-process LocMem only when Redis is not configured (local dev / tests).
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=config('REDIS_URL', default=''))
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'coresync',
+            'OPTIONS': {
+                'socket_connect_timeout': 0.5,
+                'socket_timeout': 1,
+            },
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            'hosts': [config('REDIS_URL', default='redis://localhost:6379/0')],
+            'hosts': [REDIS_URL],
         },
     },
 }
@@ -290,6 +339,9 @@ ATLAS_BASE_URL = config('ATLAS_BASE_URL', default='https://api.youratlas.com/v1'
 GOOGLE_CALENDAR_SERVICE_ACCOUNT_FILE = config('GOOGLE_CALENDAR_SERVICE_ACCOUNT_FILE', default='')
 GOOGLE_SHEETS_SERVICE_ACCOUNT_FILE = config('GOOGLE_SHEETS_SERVICE_ACCOUNT_FILE', default='')
 
+# Reference numbers (CS-/PO-/CR-) reserved per process in blocks
+REFERENCE_BLOCK_SIZE = config('REFERENCE_BLOCK_SIZE', default=20, cast=int)
+
 # Sentry Monitoring
 SENTRY_DSN = config('SENTRY_DSN', default='')
 if SENTRY_DSN:
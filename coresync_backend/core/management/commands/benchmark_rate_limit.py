@@ -0,0 +1,61 @@
+"""
+Per-check overhead of core.rate_limit.
+
+    python manage.py benchmark_rate_limit
+    python manage.py benchmark_rate_limit --iterations 20000 --keys 100
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rate_limit import rate_limiter
+from core.redis_client import get_redis
+
+
+class Command(BaseCommand):
+    help = 'Виміряти час однієї перевірки rate limit (Redis Lua та local fallback)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10000, help='Checks per backend (default: 10000)')
+        parser.add_argument('--keys', type=int, default=50, help='Distinct keys, e.g. users (default: 50)')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        keys = options['keys']
+        if iterations < 1 or keys < 1:
+            raise CommandError('--iterations and --keys must be positive')
+
+        backends = [('local', rate_limiter.hit_local)]
+        if get_redis() is not None:
+            backends.insert(0, ('redis', rate_limiter.hit))
+        else:
+            self.stdout.write(self.style.WARNING('Redis unavailable - only the local fallback is measured'))
+
+        for name, hit in backends:
+            try:
+                elapsed, allowed = self._measure(hit, iterations, keys)
+            finally:
+                self._cleanup()
+            self.stdout.write(
+                f'{name:>6}: {elapsed / iterations * 1e6:8.1f} us/check  '
+                f'({iterations / elapsed:,.0f} checks/s, {allowed} allowed)'
+            )
+
+    @staticmethod
+    def _measure(hit, iterations, keys):
+        allowed = 0
+        started = time.perf_counter()
+        for number in range(iterations):
+            # Ліміт нижчий за кількість перевірок на ключ - міряються обидві гілки
+            if hit(f'benchmark:{number % keys}', limit=100, window=60).allowed:
+                allowed += 1
+        return time.perf_counter() - started, allowed
+
+    @staticmethod
+    def _cleanup():
+        rate_limiter.local.clear()
+        client = get_redis()
+        if client is not None:
+            stale = client.keys(f'{rate_limiter.key_prefix}:benchmark:*')
+            if stale:
+                client.delete(*stale)
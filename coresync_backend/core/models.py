@@ -32,3 +32,22 @@ class BaseModel(TimeStampedModel, ActiveModel):
     """
     class Meta:
         abstract = True
+
+
+class ReferenceCounter(models.Model):
+    """
+    Лічильник номерів документів (CS-/PO-/CR-) по префіксу та року.
+
+    Один рядок на (prefix, year) - новий рік починає новий рядок,
+    тому нумерація скидається без окремого job.
+    """
+    prefix = models.CharField(max_length=10)
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'core_reference_counters'
+        unique_together = ['prefix', 'year']
+
+    def __str__(self):
+        return f"{self.prefix}-{self.year}: {self.last_value}"
@@ -0,0 +1,232 @@
+"""
+Rate Limit - атомарний sliding window limiter (Redis), спільний для
+middleware, DRF throttles та WebSocket consumers.
+
+Алгоритм - sliding window counter: лічильник поточного та попереднього
+fixed window, оцінка = previous * (частка вікна, що ще перекривається)
++ current. Перевірка та INCR виконуються одним Lua скриптом, тому
+паралельні запити не проскакують ліміт, а TTL ставиться лише при
+створенні лічильника (не продовжується кожним запитом).
+
+Без Redis - in-process limiter з тим самим алгоритмом (атомарний в
+межах процесу, ліміт рахується per worker).
+
+    result = rate_limiter.hit(f'iot_command:{user.pk}', limit=100, window=60)
+    if not result.allowed:
+        ...  # 429, Retry-After: result.retry_after
+
+Benchmark: `python manage.py benchmark_rate_limit`.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from rest_framework.throttling import SimpleRateThrottle
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS: current window, previous window
+# ARGV: limit, window (ms), elapsed у поточному window (ms), cost
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimate = previous * (window - elapsed) / window + current
+
+if estimate + cost > limit then
+    return {0, math.floor(limit - estimate)}
+end
+
+current = redis.call('INCRBY', KEYS[1], cost)
+if current == cost then
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, math.floor(limit - estimate - cost)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds (0 якщо allowed)
+
+
+class LocalWindowStore:
+    """In-process fallback: {key: (window index, current, previous)}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Tuple[int, int, int]] = {}
+
+    def hit(self, key: str, limit: int, window_index: int, fraction: float, cost: int) -> Tuple[bool, float]:
+        with self._lock:
+            index, current, previous = self._counters.get(key, (window_index, 0, 0))
+            if index != window_index:
+                previous = current if index == window_index - 1 else 0
+                current = 0
+            estimate = previous * (1 - fraction) + current
+            allowed = estimate + cost <= limit
+            if allowed:
+                current += cost
+                estimate += cost
+            self._counters[key] = (window_index, current, previous)
+            if len(self._counters) > 10000:
+                self._evict(window_index)
+        return allowed, estimate
+
+    def _evict(self, window_index: int):
+        """Прибрати лічильники, старші за попереднє window."""
+        stale = [key for key, (index, _, _) in self._counters.items() if index < window_index - 1]
+        for key in stale:
+            del self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class RateLimiter:
+    """
+    Sliding window rate limiter (Redis Lua, fallback - in-process).
+    """
+
+    key_prefix = 'rl'
+
+    def __init__(self):
+        self._script = None
+        self._script_client = None
+        self.local = LocalWindowStore()
+
+    def _get_script(self, client):
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    def hit(self, key: str, limit: int, window: int = 60, cost: int = 1) -> RateLimitResult:
+        """
+        Зарахувати `cost` запитів до ключа; allowed=False якщо ліміт
+        вичерпано (тоді нічого не зараховується).
+        """
+        now = time.time()
+        client = get_redis()
+        if client is not None:
+            result = self._hit_redis(client, key, limit, window, cost, now)
+            if result is not None:
+                return result
+        return self.hit_local(key, limit, window, cost, now)
+
+    def _hit_redis(self, client, key, limit, window, cost, now) -> Optional[RateLimitResult]:
+        window_index = int(now // window)
+        fraction = (now % window) / window
+        try:
+            allowed, remaining = self._get_script(client)(
+                keys=[
+                    f'{self.key_prefix}:{key}:{window_index}',
+                    f'{self.key_prefix}:{key}:{window_index - 1}',
+                ],
+                args=[limit, window * 1000, int(fraction * window * 1000), cost],
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limit failed for {key}, using local limiter: {str(e)}")
+            return None
+        return self._result(bool(allowed), limit, remaining, window, fraction)
+
+    def hit_local(self, key: str, limit: int, window: int = 60, cost: int = 1, now: float = None) -> RateLimitResult:
+        """In-process limiter (fallback без Redis)."""
+        now = time.time() if now is None else now
+        fraction = (now % window) / window
+        allowed, estimate = self.local.hit(key, limit, int(now // window), fraction, cost)
+        return self._result(allowed, limit, math.floor(limit - estimate), window, fraction)
+
+    def _result(self, allowed, limit, remaining, window, fraction) -> RateLimitResult:
+        retry_after = 0.0 if allowed else self.retry_after(window, fraction)
+        return RateLimitResult(allowed, limit, max(0, int(remaining)), retry_after)
+
+    @staticmethod
+    def retry_after(window: int, fraction: float) -> float:
+        """Консервативно: до початку наступного window."""
+        return round(window * (1 - fraction), 3)
+
+    def reset(self):
+        """Забути локальні лічильники та script (tests)."""
+        self.local.clear()
+        self._script = None
+        self._script_client = None
+
+
+# Global instance
+rate_limiter = RateLimiter()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    DRF throttle на rate_limiter. Rate - з REST_FRAMEWORK
+    DEFAULT_THROTTLE_RATES[scope] ('100/min'). Safe methods не лімітуються.
+    """
+
+    def allow_request(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.result = rate_limiter.hit(self.key, self.num_requests, self.duration)
+        return self.result.allowed
+
+    def wait(self) -> Optional[float]:
+        result = getattr(self, 'result', None)
+        return result.retry_after if result else None
+
+
+class UserScopeThrottle(SlidingWindowThrottle):
+    """Ліміт per user (anonymous - per IP) для scope."""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return f'{self.scope}:{ident}'
+
+
+
+class ConsumerRateLimitMixin:
+    """
+    Hook для AsyncWebsocketConsumer:
+
+        if not (await self.check_rate_limit('iot_command', 100)).allowed:
+            return
+
+    Ключ той самий, що у UserScopeThrottle - HTTP та WebSocket ділять ліміт.
+    """
+
+    async def check_rate_limit(self, scope_name: str, limit: int, window: int = 60) -> RateLimitResult:
+        user = self.scope.get('user')
+        if user is not None and user.is_authenticated:
+            ident = user.pk
+        else:
+            ident = (self.scope.get('client') or ['unknown'])[0]
+
+        result = await sync_to_async(rate_limiter.hit)(f'{scope_name}:{ident}', limit, window)
+        if not result.allowed:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'code': 'rate_limited',
+                'message': f'Rate limit exceeded: maximum {limit} commands per {window}s',
+                'retry_after': result.retry_after,
+            }))
+        return result
@@ -0,0 +1,83 @@
+"""
+Redis Client - спільне підключення для live state (IoT, rate limits).
+
+Клієнт створюється ліниво з settings.REDIS_URL і перевіряється PING.
+Якщо redis package не встановлений або сервер недоступний, get_redis()
+повертає None - викликачі переходять на DB / cache fallback. Повторна
+спроба підключення - не частіше ніж раз на `retry_interval` секунд.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class RedisClient:
+    """
+    Lazy, process-wide Redis connection (redis-py pool всередині).
+    """
+
+    retry_interval = 30  # seconds
+
+    def __init__(self):
+        self._client = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+
+    def get(self) -> Optional['redis.Redis']:
+        """Redis client або None (недоступний)."""
+        if self._client is not None:
+            return self._client
+        if not REDIS_AVAILABLE:
+            return None
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval:
+            return None
+
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            try:
+                client = redis.from_url(
+                    self.url,
+                    decode_responses=True,
+                    socket_connect_timeout=0.5,
+                    socket_timeout=1,
+                )
+                client.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable at {self.url}: {str(e)}")
+                self._failed_at = time.monotonic()
+                return None
+
+            self._client = client
+            self._failed_at = None
+            return client
+
+    def reset(self):
+        """Забути клієнт (tests / після fork)."""
+        with self._lock:
+            self._client = None
+            self._failed_at = None
+
+
+# Global instance
+redis_client = RedisClient()
+
+
+def get_redis() -> Optional['redis.Redis']:
+    """Shortcut для redis_client.get()."""
+    return redis_client.get()
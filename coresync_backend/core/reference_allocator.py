@@ -0,0 +1,130 @@
+"""
+Reference Allocator - номери документів CS-YYYY-NNNNNN, PO-YYYY-NNNNNN, ...
+
+Замість `order_by('-reference').first()` (+ select_for_update) на кожен
+insert, номери видаються з окремого рядка-лічильника ReferenceCounter.
+Кожен процес резервує блок номерів одним UPDATE і роздає їх з пам'яті,
+тому створення бронювань/замовлень не сканує і не блокує гарячі таблиці.
+
+Номери унікальні, але між процесами не строго послідовні (можливі
+пропуски) - це нормально для reference numbers.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceAllocator:
+    """
+    Per-process block allocator поверх ReferenceCounter.
+    """
+
+    def __init__(self, block_size: Optional[int] = None):
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        # (prefix, year) -> deque of [next, last] ranges
+        self._blocks: Dict[Tuple[str, int], deque] = {}
+
+    @property
+    def block_size(self) -> int:
+        return self._block_size or getattr(settings, 'REFERENCE_BLOCK_SIZE', 20)
+
+    @staticmethod
+    def format(prefix: str, year: int, value: int) -> str:
+        return f'{prefix}-{year}-{value:06d}'
+
+    def allocate(self, prefix: str, model=None, field: Optional[str] = None) -> str:
+        """
+        Видати наступний номер для префіксу в поточному році.
+
+        model/field - таблиця з існуючими номерами; читається один раз,
+        коли лічильник року ще не створений, щоб продовжити нумерацію.
+        """
+        year = timezone.now().year
+        key = (prefix, year)
+
+        value = self._take(key)
+        if value is None:
+            value = self._reserve_block(prefix, year, model, field)
+
+        return self.format(prefix, year, value)
+
+    def reset(self):
+        """Забути зарезервовані блоки (тести / після fork)."""
+        with self._lock:
+            self._blocks.clear()
+
+    def _take(self, key) -> Optional[int]:
+        with self._lock:
+            ranges = self._blocks.get(key)
+            while ranges:
+                current = ranges[0]
+                if current[0] <= current[1]:
+                    value = current[0]
+                    current[0] += 1
+                    return value
+                ranges.popleft()
+        return None
+
+    def _publish(self, key, first: int, last: int):
+        with self._lock:
+            # Блоки минулого року більше не потрібні
+            for stale in [k for k in self._blocks if k[0] == key[0] and k[1] != key[1]]:
+                del self._blocks[stale]
+            self._blocks.setdefault(key, deque()).append([first, last])
+
+    def _reserve_block(self, prefix: str, year: int, model=None, field=None) -> int:
+        """
+        Зарезервувати блок номерів одним UPDATE лічильника.
+
+        Повертає перший номер блоку; решта стає доступною процесу лише
+        після commit - якщо зовнішня транзакція відкотиться, лічильник
+        відкотиться разом з нею і номери не будуть видані двічі.
+        """
+        from .models import ReferenceCounter
+
+        size = self.block_size
+        counters = ReferenceCounter.objects.filter(prefix=prefix, year=year)
+
+        with transaction.atomic():
+            if not counters.update(last_value=F('last_value') + size):
+                self._create_counter(prefix, year, model, field)
+                counters.update(last_value=F('last_value') + size)
+            last = counters.values_list('last_value', flat=True).get()
+
+        first = last - size + 1
+        if size > 1:
+            key = (prefix, year)
+            transaction.on_commit(lambda: self._publish(key, first + 1, last))
+        return first
+
+    def _create_counter(self, prefix: str, year: int, model=None, field=None):
+        """Створити лічильник року, продовжуючи існуючу нумерацію."""
+        from .models import ReferenceCounter
+
+        start = 0
+        if model is not None and field:
+            last_reference = model.objects.filter(
+                **{f'{field}__startswith': f'{prefix}-{year}-'}
+            ).order_by(f'-{field}').values_list(field, flat=True).first()
+            if last_reference:
+                start = int(last_reference.split('-')[-1])
+
+        try:
+            with transaction.atomic():
+                ReferenceCounter.objects.create(prefix=prefix, year=year, last_value=start)
+        except IntegrityError:
+            # Інший процес створив лічильник першим
+            pass
+
+
+# Global instance
+reference_allocator = ReferenceAllocator()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class IotControlConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'iot_control'
+
+    def ready(self):
+        """Import signals."""
+        import iot_control.signals  # noqa
@@ -4,17 +4,26 @@ Real-time communication для управління пристроями.
 """
 import json
 import logging
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from datetime import datetime
+from django.conf import settings
+
+from core.rate_limit import ConsumerRateLimitMixin
+from .live_updates import device_update_publisher
 
 logger = logging.getLogger(__name__)
 
 
-class IoTControlConsumer(AsyncWebsocketConsumer):
+class IoTControlConsumer(ConsumerRateLimitMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer для управління IoT пристроями в локації.
     Real-time updates для всіх пристроїв у певній локації.
+    
+    Повний список пристроїв (з seq) - лише при підключенні та на
+    get_status / resync; далі - coalesced device_delta frames
+    (див. live_updates).
     """
     
     async def connect(self):
@@ -39,13 +48,7 @@ class IoTControlConsumer(AsyncWebsocketConsumer):
         logger.info(f"IoT WebSocket connected: {self.user.username} to {self.location}")
         
         # Відправити поточний статус пристроїв
-        devices_status = await self.get_devices_status(self.location)
-        await self.send(text_data=json.dumps({
-            'type': 'connection_established',
-            'location': self.location,
-            'devices': devices_status,
-            'timestamp': datetime.now().isoformat()
-        }))
+        await self.send_snapshot('connection_established')
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnect"""
@@ -64,14 +67,22 @@ class IoTControlConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             command = data.get('command')
             
+            # Команди пристроям - спільний ліміт з REST (IoTCommandThrottle)
+            if command in ('control_device', 'activate_scene'):
+                result = await self.check_rate_limit(
+                    'iot_command', getattr(settings, 'IOT_COMMAND_RATE_LIMIT', 100)
+                )
+                if not result.allowed:
+                    return
+            
             if command == 'control_device':
                 await self.handle_device_control(data)
             
             elif command == 'activate_scene':
                 await self.handle_scene_activation(data)
             
-            elif command == 'get_status':
-                await self.handle_status_request(data)
+            elif command in ('get_status', 'resync'):
+                await self.send_snapshot('status_update')
             
             else:
                 await self.send(text_data=json.dumps({
@@ -121,16 +132,15 @@ class IoTControlConsumer(AsyncWebsocketConsumer):
             'timestamp': datetime.now().isoformat()
         }))
         
-        # Broadcast update до всіх у групі
+        # Delta до всіх у групі (coalesced)
         if result['success']:
-            await self.channel_layer.group_send(
+            await device_update_publisher.publish(
+                self.channel_layer,
                 self.room_group_name,
-                {
-                    'type': 'device_update',
-                    'device_id': device_id,
-                    'status': result.get('new_status'),
-                    'user': self.user.username
-                }
+                device_id,
+                result.get('previous_status'),
+                result.get('new_status'),
+                user=self.user.username
             )
     
     async def handle_scene_activation(self, data):
@@ -158,6 +168,18 @@ class IoTControlConsumer(AsyncWebsocketConsumer):
             'timestamp': datetime.now().isoformat()
         }))
         
+        # Зміни пристроїв сцени - один delta frame
+        for device_result in result.get('results') or []:
+            if device_result['success']:
+                await device_update_publisher.publish(
+                    self.channel_layer,
+                    self.room_group_name,
+                    device_result['device_id'],
+                    device_result.get('previous_status'),
+                    device_result.get('new_status'),
+                    user=self.user.username
+                )
+        
         # Broadcast update
         if result['success']:
             await self.channel_layer.group_send(
@@ -170,28 +192,41 @@ class IoTControlConsumer(AsyncWebsocketConsumer):
                 }
             )
     
-    async def handle_status_request(self, data):
-        """Обробити запит статусу"""
+    async def send_snapshot(self, message_type):
+        """
+        Повний статус пристроїв + seq. Seq читається до статусу: deltas
+        з більшим seq клієнт застосовує поверх (повтор set - idempotent).
+        """
+        seq = await sync_to_async(device_update_publisher.current_seq)(self.room_group_name)
         devices_status = await self.get_devices_status(self.location)
         
         await self.send(text_data=json.dumps({
-            'type': 'status_update',
+            'type': message_type,
             'location': self.location,
+            'seq': seq,
             'devices': devices_status,
             'timestamp': datetime.now().isoformat()
         }))
     
-    async def device_update(self, event):
+    async def device_delta(self, event):
         """
-        Отримати broadcast update про пристрій.
-        Відправити всім підключеним клієнтам.
+        Coalesced зміни пристроїв групи: лише змінені ключі статусу.
         """
         await self.send(text_data=json.dumps({
-            'type': 'device_update',
-            'device_id': event['device_id'],
-            'status': event['status'],
-            'updated_by': event.get('user'),
-            'timestamp': datetime.now().isoformat()
+            'type': 'device_delta',
+            'seq': event['seq'],
+            'devices': event['devices'],
+            'updated_by': event.get('users', []),
+        }))
+    
+    async def device_liveness(self, event):
+        """
+        Пристрої локації перейшли online / offline (heartbeat sweep).
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'device_liveness',
+            'devices': event['devices'],
+            'timestamp': event['timestamp'],
         }))
     
     async def scene_update(self, event):
@@ -206,9 +241,14 @@ class IoTControlConsumer(AsyncWebsocketConsumer):
     
     @database_sync_to_async
     def get_devices_status(self, location):
-        """Отримати статус всіх пристроїв у локації"""
+        """Отримати статус всіх пристроїв у локації (Redis, fallback - DB)"""
         from .models import IoTDevice
         from .serializers import IoTDeviceListSerializer
+        from .state_store import device_state_store
+        
+        snapshot = device_state_store.snapshot(location)
+        if snapshot is not None:
+            return snapshot
         
         devices = IoTDevice.objects.filter(
             location=location,
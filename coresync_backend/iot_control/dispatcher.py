@@ -0,0 +1,108 @@
+"""
+Command Dispatcher - конкурентна відправка команд на пристрої.
+
+Команди batch (сцена, lighting для локації) виконуються одночасно
+через asyncio.gather з bounded concurrency (Semaphore) та timeout на
+кожен пристрій - latency batch = найповільніший пристрій, а не сума.
+
+Sync шлях (views / DeviceController / scene scheduler) викликає
+dispatch_sync: команди виконуються на одному довгоживучому event loop
+(daemon thread, один на процес), тому pooled з'єднання драйверів
+перевикористовуються між запитами.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List
+
+from django.conf import settings
+
+from .drivers import DeviceCommand, driver_registry
+
+logger = logging.getLogger(__name__)
+
+
+class CommandDispatcher:
+    """
+    Конкурентне виконання DeviceCommand через драйвери.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def timeout(self) -> float:
+        """Timeout (seconds) на один пристрій."""
+        return getattr(settings, 'IOT_DEVICE_TIMEOUT', 2.0)
+
+    @property
+    def max_concurrency(self) -> int:
+        return getattr(settings, 'IOT_DISPATCH_CONCURRENCY', 20)
+
+    async def dispatch(self, commands: Iterable[DeviceCommand]) -> List[Dict[str, Any]]:
+        """
+        Виконати команди одночасно.
+
+        Returns (у порядку commands): {'success': True, 'status': {...}}
+        або {'success': False, 'error': str}.
+        """
+        commands = list(commands)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = self.timeout
+
+        async def run(command: DeviceCommand) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    driver = driver_registry.get(command.device_type)
+                    status = await asyncio.wait_for(driver.execute(command), timeout)
+                    return {'success': True, 'status': status}
+                except asyncio.TimeoutError:
+                    logger.warning(f"Device {command.device_id} timed out after {timeout}s")
+                    return {'success': False, 'error': f'Device timeout after {timeout}s'}
+                except Exception as e:
+                    logger.error(f"Error controlling device {command.device_id}: {str(e)}")
+                    return {'success': False, 'error': str(e)}
+
+        return await asyncio.gather(*(run(command) for command in commands))
+
+    def dispatch_sync(self, commands: Iterable[DeviceCommand]) -> List[Dict[str, Any]]:
+        """dispatch() для sync коду (views, services) на спільному event loop."""
+        commands = list(commands)
+        if not commands:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self.dispatch(commands), self._get_loop())
+        return future.result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop dispatch thread (стартує lazily; після fork - новий)."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='iot-dispatch', daemon=True)
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            return self._loop
+
+    def close(self):
+        """Закрити idle з'єднання та зупинити event loop (atexit)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = None
+
+        loop.call_soon_threadsafe(driver_registry.reset)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+
+
+# Global instance
+command_dispatcher = CommandDispatcher()
+atexit.register(command_dispatcher.close)
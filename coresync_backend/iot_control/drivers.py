@@ -0,0 +1,286 @@
+"""
+IoT Device Drivers - pluggable драйвери per IoTDevice.device_type.
+
+Кожен драйвер - async `execute(command) -> new status`. Драйвери
+тримають persistent з'єднання в ConnectionPool per device IP, тому
+серія команд не платить за connect / handshake на кожну.
+
+Драйвер для device_type береться з settings.IOT_DRIVERS
+({'lighting': 'dotted.path.Driver'}), default - SimulatedDriver
+(локальна модель стану, для тестів та dev без обладнання).
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DRIVER = 'iot_control.drivers.SimulatedDriver'
+
+
+class DeviceCommand(NamedTuple):
+    """Команда для драйвера - snapshot пристрою без ORM (безпечно для async)."""
+    device_id: int
+    device_type: str
+    ip_address: Optional[str]
+    status: Dict[str, Any]
+    action: str
+    value: Any = None
+
+    @classmethod
+    def from_device(cls, device, action: str, value: Any = None) -> 'DeviceCommand':
+        return cls(
+            device_id=device.id,
+            device_type=device.device_type,
+            ip_address=device.ip_address,
+            status=dict(device.current_status or {}),
+            action=action,
+            value=value,
+        )
+
+
+def apply_action(status: Dict[str, Any], action: str, value: Any) -> Dict[str, Any]:
+    """Новий стан пристрою після дії (set_value, turn_on, turn_off, adjust)."""
+    current_status = dict(status)
+
+    if action == 'turn_on':
+        current_status['power'] = 'on'
+        current_status['last_action'] = 'turn_on'
+
+    elif action == 'turn_off':
+        current_status['power'] = 'off'
+        current_status['last_action'] = 'turn_off'
+
+    elif action == 'set_value':
+        if isinstance(value, dict):
+            current_status.update(value)
+        else:
+            current_status['value'] = value
+        current_status['last_action'] = 'set_value'
+
+    elif action == 'adjust':
+        if isinstance(value, dict):
+            # Merge з існуючим status
+            for key, val in value.items():
+                current_status[key] = val
+        current_status['last_action'] = 'adjust'
+
+    # Додати timestamp
+    current_status['last_update'] = datetime.now().isoformat()
+
+    return current_status
+
+
+class ConnectionPool:
+    """
+    Persistent з'єднання per device address.
+
+    Idle з'єднання повертаються в чергу адреси; максимум `max_per_host`
+    одночасно відкритих. З'єднання прив'язані до event loop, тому pool
+    тримає їх per loop; idle з'єднання loop, що вже закритий,
+    закриваються при появі нового loop.
+    """
+
+    def __init__(self, connect, max_per_host: int = 2):
+        self._connect = connect
+        self.max_per_host = max_per_host
+        self._loops = {}  # loop -> {address: (semaphore, [idle])}
+
+    def _slot(self, address):
+        loop = asyncio.get_running_loop()
+        slots = self._loops.get(loop)
+        if slots is None:
+            self._prune()
+            slots = self._loops[loop] = {}
+        slot = slots.get(address)
+        if slot is None:
+            slot = slots[address] = (asyncio.Semaphore(self.max_per_host), [])
+        return slot
+
+    @asynccontextmanager
+    async def acquire(self, address):
+        """Взяти з'єднання (idle або нове); при помилці воно не повертається в pool."""
+        semaphore, idle = self._slot(address)
+        async with semaphore:
+            connection = None
+            while idle and connection is None:
+                candidate = idle.pop()
+                if candidate.is_closed():
+                    continue
+                connection = candidate
+            if connection is None:
+                connection = await self._connect(address)
+
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            idle.append(connection)
+
+    def _prune(self):
+        """Закрити з'єднання loops, що вже закриті (async_to_sync, tests)."""
+        for loop in [loop for loop in list(self._loops) if loop.is_closed()]:
+            self._close_slots(self._loops.pop(loop, {}))
+
+    @staticmethod
+    def _close_slots(slots):
+        for _, idle in slots.values():
+            for connection in idle:
+                connection.close()
+            idle.clear()
+
+    def close_all(self):
+        """Закрити всі idle з'єднання."""
+        for slots in list(self._loops.values()):
+            self._close_slots(slots)
+        self._loops.clear()
+
+
+class DeviceDriver:
+    """
+    Базовий драйвер. Підкласи реалізують `open_connection(address)` та
+    `send(connection, command) -> new status`.
+    """
+
+    def __init__(self):
+        self.pool = ConnectionPool(
+            self.open_connection,
+            max_per_host=getattr(settings, 'IOT_CONNECTIONS_PER_DEVICE', 2)
+        )
+
+    def address(self, command: DeviceCommand):
+        """Ключ pool - IP пристрою (пристрої без IP - окремий ключ per device)."""
+        return command.ip_address or f'device:{command.device_id}'
+
+    async def open_connection(self, address):
+        raise NotImplementedError
+
+    async def send(self, connection, command: DeviceCommand) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def execute(self, command: DeviceCommand) -> Dict[str, Any]:
+        """Виконати команду через pooled з'єднання."""
+        async with self.pool.acquire(self.address(command)) as connection:
+            return await self.send(connection, command)
+
+
+class SimulatedConnection:
+    """In-memory з'єднання SimulatedDriver."""
+
+    def __init__(self, address):
+        self.address = address
+        self.closed = False
+        self.commands_sent = 0
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class SimulatedDriver(DeviceDriver):
+    """
+    Локальна модель пристрою: стан рахується apply_action, `latency`
+    імітує round-trip до обладнання.
+    """
+
+    latency = 0.0  # seconds
+
+    async def open_connection(self, address):
+        return SimulatedConnection(address)
+
+    async def send(self, connection, command: DeviceCommand) -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        connection.commands_sent += 1
+        return apply_action(command.status, command.action, command.value)
+
+
+class StreamConnection:
+    """asyncio stream пара для TCP драйверів."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def is_closed(self) -> bool:
+        return self.writer.is_closing() or self.reader.at_eof()
+
+    def close(self):
+        try:
+            self.writer.close()
+        except RuntimeError:
+            # Event loop вже закритий - transport не може запланувати close.
+            # abort() теж може впасти; тоді socket закриє transport.__del__
+            abort = getattr(self.writer.transport, 'abort', None)
+            if abort is not None:
+                try:
+                    abort()
+                except RuntimeError:
+                    pass
+
+
+class GatewayDriver(DeviceDriver):
+    """
+    Драйвер для LAN gateway: newline-delimited JSON по persistent TCP.
+    Request: {"device_id", "action", "value"}; response: {"status": {...}}
+    або {"error": "..."}.
+    """
+
+    @property
+    def port(self) -> int:
+        return getattr(settings, 'IOT_GATEWAY_PORT', 8765)
+
+    async def open_connection(self, address):
+        reader, writer = await asyncio.open_connection(address, self.port)
+        return StreamConnection(reader, writer)
+
+    async def send(self, connection, command: DeviceCommand) -> Dict[str, Any]:
+        payload = json.dumps({
+            'device_id': command.device_id,
+            'action': command.action,
+            'value': command.value,
+        })
+        connection.writer.write(payload.encode() + b'\n')
+        await connection.writer.drain()
+
+        line = await connection.reader.readline()
+        if not line:
+            raise ConnectionError('Gateway closed the connection')
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response.get('status', {})
+
+
+class DriverRegistry:
+    """Один інстанс драйвера на клас (спільний pool з'єднань)."""
+
+    def __init__(self):
+        self._instances = {}
+
+    def get(self, device_type: str) -> DeviceDriver:
+        drivers = getattr(settings, 'IOT_DRIVERS', {})
+        path = drivers.get(device_type) or drivers.get('default') or DEFAULT_DRIVER
+        driver = self._instances.get(path)
+        if driver is None:
+            driver = self._instances[path] = import_string(path)()
+        return driver
+
+    def reset(self):
+        """Закрити з'єднання та забути інстанси (tests / settings change)."""
+        for driver in self._instances.values():
+            driver.pool.close_all()
+        self._instances.clear()
+
+
+# Global instance
+driver_registry = DriverRegistry()
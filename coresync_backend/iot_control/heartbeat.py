@@ -0,0 +1,261 @@
+"""
+Device Heartbeats - liveness пристроїв за heartbeat з TTL.
+
+Redis layout:
+
+    iot:hb:{pk}          string  epoch останнього heartbeat, TTL = IOT_HEARTBEAT_TTL
+    iot:hb:deadlines     zset    pk -> epoch, після якого пристрій offline
+
+Gateway шле heartbeats (POST /api/iot/devices/heartbeat/), успішна
+команда теж рахується heartbeat. Один sweep (Celery beat) атомарно
+забирає прострочені pk з deadlines, перемикає їх у is_online=False
+одним UPDATE та шле 'device.liveness' в group локації. Пристрій, що
+знову прислав heartbeat, повертається online тим самим шляхом.
+
+connection_status в API читається з iot:hb:{pk} (MGET), не з DB.
+
+Без Redis - fallback на DB: heartbeat оновлює last_updated, sweep
+шукає is_online=True з last_updated старшим за TTL.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.redis_client import get_redis
+from .state_store import device_state_store
+
+logger = logging.getLogger(__name__)
+
+try:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    CHANNELS_AVAILABLE = True
+except ImportError:
+    CHANNELS_AVAILABLE = False
+
+# KEYS: deadlines zset; ARGV: now, limit
+POP_EXPIRED_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #expired > 0 then
+    redis.call('ZREM', KEYS[1], unpack(expired))
+end
+return expired
+"""
+
+
+class DeviceHeartbeatStore:
+    """
+    Heartbeat keys з TTL + zset deadlines для дешевого sweep.
+    """
+
+    key_prefix = 'iot:hb'
+    group_prefix = 'iot_location'
+    sweep_batch = 1000
+
+    def __init__(self):
+        self._script = None
+        self._script_client = None
+
+    @property
+    def ttl(self) -> int:
+        """Секунд без heartbeat до offline."""
+        return int(getattr(settings, 'IOT_HEARTBEAT_TTL', 90))
+
+    def _key(self, pk) -> str:
+        return f'{self.key_prefix}:{pk}'
+
+    @property
+    def _deadline_key(self) -> str:
+        return f'{self.key_prefix}:deadlines'
+
+    def _get_script(self, client):
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(POP_EXPIRED_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    # ------------------------------------------------------------------
+    # Heartbeats
+    # ------------------------------------------------------------------
+
+    def record(self, device_ids: Iterable[str], now: float = None) -> Dict[str, Any]:
+        """
+        Heartbeats від gateway (IoTDevice.device_id).
+        Returns {'accepted', 'unknown', 'came_online'}.
+        """
+        from .models import IoTDevice
+
+        device_ids = {str(device_id) for device_id in device_ids}
+        known = dict(IoTDevice.objects.filter(
+            device_id__in=device_ids,
+            is_active=True
+        ).values_list('device_id', 'pk'))
+
+        return {
+            'accepted': len(known),
+            'unknown': sorted(device_ids - set(known)),
+            'came_online': self.touch(known.values(), now=now),
+        }
+
+    def touch(self, pks: Iterable[int], now: float = None) -> int:
+        """
+        Зарахувати heartbeat пристроям (одна pipeline).
+        Returns кількість пристроїв, що перейшли в online.
+        """
+        pks = list(pks)
+        if not pks:
+            return 0
+        now = time.time() if now is None else now
+
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for pk in pks:
+                    pipe.set(self._key(pk), int(now), ex=self.ttl)
+                    pipe.zadd(self._deadline_key, {str(pk): now + self.ttl})
+                added = pipe.execute()[1::2]
+            except Exception as e:
+                logger.error(f"Heartbeat write error: {str(e)}")
+                return 0
+            # Нового члена deadlines не було - пристрій був offline (або ще не відомий)
+            return self._set_online([pk for pk, is_new in zip(pks, added) if is_new], True)
+
+        return self._touch_db(pks, now)
+
+    def _touch_db(self, pks: List[int], now: float) -> int:
+        from .models import IoTDevice
+
+        revived = list(IoTDevice.objects.filter(pk__in=pks, is_online=False).order_by().values_list('pk', 'location'))
+        IoTDevice.objects.filter(pk__in=pks).update(
+            is_online=True,
+            last_updated=datetime.fromtimestamp(now, tz=dt_timezone.utc)
+        )
+        self._broadcast(revived, True)
+        return len(revived)
+
+    # ------------------------------------------------------------------
+    # Sweep
+    # ------------------------------------------------------------------
+
+    def sweep(self, now: float = None) -> int:
+        """
+        Прострочені heartbeats -> is_online=False.
+        Celery beat кожні 15 секунд. Returns кількість пристроїв offline.
+        """
+        now = time.time() if now is None else now
+
+        client = get_redis()
+        if client is None:
+            return self._sweep_db(now)
+
+        offline = 0
+        while True:
+            try:
+                expired = self._get_script(client)(keys=[self._deadline_key], args=[now, self.sweep_batch])
+            except Exception as e:
+                logger.error(f"Heartbeat sweep error: {str(e)}")
+                break
+            offline += self._set_online([int(pk) for pk in expired], False)
+            if len(expired) < self.sweep_batch:
+                break
+
+        if offline:
+            logger.info(f"Heartbeat sweep: {offline} IoT devices went offline")
+        return offline
+
+    def _sweep_db(self, now: float) -> int:
+        from .models import IoTDevice
+
+        cutoff = datetime.fromtimestamp(now, tz=dt_timezone.utc) - timedelta(seconds=self.ttl)
+        expired = IoTDevice.objects.filter(is_online=True, last_updated__lt=cutoff).order_by()
+        return self._mark(list(expired.values_list('pk', 'location')), False)
+
+    def _set_online(self, pks: List[int], is_online: bool) -> int:
+        """Пристрої з pks, чий статус відрізняється, -> is_online."""
+        from .models import IoTDevice
+
+        if not pks:
+            return 0
+
+        return self._mark(list(IoTDevice.objects.filter(
+            pk__in=pks,
+            is_online=not is_online
+        ).order_by().values_list('pk', 'location')), is_online)
+
+    def _mark(self, changed: List, is_online: bool) -> int:
+        """Один UPDATE [(pk, location), ...] + live state + broadcast."""
+        from .models import IoTDevice
+
+        if not changed:
+            return 0
+
+        IoTDevice.objects.filter(
+            pk__in=[pk for pk, _ in changed],
+            is_online=not is_online
+        ).update(is_online=is_online)
+        device_state_store.set_online(changed, is_online)
+        self._broadcast(changed, is_online)
+        return len(changed)
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def liveness(self, devices: Iterable) -> Dict[int, bool]:
+        """
+        {pk: online} для IoTDevice (один MGET).
+        Без Redis - IoTDevice.is_online (підтримується DB sweep).
+        """
+        devices = list(devices)
+        client = get_redis()
+        if client is not None and devices:
+            try:
+                values = client.mget([self._key(device.pk) for device in devices])
+                return {device.pk: value is not None for device, value in zip(devices, values)}
+            except Exception as e:
+                logger.warning(f"Heartbeat read error, using DB status: {str(e)}")
+        return {device.pk: device.is_online for device in devices}
+
+    # ------------------------------------------------------------------
+    # Push
+    # ------------------------------------------------------------------
+
+    def _broadcast(self, devices: List, is_online: bool):
+        """Одне 'device.liveness' повідомлення на локацію."""
+        if not devices or not CHANNELS_AVAILABLE:
+            return
+
+        try:
+            channel_layer = get_channel_layer()
+        except Exception as e:
+            logger.warning(f"Channel layer unavailable, liveness push skipped: {e}")
+            return
+        if channel_layer is None:
+            return
+
+        by_location = {}
+        for pk, location in devices:
+            by_location.setdefault(location, {})[str(pk)] = is_online
+
+        timestamp = timezone.now().isoformat()
+        for location, changes in by_location.items():
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    f'{self.group_prefix}_{location}',
+                    {
+                        'type': 'device.liveness',
+                        'devices': changes,
+                        'timestamp': timestamp,
+                    }
+                )
+            except Exception as e:
+                logger.warning(f"Liveness push failed for {location}: {e}")
+
+
+# Global instance
+device_heartbeats = DeviceHeartbeatStore()
@@ -0,0 +1,170 @@
+"""
+Live Updates - delta-only, coalesced оновлення пристроїв для IoTControlConsumer.
+
+Замість повного статусу на кожну команду в group йде лише diff
+(змінені ключі current_status). Зміни одного процесу за
+IOT_UPDATE_COALESCE_WINDOW секунд зливаються в одне повідомлення на
+group - слайдер яскравості дає кілька фреймів на секунду, а не десятки.
+
+Протокол (server -> client):
+
+    {'type': 'device_delta', 'seq': 42,
+     'devices': {'7': {'set': {'brightness': 40}, 'unset': []}},
+     'updated_by': ['guest']}
+
+seq - наскрізний лічильник group (Redis INCR, fallback - cache). Клієнт
+застосовує deltas по черзі; якщо seq != last + 1 - повідомлення
+втрачено, клієнт шле {'command': 'resync'} і отримує snapshot з
+поточним seq.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def status_delta(previous: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Diff двох станів: {'set': {...}, 'unset': [...]} або None без змін."""
+    previous = previous or {}
+    new = new or {}
+    changed = {key: value for key, value in new.items() if key not in previous or previous[key] != value}
+    removed = [key for key in previous if key not in new]
+    if not changed and not removed:
+        return None
+    return {'set': changed, 'unset': removed}
+
+
+def merge_delta(pending: Dict[str, Any], delta: Dict[str, Any]):
+    """Злити новіший delta в pending (пізніші значення виграють)."""
+    for key, value in delta['set'].items():
+        pending['set'][key] = value
+        if key in pending['unset']:
+            pending['unset'].remove(key)
+    for key in delta['unset']:
+        pending['set'].pop(key, None)
+        if key not in pending['unset']:
+            pending['unset'].append(key)
+
+
+class DeviceUpdatePublisher:
+    """
+    Накопичує deltas per group і відправляє їх одним group_send по
+    закінченню coalesce window.
+    """
+
+    seq_prefix = 'iot:seq'
+
+    def __init__(self):
+        self._pending = {}  # group -> {'devices': {device_id: delta}, 'users': set()}
+        self._tasks = {}    # group -> flush task
+
+    @property
+    def window(self) -> float:
+        return getattr(settings, 'IOT_UPDATE_COALESCE_WINDOW', 0.1)
+
+    # ------------------------------------------------------------------
+    # Sequence
+    # ------------------------------------------------------------------
+
+    def _seq_key(self, group: str) -> str:
+        return f'{self.seq_prefix}:{group}'
+
+    def next_seq(self, group: str) -> int:
+        client = get_redis()
+        if client is not None:
+            try:
+                return client.incr(self._seq_key(group))
+            except Exception as e:
+                logger.warning(f"Redis seq increment failed for {group}: {str(e)}")
+
+        key = self._seq_key(group)
+        cache.add(key, 0, None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+            return 1
+
+    def current_seq(self, group: str) -> int:
+        """Seq останнього відправленого delta (для snapshot)."""
+        client = get_redis()
+        if client is not None:
+            try:
+                return int(client.get(self._seq_key(group)) or 0)
+            except Exception as e:
+                logger.warning(f"Redis seq read failed for {group}: {str(e)}")
+        return cache.get(self._seq_key(group), 0)
+
+    # ------------------------------------------------------------------
+    # Publish
+    # ------------------------------------------------------------------
+
+    async def publish(
+        self,
+        channel_layer,
+        group: str,
+        device_id: int,
+        previous_status: Optional[Dict[str, Any]],
+        new_status: Optional[Dict[str, Any]],
+        user: Optional[str] = None
+    ) -> bool:
+        """
+        Додати зміну пристрою в pending frame group.
+        Returns False якщо статус не змінився (нічого не відправляється).
+        """
+        delta = status_delta(previous_status, new_status)
+        if delta is None:
+            return False
+
+        pending = self._pending.setdefault(group, {'devices': {}, 'users': set()})
+        device_key = str(device_id)
+        if device_key in pending['devices']:
+            merge_delta(pending['devices'][device_key], delta)
+        else:
+            pending['devices'][device_key] = delta
+        if user:
+            pending['users'].add(user)
+
+        if self.window <= 0:
+            await self.flush(channel_layer, group)
+            return True
+
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(group)
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._tasks[group] = loop.create_task(self._flush_later(channel_layer, group))
+        return True
+
+    async def _flush_later(self, channel_layer, group: str):
+        await asyncio.sleep(self.window)
+        # Зміни, що прийдуть під час flush, запланують наступний frame
+        self._tasks.pop(group, None)
+        await self.flush(channel_layer, group)
+
+    async def flush(self, channel_layer, group: str):
+        """Відправити pending frame group (один group_send)."""
+        pending = self._pending.pop(group, None)
+        if not pending or not pending['devices']:
+            return
+
+        seq = await sync_to_async(self.next_seq)(group)
+        try:
+            await channel_layer.group_send(group, {
+                'type': 'device.delta',
+                'seq': seq,
+                'devices': pending['devices'],
+                'users': sorted(pending['users']),
+            })
+        except Exception as e:
+            logger.warning(f"Device delta push failed for {group}: {str(e)}")
+
+
+# Global instance
+device_update_publisher = DeviceUpdatePublisher()
@@ -0,0 +1,190 @@
+"""
+ControlLog Buffer - асинхронний audit log для IoT команд.
+
+Команди не чекають на INSERT: unsaved ControlLog додаються в
+bounded in-process ring buffer, а background thread записує їх
+батчами через bulk_create кожні IOT_LOG_FLUSH_INTERVAL секунд (або
+одразу, коли набрався батч). При завершенні процесу буфер
+скидається (atexit).
+
+Пам'ять обмежена IOT_LOG_BUFFER_SIZE: при переповненні найстаріші
+записи відкидаються і рахуються в stats()['dropped']; stats() також
+показує lag - вік найстарішого незаписаного запису.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ControlLogBuffer:
+    """
+    Bounded ring buffer + background bulk_create writer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._entries = deque()  # (enqueued_at, ControlLog)
+        self._thread = None
+        self._pid = None
+        self._atexit_registered = False
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+
+    @property
+    def capacity(self) -> int:
+        return getattr(settings, 'IOT_LOG_BUFFER_SIZE', 10000)
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, 'IOT_LOG_BATCH_SIZE', 500)
+
+    @property
+    def flush_interval(self) -> float:
+        return getattr(settings, 'IOT_LOG_FLUSH_INTERVAL', 1.0)
+
+    @property
+    def background(self) -> bool:
+        """False - без worker thread, записи пише лише явний flush() (tests)."""
+        return getattr(settings, 'IOT_LOG_BACKGROUND_FLUSH', True)
+
+    # ------------------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------------------
+
+    def add(self, log):
+        """Додати unsaved ControlLog."""
+        self.extend([log])
+
+    def extend(self, logs: Iterable):
+        """Додати кілька unsaved ControlLog (без запиту до DB)."""
+        now = time.monotonic()
+        capacity = self.capacity
+        dropped = 0
+        with self._lock:
+            for log in logs:
+                if len(self._entries) >= capacity:
+                    self._entries.popleft()
+                    dropped += 1
+                self._entries.append((now, log))
+            self.dropped += dropped
+            pending = len(self._entries)
+
+        if dropped:
+            logger.warning(f"ControlLog buffer full, dropped {dropped} oldest entries")
+
+        self._ensure_worker()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Записати все з буфера батчами. Returns кількість записаних рядків."""
+        from .models import ControlLog
+
+        written = 0
+        while True:
+            with self._lock:
+                batch = [
+                    self._entries.popleft()
+                    for _ in range(min(self.batch_size, len(self._entries)))
+                ]
+            if not batch:
+                break
+
+            try:
+                ControlLog.objects.bulk_create([log for _, log in batch])
+            except Exception as e:
+                self.failed += len(batch)
+                self._requeue(batch)
+                logger.error(f"ControlLog flush failed ({len(batch)} entries): {str(e)}")
+                break
+
+            written += len(batch)
+            self.flushed += len(batch)
+        return written
+
+    def _requeue(self, batch):
+        """Повернути батч на початок буфера (в межах capacity, інакше drop)."""
+        with self._lock:
+            room = max(0, self.capacity - len(self._entries))
+            keep = batch[-room:] if room else []
+            self._entries.extendleft(reversed(keep))
+            self.dropped += len(batch) - len(keep)
+
+    def _ensure_worker(self):
+        """Запустити worker thread (лениво; заново після fork)."""
+        if not self._atexit_registered:
+            atexit.register(self._flush_on_exit)
+            self._atexit_registered = True
+
+        if not self.background:
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._run, name='control-log-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"ControlLog writer error: {str(e)}")
+
+    def _flush_on_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"ControlLog flush on exit failed: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики pipeline: buffered, lag_seconds, dropped, flushed, failed."""
+        with self._lock:
+            buffered = len(self._entries)
+            oldest = self._entries[0][0] if self._entries else None
+        return {
+            'buffered': buffered,
+            'capacity': self.capacity,
+            'lag_seconds': round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            'dropped': self.dropped,
+            'flushed': self.flushed,
+            'failed': self.failed,
+        }
+
+    def clear(self):
+        """Відкинути буфер та обнулити метрики (tests)."""
+        with self._lock:
+            self._entries.clear()
+            self.dropped = self.flushed = self.failed = 0
+
+
+# Global instance
+control_log_buffer = ControlLogBuffer()
@@ -0,0 +1,32 @@
+"""
+Scene scheduler process - auto_activate_time / auto_deactivate_time сцен.
+
+    python manage.py run_scene_scheduler
+    python manage.py run_scene_scheduler --once    # виконати те, що вже настало
+"""
+import signal
+
+from django.core.management.base import BaseCommand
+
+from iot_control.scene_scheduler import scene_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Активувати / деактивувати сцени за розкладом (один процес на deployment)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Load schedule, fire due scenes and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = scene_scheduler.load()
+            fired = scene_scheduler.run_pending()
+            self.stdout.write(f'{count} scheduled actions, fired {fired}')
+            return
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: scene_scheduler.stop())
+
+        self.stdout.write(self.style.SUCCESS('Scene scheduler started'))
+        scene_scheduler.run()
+        self.stdout.write('Scene scheduler stopped')
@@ -3,10 +3,11 @@ IoT Control Middleware.
 Rate limiting та security middleware для IoT операцій.
 """
 import logging
-from django.core.cache import cache
 from django.http import JsonResponse
 from django.conf import settings
 
+from core.rate_limit import rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,24 +34,22 @@ class IoTRateLimitMiddleware:
                 }, status=401)
             
             user_id = request.user.id
-            cache_key = f'iot_rate_limit:{user_id}'
             
-            # Перевірити поточний count
-            current_count = cache.get(cache_key, 0)
+            # Атомарна перевірка + increment (спільний ключ з IoTCommandThrottle)
+            result = rate_limiter.hit(f'iot_command:{user_id}', self.rate_limit, self.window)
             
-            if current_count >= self.rate_limit:
+            if not result.allowed:
                 logger.warning(
                     f"IoT rate limit exceeded for user {user_id}: "
-                    f"{current_count}/{self.rate_limit}"
+                    f"limit {self.rate_limit}/{self.window}s"
                 )
-                return JsonResponse({
+                response = JsonResponse({
                     'error': 'Rate limit exceeded',
                     'detail': f'Maximum {self.rate_limit} IoT commands per minute',
-                    'retry_after': self.window
+                    'retry_after': result.retry_after
                 }, status=429)
-            
-            # Increment counter
-            cache.set(cache_key, current_count + 1, self.window)
+                response['Retry-After'] = str(int(result.retry_after) + 1)
+                return response
         
         response = self.get_response(request)
         return response
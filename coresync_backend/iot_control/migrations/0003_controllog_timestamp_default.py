@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot_control', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='controllog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot_control', '0004_sensorreading_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reading_type', models.CharField(max_length=50)),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sensor_rollups', to='iot_control.iotdevice')),
+            ],
+            options={
+                'verbose_name': 'Sensor Rollup',
+                'verbose_name_plural': 'Sensor Rollups',
+                'db_table': 'sensor_rollups',
+                'ordering': ['bucket_start'],
+                'unique_together': {('device', 'reading_type', 'resolution', 'bucket_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 08:22
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_pruned_window_rolled_up(apps, schema_editor):
+    """
+    Показання старші raw retention вже агреговані (їх лишав лише
+    prune). Решта агрегується повторно - recompute idempotent.
+    """
+    SensorReading = apps.get_model('iot_control', 'SensorReading')
+    retention = timedelta(days=getattr(settings, 'SENSOR_RAW_RETENTION_DAYS', 7))
+    cutoff = (timezone.now() - retention).replace(second=0, microsecond=0) + timedelta(minutes=1)
+    SensorReading.objects.filter(timestamp__lt=cutoff).update(rolled_up=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('iot_control', '0005_sensorrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorreading',
+            name='rolled_up',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_pruned_window_rolled_up, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(condition=models.Q(('rolled_up', False)), fields=['id'], name='sensor_reading_pending_rollup'),
+        ),
+    ]
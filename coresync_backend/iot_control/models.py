@@ -3,6 +3,7 @@ IoT Control models for the CoreSync application.
 """
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from core.models import BaseModel
 
 
@@ -191,8 +192,8 @@ class ControlLog(models.Model):
     previous_state = models.JSONField(default=dict, blank=True)
     new_state = models.JSONField(default=dict, blank=True)
     
-    # Metadata
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Metadata (час дії, а не запису - логи пишуться батчами з буфера)
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True)
     
@@ -231,13 +232,15 @@ class SensorReading(models.Model):
     value = models.FloatField()
     unit = models.CharField(max_length=20, blank=True)
     
-    # Metadata
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Metadata (час виміру від gateway, default - час прийому)
+    timestamp = models.DateTimeField(default=timezone.now)
     quality_score = models.FloatField(
         default=1.0,
         validators=[MinValueValidator(0), MaxValueValidator(1)],
         help_text="Reading quality from 0.0 to 1.0"
     )
+    # Вже враховано в SensorRollup (sensor_rollups.update)
+    rolled_up = models.BooleanField(default=False)
 
     class Meta:
         db_table = 'sensor_readings'
@@ -246,7 +249,58 @@ class SensorReading(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['device', 'reading_type', '-timestamp']),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(rolled_up=False),
+                name='sensor_reading_pending_rollup',
+            ),
         ]
 
     def __str__(self):
         return f"{self.device.name} - {self.reading_type}: {self.value} {self.unit}"
+
+
+class SensorRollup(models.Model):
+    """
+    Aggregated sensor readings per device / reading type / time bucket.
+    Maintained incrementally by iot_control.sensor_rollups.
+    """
+    RESOLUTION_MINUTE = 'minute'
+    RESOLUTION_HOUR = 'hour'
+    RESOLUTION_DAY = 'day'
+    RESOLUTIONS = [
+        (RESOLUTION_MINUTE, 'Minute'),
+        (RESOLUTION_HOUR, 'Hour'),
+        (RESOLUTION_DAY, 'Day'),
+    ]
+
+    device = models.ForeignKey(
+        IoTDevice,
+        on_delete=models.CASCADE,
+        related_name='sensor_rollups'
+    )
+    reading_type = models.CharField(max_length=50)
+    resolution = models.CharField(max_length=10, choices=RESOLUTIONS)
+    bucket_start = models.DateTimeField()
+
+    # Aggregates (avg = total / count)
+    count = models.PositiveIntegerField(default=0)
+    total = models.FloatField(default=0)
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sensor_rollups'
+        verbose_name = 'Sensor Rollup'
+        verbose_name_plural = 'Sensor Rollups'
+        ordering = ['bucket_start']
+        unique_together = [['device', 'reading_type', 'resolution', 'bucket_start']]
+
+    def __str__(self):
+        return f"{self.device_id} - {self.reading_type} ({self.resolution}) at {self.bucket_start}"
+
+    @property
+    def avg_value(self) -> float:
+        return self.total / self.count if self.count else 0.0
@@ -0,0 +1,288 @@
+"""
+Scene Scheduler - auto_activate_time / auto_deactivate_time сцен.
+
+Наступні спрацювання всіх сцен з розкладом лежать у min-heap
+(fire_at, scene, action). Процес scheduler
+(`python manage.py run_scene_scheduler`) спить до найближчого
+спрацювання - поки нічого не настало, тисячі сцен не коштують ні
+запитів, ні CPU. Спрацювання групуються по моменту і виконуються
+SceneManager (bulk activation / deactivation), після чого сцена
+переплановується на наступний день.
+
+Зміна розкладу (post_save / post_delete Scene) переіндексовує лише цю
+сцену: в процесі scheduler - напряму, з інших процесів - через Redis
+pub/sub (IOT_SCENE_SCHEDULE_CHANNEL). Без Redis scheduler
+перечитує розклад раз на IOT_SCENE_SCHEDULER_RELOAD секунд.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+ACTIVATE = 'activate'
+DEACTIVATE = 'deactivate'
+
+SCHEDULE_CHANNEL = 'iot:scene-schedule'
+
+
+def next_occurrence(time_of_day: dt_time, after: datetime) -> datetime:
+    """Найближчий момент time_of_day (поточна timezone) строго після `after`."""
+    local = timezone.localtime(after)
+    candidate = timezone.make_aware(datetime.combine(local.date(), time_of_day))
+    if candidate <= after:
+        candidate = timezone.make_aware(datetime.combine(local.date() + timedelta(days=1), time_of_day))
+    return candidate
+
+
+class SceneScheduler:
+    """
+    Min-heap спрацювань з lazy invalidation: переіндексація сцени лише
+    оновлює `_entries`, застарілі елементи heap відкидаються при pop.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._entries: Dict[Tuple[int, str], float] = {}  # (scene, action) -> fire_at
+        self._times: Dict[Tuple[int, str], dt_time] = {}  # (scene, action) -> time of day
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._running = False
+        self._stop = False
+
+    @property
+    def reload_interval(self) -> float:
+        """Повне перечитування розкладу без Redis pub/sub (seconds)."""
+        return getattr(settings, 'IOT_SCENE_SCHEDULER_RELOAD', 300)
+
+    @property
+    def max_sleep(self) -> float:
+        return getattr(settings, 'IOT_SCENE_SCHEDULER_MAX_SLEEP', 3600)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """Перечитати всі сцени з розкладом (один запит, heapify). Returns кількість спрацювань."""
+        from .models import Scene
+
+        now = now or timezone.now()
+        rows = Scene.objects.filter(is_active=True).filter(
+            Q(auto_activate_time__isnull=False) | Q(auto_deactivate_time__isnull=False)
+        ).values_list('id', 'auto_activate_time', 'auto_deactivate_time')
+
+        with self._condition:
+            self._heap = []
+            self._entries = {}
+            self._times = {}
+            for scene_id, activate_at, deactivate_at in rows:
+                for action, time_of_day in ((ACTIVATE, activate_at), (DEACTIVATE, deactivate_at)):
+                    if time_of_day is not None:
+                        fire_at = next_occurrence(time_of_day, now).timestamp()
+                        self._entries[(scene_id, action)] = fire_at
+                        self._times[(scene_id, action)] = time_of_day
+                        self._heap.append((fire_at, next(self._counter), scene_id, action))
+            heapq.heapify(self._heap)
+            self._condition.notify()
+            return len(self._entries)
+
+    def reindex(
+        self,
+        scene_id: int,
+        activate_at: Optional[dt_time],
+        deactivate_at: Optional[dt_time],
+        now: Optional[datetime] = None
+    ):
+        """Оновити спрацювання однієї сцени (None - прибрати)."""
+        now = now or timezone.now()
+        with self._condition:
+            for action, time_of_day in ((ACTIVATE, activate_at), (DEACTIVATE, deactivate_at)):
+                key = (scene_id, action)
+                if time_of_day is None:
+                    self._entries.pop(key, None)
+                    self._times.pop(key, None)
+                    continue
+                fire_at = next_occurrence(time_of_day, now).timestamp()
+                self._times[key] = time_of_day
+                if self._entries.get(key) != fire_at:
+                    self._entries[key] = fire_at
+                    heapq.heappush(self._heap, (fire_at, next(self._counter), scene_id, action))
+            self._compact()
+            self._condition.notify()
+
+    def reindex_scene(self, scene_id: int):
+        """Перечитати розклад сцени з DB (один запит)."""
+        from .models import Scene
+
+        row = Scene.objects.filter(pk=scene_id, is_active=True).values_list(
+            'auto_activate_time', 'auto_deactivate_time'
+        ).first()
+        self.reindex(scene_id, *(row or (None, None)))
+
+    def _compact(self):
+        """Перебудувати heap, якщо застарілих елементів більше ніж живих."""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                item for item in self._heap
+                if self._entries.get((item[2], item[3])) == item[0]
+            ]
+            heapq.heapify(self._heap)
+
+    def _discard_stale(self):
+        while self._heap:
+            fire_at, _, scene_id, action = self._heap[0]
+            if self._entries.get((scene_id, action)) == fire_at:
+                return
+            heapq.heappop(self._heap)
+
+    def next_fire_at(self) -> Optional[float]:
+        """Epoch найближчого спрацювання або None."""
+        with self._condition:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Tuple[int, str]]:
+        """
+        Забрати всі спрацювання з fire_at <= now та перепланувати їх на
+        наступний день. Returns [(scene_id, action), ...].
+        """
+        now = now or timezone.now()
+        due = []
+        with self._condition:
+            while True:
+                self._discard_stale()
+                if not self._heap or self._heap[0][0] > now.timestamp():
+                    break
+                _, _, scene_id, action = heapq.heappop(self._heap)
+                due.append((scene_id, action))
+
+                next_fire_at = next_occurrence(self._times[(scene_id, action)], now).timestamp()
+                self._entries[(scene_id, action)] = next_fire_at
+                heapq.heappush(self._heap, (next_fire_at, next(self._counter), scene_id, action))
+        return due
+
+    # ------------------------------------------------------------------
+    # Fire
+    # ------------------------------------------------------------------
+
+    def fire(self, due: List[Tuple[int, str]]) -> Dict[str, int]:
+        """Виконати спрацювання (кожна сцена - один bulk batch)."""
+        from .services import SceneManager
+
+        fired = {ACTIVATE: 0, DEACTIVATE: 0}
+        for scene_id, action in due:
+            try:
+                if action == ACTIVATE:
+                    result = SceneManager.activate_scene(scene_id)
+                else:
+                    result = SceneManager.deactivate_scene(scene_id)
+            except Exception as e:
+                logger.error(f"Scheduled {action} of scene {scene_id} failed: {str(e)}")
+                continue
+            fired[action] += 1
+            if not result.get('success'):
+                logger.warning(f"Scheduled {action} of scene {scene_id}: {result.get('error') or result.get('devices_failed')}")
+        return fired
+
+    def run_pending(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Один крок loop: виконати все, що настало."""
+        due = self.pop_due(now)
+        if not due:
+            return {ACTIVATE: 0, DEACTIVATE: 0}
+        logger.info(f"Scene scheduler firing {len(due)} actions")
+        return self.fire(due)
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    def run(self):
+        """Blocking loop (management command run_scene_scheduler)."""
+        self._running = True
+        self._stop = False
+        listener = self._start_listener()
+        loaded_at = time.monotonic()
+        self.load()
+
+        try:
+            while not self._stop:
+                close_old_connections()
+                self.run_pending()
+
+                if listener is None and time.monotonic() - loaded_at >= self.reload_interval:
+                    self.load()
+                    loaded_at = time.monotonic()
+
+                timeout = self.max_sleep if listener is not None else self.reload_interval
+                next_fire_at = self.next_fire_at()
+                if next_fire_at is not None:
+                    timeout = min(timeout, max(0.0, next_fire_at - time.time()))
+                with self._condition:
+                    if not self._stop:
+                        self._condition.wait(timeout)
+        finally:
+            self._running = False
+            if listener is not None:
+                listener.stop()
+
+    def stop(self):
+        with self._condition:
+            self._stop = True
+            self._condition.notify()
+
+    def _start_listener(self):
+        """Redis pub/sub: scene id зі зміненим розкладом -> reindex_scene."""
+        client = get_redis()
+        if client is None:
+            logger.warning("Redis unavailable - scene schedule reloads every "
+                           f"{self.reload_interval}s instead of on change")
+            return None
+
+        def handle(message):
+            try:
+                close_old_connections()
+                self.reindex_scene(int(message['data']))
+            except Exception as e:
+                logger.error(f"Scene schedule reindex failed: {str(e)}")
+
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: handle})
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    @property
+    def channel(self) -> str:
+        return getattr(settings, 'IOT_SCENE_SCHEDULE_CHANNEL', SCHEDULE_CHANNEL)
+
+    # ------------------------------------------------------------------
+    # Change notification (signals)
+    # ------------------------------------------------------------------
+
+    def notify_changed(self, scene_id: int):
+        """Розклад сцени змінився (викликається з будь-якого процесу)."""
+        if self._running:
+            self.reindex_scene(scene_id)
+            return
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.publish(self.channel, scene_id)
+        except Exception as e:
+            logger.warning(f"Scene schedule notify failed for {scene_id}: {str(e)}")
+
+
+# Global instance
+scene_scheduler = SceneScheduler()
@@ -0,0 +1,327 @@
+"""
+Sensor Ingest - batch прийом показань сенсорів від gateways.
+
+Gateway відправляє тисячі показань одним запитом
+(POST /api/iot/sensors/ingest/):
+
+    application/x-ndjson     один JSON об'єкт на рядок
+    application/json         [{...}, ...] або {"readings": [...]}
+    application/msgpack      те саме, msgpack (якщо встановлений)
+
+Показання: {"device_id": "<IoTDevice.device_id>", "reading_type": "temperature",
+"value": 71.5, "unit": "F", "quality_score": 0.98, "timestamp": 1735660800.0}
+(timestamp - epoch seconds або ISO 8601, default - час прийому; не
+старіше за SENSOR_RAW_RETENTION_DAYS - старі raw дані вже прибрані).
+
+Валідація - векторизована (numpy masks по колонках), пристрої
+резолвляться одним запитом, запис - bulk_create чанками. У
+`iot_sensor_{pk}` groups йде лише останнє значення per
+(device, reading_type), не частіше ніж раз на SENSOR_BROADCAST_INTERVAL
+(Redis SET NX PX - throttle спільний для всіх процесів).
+"""
+import json
+import logging
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.redis_client import get_redis
+from .models import IoTDevice, SensorReading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    CHANNELS_AVAILABLE = True
+except ImportError:
+    CHANNELS_AVAILABLE = False
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonlines', 'application/jsonl')
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+READING_TYPE_MAX_LENGTH = SensorReading._meta.get_field('reading_type').max_length
+UNIT_MAX_LENGTH = SensorReading._meta.get_field('unit').max_length
+MAX_REPORTED_ERRORS = 20
+
+
+class IngestError(Exception):
+    """Payload не можна розібрати (400) або формат не підтримується (415)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _number(value) -> float:
+    """float або NaN (bool, None, рядки - невалідні)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return math.nan
+    return float(value)
+
+
+def _epoch(value, default: float) -> float:
+    """timestamp показання -> epoch seconds (NaN якщо не розпізнано)."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return math.nan
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed.timestamp()
+    return _number(value)
+
+
+class SensorIngestor:
+    """
+    Parse -> validate -> bulk_create -> throttled broadcast.
+    """
+
+    group_prefix = 'iot_sensor'
+    throttle_prefix = 'iot:sensor:sent'
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, 'SENSOR_INGEST_BATCH_SIZE', 1000)
+
+    @property
+    def max_readings(self) -> int:
+        return getattr(settings, 'SENSOR_INGEST_MAX_READINGS', 10000)
+
+    @property
+    def broadcast_interval(self) -> float:
+        """Мінімальний інтервал (seconds) між broadcast одного device/reading_type."""
+        return getattr(settings, 'SENSOR_BROADCAST_INTERVAL', 1.0)
+
+    @property
+    def max_clock_skew(self) -> float:
+        """Допустиме відхилення timestamp у майбутнє (seconds)."""
+        return getattr(settings, 'SENSOR_MAX_CLOCK_SKEW', 300)
+
+    @property
+    def max_age(self) -> timedelta:
+        """Найстаріше допустиме показання (raw retention)."""
+        return timedelta(days=getattr(settings, 'SENSOR_RAW_RETENTION_DAYS', 7))
+
+    # ------------------------------------------------------------------
+    # Parse
+    # ------------------------------------------------------------------
+
+    def parse(self, body: bytes, content_type: str) -> List[Any]:
+        """Тіло запиту -> список показань (елементи ще не валідовані)."""
+        content_type = (content_type or '').split(';')[0].strip().lower()
+
+        try:
+            if content_type in NDJSON_TYPES:
+                return [
+                    self._loads_line(line)
+                    for line in body.decode('utf-8').splitlines()
+                    if line.strip()
+                ]
+            if content_type in MSGPACK_TYPES:
+                if not MSGPACK_AVAILABLE:
+                    raise IngestError('msgpack is not installed on this server', status_code=415)
+                payload = msgpack.unpackb(body, raw=False)
+            elif content_type in ('application/json', ''):
+                payload = json.loads(body)
+            else:
+                raise IngestError(f'Unsupported content type: {content_type}', status_code=415)
+        except IngestError:
+            raise
+        except Exception as e:
+            raise IngestError(f'Malformed payload: {str(e)}')
+
+        if isinstance(payload, dict):
+            payload = payload.get('readings')
+        if not isinstance(payload, list):
+            raise IngestError('Expected a list of readings')
+        return payload
+
+    @staticmethod
+    def _loads_line(line: str):
+        """Один NDJSON рядок; зламаний рядок - невалідне показання, а не весь batch."""
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def ingest(self, readings: List[Any]) -> Dict[str, Any]:
+        """
+        Провалідувати та записати показання.
+
+        Returns: {'accepted', 'rejected', 'broadcast', 'errors': [{'index', 'error'}]}
+        """
+        if len(readings) > self.max_readings:
+            raise IngestError(
+                f'Too many readings: {len(readings)} (max {self.max_readings})',
+                status_code=413
+            )
+
+        count = len(readings)
+        now = timezone.now()
+        records = [reading if isinstance(reading, dict) else {} for reading in readings]
+
+        # Колонки
+        hardware_ids = [str(record.get('device_id', '')) for record in records]
+        devices = dict(
+            IoTDevice.objects.filter(
+                device_id__in=set(hardware_ids), is_active=True
+            ).values_list('device_id', 'pk')
+        )
+        device_pks = np.fromiter((devices.get(hid, -1) for hid in hardware_ids), dtype=np.int64, count=count)
+        values = np.fromiter((_number(record.get('value')) for record in records), dtype=float, count=count)
+        quality = np.fromiter(
+            (_number(record.get('quality_score', 1.0)) for record in records), dtype=float, count=count
+        )
+        timestamps = np.fromiter(
+            (_epoch(record.get('timestamp'), now.timestamp()) for record in records), dtype=float, count=count
+        )
+        reading_types = [record.get('reading_type') for record in records]
+        units = [record.get('unit', '') for record in records]
+        type_ok = np.fromiter(
+            (isinstance(rt, str) and 0 < len(rt) <= READING_TYPE_MAX_LENGTH for rt in reading_types),
+            dtype=bool, count=count
+        )
+        unit_ok = np.fromiter(
+            (isinstance(unit, str) and len(unit) <= UNIT_MAX_LENGTH for unit in units),
+            dtype=bool, count=count
+        )
+
+        # Маски (перша причина, що спрацювала, йде у звіт)
+        checks = [
+            (device_pks >= 0, 'unknown or inactive device'),
+            (type_ok, 'invalid reading_type'),
+            (np.isfinite(values), 'value must be a finite number'),
+            (np.isfinite(quality) & (quality >= 0) & (quality <= 1), 'quality_score must be between 0 and 1'),
+            (unit_ok, 'invalid unit'),
+            (
+                np.isfinite(timestamps)
+                & (timestamps >= (now - self.max_age).timestamp())
+                & (timestamps <= now.timestamp() + self.max_clock_skew),
+                'invalid timestamp'
+            ),
+        ]
+        valid = np.ones(count, dtype=bool)
+        for mask, _ in checks:
+            valid &= mask
+
+        errors = []
+        for index in np.flatnonzero(~valid)[:MAX_REPORTED_ERRORS]:
+            reason = next(message for mask, message in checks if not mask[index])
+            errors.append({'index': int(index), 'error': reason})
+
+        accepted = np.flatnonzero(valid)
+        rows = [
+            SensorReading(
+                device_id=int(device_pks[index]),
+                reading_type=reading_types[index],
+                value=float(values[index]),
+                unit=units[index],
+                quality_score=float(quality[index]),
+                timestamp=datetime.fromtimestamp(timestamps[index], tz=dt_timezone.utc),
+            )
+            for index in accepted
+        ]
+        for start in range(0, len(rows), self.batch_size):
+            SensorReading.objects.bulk_create(rows[start:start + self.batch_size])
+
+        broadcast = self.broadcast_latest(rows, timestamps[accepted]) if rows else 0
+
+        return {
+            'accepted': len(rows),
+            'rejected': count - len(rows),
+            'broadcast': broadcast,
+            'errors': errors,
+        }
+
+    # ------------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------------
+
+    def broadcast_latest(self, rows: List[SensorReading], timestamps) -> int:
+        """
+        Відправити останнє показання per (device, reading_type), якщо
+        з попереднього broadcast минуло broadcast_interval.
+        Returns кількість відправлених повідомлень.
+        """
+        latest = {}
+        for position in np.argsort(timestamps, kind='stable'):
+            row = rows[position]
+            latest[(row.device_id, row.reading_type)] = row
+
+        pairs = list(latest)
+        acquired = self._acquire([f'{self.throttle_prefix}:{pair[0]}:{pair[1]}' for pair in pairs])
+        due = [latest[pair] for pair, ok in zip(pairs, acquired) if ok]
+        if not due:
+            return 0
+
+        self._send(due)
+        return len(due)
+
+    def _acquire(self, keys: List[str]) -> List[bool]:
+        """
+        Атомарно зайняти throttle keys на broadcast_interval (SET NX PX,
+        одна pipeline). Без Redis - cache.add.
+        """
+        interval_ms = max(1, int(self.broadcast_interval * 1000))
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.set(key, 1, nx=True, px=interval_ms)
+                return [bool(ok) for ok in pipe.execute()]
+            except Exception as e:
+                logger.warning(f"Sensor throttle via Redis failed, using cache: {str(e)}")
+
+        return [cache.add(key, 1, self.broadcast_interval) for key in keys]
+
+    def _send(self, rows: List[SensorReading]):
+        if not CHANNELS_AVAILABLE:
+            return
+
+        try:
+            channel_layer = get_channel_layer()
+        except Exception as e:
+            logger.warning(f"Channel layer unavailable, sensor push skipped: {e}")
+            return
+        if channel_layer is None:
+            return
+
+        for row in rows:
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    f'{self.group_prefix}_{row.device_id}',
+                    {
+                        'type': 'sensor.reading',
+                        'reading_type': row.reading_type,
+                        'value': row.value,
+                        'unit': row.unit,
+                        'quality_score': row.quality_score,
+                        'timestamp': row.timestamp.isoformat(),
+                    }
+                )
+            except Exception as e:
+                logger.warning(f"Sensor push failed for device {row.device_id}: {e}")
+
+
+# Global instance
+sensor_ingestor = SensorIngestor()
@@ -0,0 +1,377 @@
+"""
+Sensor Rollups - агрегати SensorReading (minute / hour / day) та retention.
+
+update() (Celery beat, щохвилини) бере ще не агреговані показання
+(SensorReading.rolled_up=False - id watermark пропускав би рядки, що
+закомічені не в порядку id), перераховує лише зачеплені minute buckets
+з raw, hour buckets - з minute rollups, day - з hour. Buckets, чиє
+джерело вже частково прибрав prune() (raw старші
+SENSOR_RAW_RETENTION_DAYS, minute rollups старші
+SENSOR_MINUTE_ROLLUP_RETENTION_DAYS), не перераховуються - до них нові
+показання додаються (merge). Upsert rollups та позначка rolled_up
+йдуть в одній транзакції, тож збій посередині нічого не задвоює.
+
+series() для графіків обирає resolution так, щоб точок було не більше
+max_points: raw (короткий діапазон), minute, hour або day.
+
+prune() видаляє raw показання старші SENSOR_RAW_RETENTION_DAYS (лише
+rolled_up) та minute rollups старші
+SENSOR_MINUTE_ROLLUP_RETENTION_DAYS - батчами обмеженого розміру.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import SensorReading, SensorRollup
+
+logger = logging.getLogger(__name__)
+
+MINUTE = SensorRollup.RESOLUTION_MINUTE
+HOUR = SensorRollup.RESOLUTION_HOUR
+DAY = SensorRollup.RESOLUTION_DAY
+RAW = 'raw'
+
+STEPS = {
+    MINUTE: timedelta(minutes=1),
+    HOUR: timedelta(hours=1),
+    DAY: timedelta(days=1),
+}
+TRUNCATE = {
+    MINUTE: TruncMinute,
+    HOUR: TruncHour,
+    DAY: TruncDay,
+}
+# resolution -> resolution, з якої вона рахується
+SOURCES = {HOUR: MINUTE, DAY: HOUR}
+
+BucketKey = Tuple[int, str, datetime]  # (device_id, reading_type, bucket_start)
+
+
+def bucket_start(resolution: str, moment: datetime) -> datetime:
+    """Початок bucket у поточній timezone (так само як Trunc* в DB)."""
+    local = timezone.localtime(moment)
+    if resolution == MINUTE:
+        return local.replace(second=0, microsecond=0)
+    if resolution == HOUR:
+        return local.replace(minute=0, second=0, microsecond=0)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class SensorRollupService:
+    """
+    Incremental rollups, вибір resolution для графіків, retention.
+    """
+
+    @property
+    def chunk_size(self) -> int:
+        """Показань за один прохід update()."""
+        return getattr(settings, 'SENSOR_ROLLUP_CHUNK_SIZE', 5000)
+
+    @property
+    def max_chunks(self) -> int:
+        return getattr(settings, 'SENSOR_ROLLUP_MAX_CHUNKS', 20)
+
+    @property
+    def raw_retention(self) -> timedelta:
+        return timedelta(days=getattr(settings, 'SENSOR_RAW_RETENTION_DAYS', 7))
+
+    @property
+    def minute_retention(self) -> timedelta:
+        return timedelta(days=getattr(settings, 'SENSOR_MINUTE_ROLLUP_RETENTION_DAYS', 30))
+
+    @property
+    def prune_batch_size(self) -> int:
+        return getattr(settings, 'SENSOR_PRUNE_BATCH_SIZE', 5000)
+
+    @property
+    def prune_max_batches(self) -> int:
+        return getattr(settings, 'SENSOR_PRUNE_MAX_BATCHES', 20)
+
+    @property
+    def raw_max_span(self) -> timedelta:
+        """Найдовший діапазон графіка, що читається з raw показань."""
+        return timedelta(seconds=getattr(settings, 'SENSOR_CHART_RAW_MAX_SPAN', 3600))
+
+    # ------------------------------------------------------------------
+    # Rollups
+    # ------------------------------------------------------------------
+
+    def update(self) -> int:
+        """
+        Агрегувати нові показання. Returns кількість оброблених показань.
+        """
+        processed = 0
+
+        for _ in range(self.max_chunks):
+            with transaction.atomic():
+                # skip_locked - паралельний update() бере інші рядки
+                rows = list(
+                    SensorReading.objects.select_for_update(skip_locked=True)
+                    .filter(rolled_up=False)
+                    .order_by('id')
+                    .values_list('id', 'device_id', 'reading_type', 'timestamp')[:self.chunk_size]
+                )
+                if not rows:
+                    break
+
+                now = timezone.now()
+                ids = [row[0] for row in rows]
+                keys = {
+                    (device_id, reading_type, bucket_start(MINUTE, moment))
+                    for _, device_id, reading_type, moment in rows
+                    if device_id is not None
+                }
+                for resolution in (MINUTE, HOUR, DAY):
+                    if resolution != MINUTE:
+                        keys = {
+                            (device_id, reading_type, bucket_start(resolution, start))
+                            for device_id, reading_type, start in keys
+                        }
+                    cutoff = self._source_cutoff(resolution, now)
+                    pruned = {key for key in keys if cutoff is not None and key[2] < cutoff}
+                    self._recompute(resolution, keys - pruned)
+                    self._merge(resolution, pruned, ids)
+
+                SensorReading.objects.filter(id__in=ids).update(rolled_up=True)
+
+            processed += len(rows)
+            if len(rows) < self.chunk_size:
+                break
+
+        if processed:
+            logger.info(f"Rolled up {processed} sensor readings")
+        return processed
+
+    def _source_cutoff(self, resolution: str, now: datetime) -> Optional[datetime]:
+        """Buckets, що починаються раніше, могли втратити частину джерела (prune)."""
+        if resolution == MINUTE:
+            return now - self.raw_retention
+        if resolution == HOUR:
+            return now - self.minute_retention
+        return None
+
+    def _recompute(self, resolution: str, keys: Set[BucketKey]):
+        """Перерахувати buckets `keys` з джерела (raw або дрібніша resolution)."""
+        if not keys:
+            return
+
+        starts = [start for _, _, start in keys]
+        # + 1h запасу: day bucket у день переходу DST триває 25 годин
+        window_end = max(starts) + STEPS[resolution] + timedelta(hours=1)
+        device_ids = {device_id for device_id, _, _ in keys}
+        reading_types = {reading_type for _, reading_type, _ in keys}
+        truncate = TRUNCATE[resolution]
+
+        if resolution == MINUTE:
+            aggregates = SensorReading.objects.filter(
+                device_id__in=device_ids,
+                reading_type__in=reading_types,
+                timestamp__gte=min(starts),
+                timestamp__lt=window_end,
+            ).annotate(
+                bucket=truncate('timestamp')
+            ).values('device_id', 'reading_type', 'bucket').annotate(
+                n=Count('id'), sum_value=Sum('value'), low=Min('value'), high=Max('value')
+            ).order_by()
+        else:
+            aggregates = SensorRollup.objects.filter(
+                resolution=SOURCES[resolution],
+                device_id__in=device_ids,
+                reading_type__in=reading_types,
+                bucket_start__gte=min(starts),
+                bucket_start__lt=window_end,
+            ).annotate(
+                bucket=truncate('bucket_start')
+            ).values('device_id', 'reading_type', 'bucket').annotate(
+                n=Sum('count'), sum_value=Sum('total'), low=Min('min_value'), high=Max('max_value')
+            ).order_by()
+
+        rollups = [
+            SensorRollup(
+                device_id=row['device_id'],
+                reading_type=row['reading_type'],
+                resolution=resolution,
+                bucket_start=row['bucket'],
+                count=row['n'],
+                total=row['sum_value'],
+                min_value=row['low'],
+                max_value=row['high'],
+            )
+            for row in aggregates
+            if (row['device_id'], row['reading_type'], row['bucket']) in keys
+        ]
+        self._save(rollups)
+
+    def _merge(self, resolution: str, keys: Set[BucketKey], ids: List[int]):
+        """
+        Додати показання `ids` до існуючих rollups `keys` (джерело яких
+        вже частково видалене - перерахунок неможливий).
+        """
+        if not keys:
+            return
+
+        device_ids = {device_id for device_id, _, _ in keys}
+        reading_types = {reading_type for _, reading_type, _ in keys}
+        delta = SensorReading.objects.filter(
+            id__in=ids,
+            device_id__in=device_ids,
+            reading_type__in=reading_types,
+        ).annotate(
+            bucket=TRUNCATE[resolution]('timestamp')
+        ).values('device_id', 'reading_type', 'bucket').annotate(
+            n=Count('id'), sum_value=Sum('value'), low=Min('value'), high=Max('value')
+        ).order_by()
+
+        existing = {
+            (rollup.device_id, rollup.reading_type, rollup.bucket_start): rollup
+            for rollup in SensorRollup.objects.select_for_update().filter(
+                resolution=resolution,
+                device_id__in=device_ids,
+                reading_type__in=reading_types,
+                bucket_start__in={start for _, _, start in keys},
+            )
+        }
+
+        rollups = []
+        for row in delta:
+            key = (row['device_id'], row['reading_type'], row['bucket'])
+            if key not in keys:
+                continue
+            rollup = existing.get(key) or SensorRollup(
+                device_id=row['device_id'],
+                reading_type=row['reading_type'],
+                resolution=resolution,
+                bucket_start=row['bucket'],
+                count=0,
+                total=0,
+                min_value=row['low'],
+                max_value=row['high'],
+            )
+            rollup.count += row['n']
+            rollup.total += row['sum_value']
+            rollup.min_value = min(rollup.min_value, row['low'])
+            rollup.max_value = max(rollup.max_value, row['high'])
+            rollups.append(rollup)
+        self._save(rollups)
+
+    def _save(self, rollups):
+        SensorRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['device', 'reading_type', 'resolution', 'bucket_start'],
+            update_fields=['count', 'total', 'min_value', 'max_value', 'updated_at'],
+        )
+
+    # ------------------------------------------------------------------
+    # Charts
+    # ------------------------------------------------------------------
+
+    def choose_resolution(self, start: datetime, end: datetime, max_points: int) -> str:
+        """
+        Найдрібніша resolution, для якої діапазон вміщується в max_points
+        (і дані ще не видалені retention).
+        """
+        now = timezone.now()
+        span = end - start
+        if span <= self.raw_max_span and start >= now - self.raw_retention:
+            return RAW
+        if span / STEPS[MINUTE] <= max_points and start >= now - self.minute_retention:
+            return MINUTE
+        if span / STEPS[HOUR] <= max_points:
+            return HOUR
+        return DAY
+
+    def series(
+        self,
+        device_id: int,
+        reading_type: str,
+        start: datetime,
+        end: datetime,
+        max_points: int = 500,
+        resolution: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Точки графіка: {'resolution', 'points': [{'timestamp', 'min', 'max', 'avg', 'count'}]}.
+        """
+        resolution = resolution or self.choose_resolution(start, end, max_points)
+
+        if resolution == RAW:
+            readings = SensorReading.objects.filter(
+                device_id=device_id,
+                reading_type=reading_type,
+                timestamp__gte=start,
+                timestamp__lt=end,
+            ).order_by('timestamp').values_list('timestamp', 'value')
+            points = [
+                {'timestamp': moment.isoformat(), 'min': value, 'max': value, 'avg': value, 'count': 1}
+                for moment, value in readings
+            ]
+        else:
+            rollups = SensorRollup.objects.filter(
+                device_id=device_id,
+                reading_type=reading_type,
+                resolution=resolution,
+                bucket_start__gte=bucket_start(resolution, start),
+                bucket_start__lt=end,
+            ).order_by('bucket_start')
+            points = [
+                {
+                    'timestamp': rollup.bucket_start.isoformat(),
+                    'min': rollup.min_value,
+                    'max': rollup.max_value,
+                    'avg': rollup.avg_value,
+                    'count': rollup.count,
+                }
+                for rollup in rollups
+            ]
+
+        return {'resolution': resolution, 'points': points}
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def prune(self) -> Dict[str, int]:
+        """
+        Видалити застарілі raw показання (лише вже агреговані) та
+        minute rollups. Returns кількість видалених рядків.
+        """
+        now = timezone.now()
+        deleted = {
+            'readings': self._delete_in_batches(
+                SensorReading.objects.filter(
+                    timestamp__lt=now - self.raw_retention,
+                    rolled_up=True,
+                )
+            ),
+            'minute_rollups': self._delete_in_batches(
+                SensorRollup.objects.filter(
+                    resolution=MINUTE,
+                    bucket_start__lt=now - self.minute_retention,
+                )
+            ),
+        }
+        if any(deleted.values()):
+            logger.info(f"Pruned sensor data: {deleted}")
+        return deleted
+
+    def _delete_in_batches(self, queryset) -> int:
+        """DELETE батчами по prune_batch_size (короткі транзакції / locks)."""
+        deleted = 0
+        for _ in range(self.prune_max_batches):
+            ids = list(queryset.order_by().values_list('id', flat=True)[:self.prune_batch_size])
+            if not ids:
+                break
+            queryset.model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+        return deleted
+
+
+# Global instance
+sensor_rollups = SensorRollupService()
@@ -3,6 +3,7 @@ IoT Control Serializers для CoreSync API.
 DRF serializers для пристроїв, сцен та управління.
 """
 from rest_framework import serializers
+from .heartbeat import device_heartbeats
 from .models import IoTDevice, Scene, ControlLog, SensorReading
 from .validators import (
     validate_hex_color,
@@ -36,8 +37,16 @@ class IoTDeviceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'last_updated', 'created_at', 'is_online']
     
     def get_connection_status(self, obj):
-        """Отримати статус підключення"""
-        return 'online' if obj.is_online else 'offline'
+        """Статус підключення з heartbeat store (один MGET на весь список)"""
+        liveness = self.context.get('liveness')
+        if liveness is None or obj.pk not in liveness:
+            if isinstance(self.root, serializers.ListSerializer):
+                devices = list(self.root.instance)
+            else:
+                devices = [obj]
+            liveness = device_heartbeats.liveness(devices)
+            self.context['liveness'] = liveness
+        return 'online' if liveness[obj.pk] else 'offline'
 
 
 class IoTDeviceListSerializer(serializers.ModelSerializer):
@@ -214,6 +223,16 @@ class TemperatureControlSerializer(serializers.Serializer):
         return validate_temperature(value, unit='fahrenheit')
 
 
+class DeviceHeartbeatSerializer(serializers.Serializer):
+    """Serializer для batch heartbeats від gateway"""
+    
+    device_ids = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
 class ScentControlSerializer(serializers.Serializer):
     """Serializer для управління ароматом"""
     
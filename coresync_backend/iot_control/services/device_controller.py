@@ -3,9 +3,16 @@ Device Controller Service.
 Логіка управління IoT пристроями.
 """
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from ..dispatcher import command_dispatcher
+from ..drivers import DeviceCommand
+from ..heartbeat import device_heartbeats
+from ..log_buffer import control_log_buffer
 from ..models import IoTDevice, ControlLog
+from ..state_store import device_state_store
 
 logger = logging.getLogger(__name__)
 
@@ -72,17 +79,28 @@ class DeviceController:
                 'device_id': device_id
             }
         
-        # Зберегти попередній стан
+        # Live стан (Redis) і попередній стан для логу
+        device_state_store.overlay([device])
         previous_state = device.current_status.copy()
         
         try:
-            # Виконати дію на основі типу
-            new_status = cls._execute_action(device, action, value)
+            # Виконати дію через драйвер device_type
+            outcome = command_dispatcher.dispatch_sync([
+                DeviceCommand.from_device(device, action, value)
+            ])[0]
+            if not outcome['success']:
+                raise RuntimeError(outcome['error'])
+            new_status = outcome['status']
             
             # Оновити статус пристрою
             device.current_status = new_status
             device.is_online = True
-            device.save()
+            device.last_updated = timezone.now()
+            if device_state_store.write([device]):
+                # Успішна команда = heartbeat (як у save_batch)
+                device_heartbeats.touch([device.pk])
+            else:
+                device.save()
             
             # Залогувати дію
             cls._log_control_action(
@@ -101,6 +119,7 @@ class DeviceController:
                 'device_id': device_id,
                 'device_name': device.name,
                 'action': action,
+                'previous_status': previous_state,
                 'new_status': new_status,
                 'timestamp': datetime.now().isoformat()
             }
@@ -127,40 +146,148 @@ class DeviceController:
                 'device_id': device_id
             }
     
-    @staticmethod
-    def _execute_action(device: IoTDevice, action: str, value: Any) -> Dict:
-        """
-        Виконати конкретну дію на пристрої.
-        PLACEHOLDER - тут буде реальна інтеграція з обладнанням.
+    @classmethod
+    def build_batch(
+        cls,
+        commands: Iterable[Tuple[IoTDevice, str, Any]],
+        user=None,
+        ip_address: str = None,
+        action_type: str = 'manual',
+        scene=None
+    ) -> Tuple[List[Dict[str, Any]], List[IoTDevice], List[ControlLog]]:
         """
-        current_status = device.current_status.copy()
-        
-        if action == 'turn_on':
-            current_status['power'] = 'on'
-            current_status['last_action'] = 'turn_on'
-        
-        elif action == 'turn_off':
-            current_status['power'] = 'off'
-            current_status['last_action'] = 'turn_off'
+        Bulk версія control_device для вже завантажених пристроїв.
+        Команди виконуються драйверами одночасно (command_dispatcher);
+        нові стани та ControlLog збираються в пам'яті - нічого не пишеться.
         
-        elif action == 'set_value':
-            if isinstance(value, dict):
-                current_status.update(value)
-            else:
-                current_status['value'] = value
-            current_status['last_action'] = 'set_value'
+        Args:
+            commands: [(device, action, value), ...]
         
-        elif action == 'adjust':
-            if isinstance(value, dict):
-                # Merge з існуючим status
-                for key, val in value.items():
-                    current_status[key] = val
-            current_status['last_action'] = 'adjust'
+        Returns:
+            (results, devices to update, unsaved ControlLog rows)
+        """
+        commands = list(commands)
+        device_state_store.overlay(device for device, _, _ in commands)
+        outcomes = command_dispatcher.dispatch_sync([
+            DeviceCommand.from_device(device, action, value)
+            for device, action, value in commands
+        ])
+        return cls.collect_batch(
+            commands, outcomes, user=user, ip_address=ip_address,
+            action_type=action_type, scene=scene
+        )
+    
+    @staticmethod
+    def collect_batch(
+        commands: List[Tuple[IoTDevice, str, Any]],
+        outcomes: List[Dict[str, Any]],
+        user=None,
+        ip_address: str = None,
+        action_type: str = 'manual',
+        scene=None
+    ) -> Tuple[List[Dict[str, Any]], List[IoTDevice], List[ControlLog]]:
+        """Результати dispatch -> (results, devices to update, ControlLog rows)."""
+        now = timezone.now()
+        results = []
+        updated = []
+        logs = []
         
-        # Додати timestamp
-        current_status['last_update'] = datetime.now().isoformat()
+        for (device, action, value), outcome in zip(commands, outcomes):
+            previous_state = device.current_status.copy()
+            
+            if not outcome['success']:
+                error = outcome['error']
+                logs.append(ControlLog(
+                    user=user,
+                    device=device,
+                    scene=scene,
+                    action_type=action_type,
+                    action_description=f"Failed: {action} on {device.name}",
+                    previous_state=previous_state,
+                    new_state={},
+                    success=False,
+                    error_message=error,
+                    ip_address=ip_address
+                ))
+                results.append({
+                    'success': False,
+                    'error': error,
+                    'device_id': device.id
+                })
+                continue
+            
+            new_status = outcome['status']
+            
+            # bulk_update не застосовує auto_now
+            device.current_status = new_status
+            device.is_online = True
+            device.last_updated = now
+            device.updated_at = now
+            updated.append(device)
+            
+            logs.append(ControlLog(
+                user=user,
+                device=device,
+                scene=scene,
+                action_type=action_type,
+                action_description=f"{action} on {device.name}",
+                previous_state=previous_state,
+                new_state=new_status,
+                success=True,
+                ip_address=ip_address
+            ))
+            results.append({
+                'success': True,
+                'device_id': device.id,
+                'device_name': device.name,
+                'action': action,
+                'previous_status': previous_state,
+                'new_status': new_status,
+                'timestamp': datetime.now().isoformat()
+            })
         
-        return current_status
+        return results, updated, logs
+    
+    @staticmethod
+    def save_batch(devices: List[IoTDevice], logs: List[ControlLog]):
+        """
+        Записати batch: live стан у Redis (write-behind) або один
+        bulk_update пристроїв; логи йдуть в control_log_buffer
+        (bulk_create у background).
+        Викликається всередині transaction.atomic().
+        """
+        if devices:
+            if device_state_store.write(devices):
+                # Успішна команда = heartbeat (Redis path; DB path вже пише is_online)
+                device_heartbeats.touch(device.pk for device in devices)
+            else:
+                IoTDevice.objects.bulk_update(
+                    devices,
+                    ['current_status', 'is_online', 'last_updated', 'updated_at']
+                )
+        if logs:
+            control_log_buffer.extend(logs)
+    
+    @classmethod
+    def control_devices(
+        cls,
+        commands: Iterable[Tuple[IoTDevice, str, Any]],
+        user=None,
+        ip_address: str = None,
+        action_type: str = 'manual',
+        scene=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Відправити команди на кілька пристроїв (build_batch + save_batch).
+        Returns: результати у форматі control_device.
+        """
+        results, devices, logs = cls.build_batch(
+            commands, user=user, ip_address=ip_address,
+            action_type=action_type, scene=scene
+        )
+        with transaction.atomic():
+            cls.save_batch(devices, logs)
+        return results
     
     @classmethod
     def control_lighting(
@@ -180,20 +307,15 @@ class DeviceController:
                 'error': f'No lighting devices found in {location}'
             }
         
-        results = []
-        for device in devices:
-            value = {'brightness': brightness}
-            if color:
-                value['color'] = color
-            
-            result = cls.control_device(
-                device_id=device.id,
-                action='set_value',
-                value=value,
-                user=user,
-                ip_address=ip_address
-            )
-            results.append(result)
+        value = {'brightness': brightness}
+        if color:
+            value['color'] = color
+        
+        results = cls.control_devices(
+            [(device, 'set_value', value) for device in devices],
+            user=user,
+            ip_address=ip_address
+        )
         
         return {
             'success': True,
@@ -221,16 +343,12 @@ class DeviceController:
                 'error': f'No temperature control devices found in {location}'
             }
         
-        results = []
-        for device in devices:
-            result = cls.control_device(
-                device_id=device.id,
-                action='set_value',
-                value={'temperature': temperature, 'unit': 'fahrenheit'},
-                user=user,
-                ip_address=ip_address
-            )
-            results.append(result)
+        value = {'temperature': temperature, 'unit': 'fahrenheit'}
+        results = cls.control_devices(
+            [(device, 'set_value', value) for device in devices],
+            user=user,
+            ip_address=ip_address
+        )
         
         return {
             'success': True,
@@ -252,9 +370,9 @@ class DeviceController:
         error_message: str = '',
         ip_address: str = None
     ):
-        """Створити лог запис про дію управління"""
+        """Створити лог запис про дію управління (через control_log_buffer)"""
         try:
-            ControlLog.objects.create(
+            control_log_buffer.add(ControlLog(
                 user=user,
                 device=device,
                 action_type=action_type,
@@ -264,7 +382,7 @@ class DeviceController:
                 success=success,
                 error_message=error_message,
                 ip_address=ip_address
-            )
+            ))
         except Exception as e:
             logger.error(f"Failed to log control action: {str(e)}")
     
@@ -276,6 +394,8 @@ class DeviceController:
         if not device:
             return None
         
+        device_state_store.overlay([device])
+        device.is_online = device_heartbeats.liveness([device])[device.pk]
         return {
             'device_id': device.id,
             'device_name': device.name,
@@ -5,6 +5,10 @@ Scene Manager Service.
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from ..log_buffer import control_log_buffer
 from ..models import Scene, IoTDevice, ControlLog
 from .device_controller import DeviceController
 
@@ -80,61 +84,68 @@ class SceneManager:
             }
         
         # Перевірити доступ
-        if not scene.is_public and user and scene.user != user:
+        if not scene.is_public and user and scene.user_id != user.pk:
             return {
                 'success': False,
                 'error': 'Access denied to this scene',
                 'scene_id': scene_id
             }
         
-        results = []
-        errors = []
-        
         try:
-            # Застосувати налаштування до кожного пристрою
+            # Всі пристрої сцени одним запитом
+            devices = IoTDevice.objects.in_bulk(
+                list(scene.device_settings),
+                field_name='device_id'
+            )
+            active = {
+                device_id: device for device_id, device in devices.items()
+                if device.is_active
+            }
+            
+            commands = []
+            errors = []
             for device_id, settings in scene.device_settings.items():
-                try:
-                    device = IoTDevice.objects.get(
-                        device_id=device_id,
-                        is_active=True
-                    )
-                    
-                    # Відправити команду на пристрій
-                    result = DeviceController.control_device(
-                        device_id=device.id,
-                        action='set_value',
-                        value=settings,
-                        user=user,
-                        ip_address=ip_address
-                    )
-                    
-                    results.append(result)
-                    
-                    if not result['success']:
-                        errors.append({
-                            'device_id': device_id,
-                            'error': result.get('error', 'Unknown error')
-                        })
-                
-                except IoTDevice.DoesNotExist:
+                device = active.get(device_id)
+                if device is None:
                     errors.append({
                         'device_id': device_id,
                         'error': 'Device not found'
                     })
                     logger.warning(f"Device {device_id} in scene {scene_id} not found")
+                    continue
+                commands.append((device, 'set_value', settings))
             
-            # Оновити лічильник використання
-            scene.usage_count += 1
-            scene.save()
+            # Нові стани в пам'яті, далі batched writes
+            results, updated, logs = DeviceController.build_batch(
+                commands,
+                user=user,
+                ip_address=ip_address
+            )
+            for result in results:
+                if not result['success']:
+                    errors.append({
+                        'device_id': result['device_id'],
+                        'error': result.get('error', 'Unknown error')
+                    })
             
-            # Залогувати активацію сцени
-            cls._log_scene_activation(
+            # Лог активації сцени - в тому ж батчі control_log_buffer
+            logs.append(cls._build_scene_log(
                 user=user,
                 scene=scene,
                 success=len(errors) == 0,
                 errors=errors,
                 ip_address=ip_address
-            )
+            ))
+            
+            with transaction.atomic():
+                DeviceController.save_batch(updated, logs)
+                
+                # Оновити лічильник використання
+                Scene.objects.filter(pk=scene.pk).update(
+                    usage_count=F('usage_count') + 1,
+                    updated_at=timezone.now()
+                )
+            scene.usage_count += 1
             
             return {
                 'success': len(errors) == 0,
@@ -163,7 +174,49 @@ class SceneManager:
                 'error': str(e),
                 'scene_id': scene_id
             }
-    
+
+    @classmethod
+    def deactivate_scene(
+        cls,
+        scene_id: int,
+        user=None,
+        action_type: str = 'automatic'
+    ) -> Dict[str, Any]:
+        """
+        Деактивувати сцену - вимкнути всі її пристрої (одним batch).
+        Використовується scene_scheduler для auto_deactivate_time.
+        """
+        scene = cls.get_scene(scene_id)
+
+        if not scene:
+            return {
+                'success': False,
+                'error': 'Scene not found',
+                'scene_id': scene_id
+            }
+
+        devices = IoTDevice.objects.filter(
+            device_id__in=list(scene.device_settings),
+            is_active=True
+        )
+        results = DeviceController.control_devices(
+            [(device, 'turn_off', None) for device in devices],
+            user=user,
+            action_type=action_type,
+            scene=scene
+        )
+        failed = [result for result in results if not result['success']]
+
+        return {
+            'success': not failed,
+            'scene_id': scene_id,
+            'scene_name': scene.name,
+            'devices_updated': len(results) - len(failed),
+            'devices_failed': len(failed),
+            'results': results,
+            'timestamp': datetime.now().isoformat()
+        }
+
     @classmethod
     def create_scene(
         cls,
@@ -348,7 +401,34 @@ class SceneManager:
             }
     
     @staticmethod
+    def _build_scene_log(
+        user,
+        scene: Scene,
+        success: bool,
+        errors: list = None,
+        ip_address: str = None
+    ) -> ControlLog:
+        """Unsaved ControlLog активації сцени"""
+        error_message = ''
+        if errors:
+            error_message = f"Errors: {len(errors)} devices failed. " + \
+                           ', '.join([e.get('error', 'Unknown') for e in errors[:3]])
+        
+        return ControlLog(
+            user=user,
+            scene=scene,
+            action_type='scene',
+            action_description=f"Activated scene: {scene.name}",
+            previous_state={},
+            new_state=scene.device_settings,
+            success=success,
+            error_message=error_message,
+            ip_address=ip_address
+        )
+    
+    @classmethod
     def _log_scene_activation(
+        cls,
         user,
         scene: Scene,
         success: bool,
@@ -357,22 +437,7 @@ class SceneManager:
     ):
         """Залогувати активацію сцени"""
         try:
-            error_message = ''
-            if errors:
-                error_message = f"Errors: {len(errors)} devices failed. " + \
-                               ', '.join([e.get('error', 'Unknown') for e in errors[:3]])
-            
-            ControlLog.objects.create(
-                user=user,
-                scene=scene,
-                action_type='scene',
-                action_description=f"Activated scene: {scene.name}",
-                previous_state={},
-                new_state=scene.device_settings,
-                success=success,
-                error_message=error_message,
-                ip_address=ip_address
-            )
+            control_log_buffer.add(cls._build_scene_log(user, scene, success, errors, ip_address))
         except Exception as e:
             logger.error(f"Failed to log scene activation: {str(e)}")
 
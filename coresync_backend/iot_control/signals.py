@@ -0,0 +1,56 @@
+"""
+IoT Control Django Signals - keep live device state and scene schedule in sync.
+"""
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from .models import IoTDevice, Scene
+from .scene_scheduler import scene_scheduler
+from .state_store import device_state_store
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=IoTDevice)
+def iot_device_saved(sender, instance, **kwargs):
+    """Метадані пристрою змінились - перечитати локацію з DB."""
+    device_state_store.invalidate_location(instance.location)
+
+
+@receiver(post_delete, sender=IoTDevice)
+def iot_device_deleted(sender, instance, **kwargs):
+    """Видалити live стан пристрою."""
+    device_state_store.forget(instance.location, instance.pk)
+
+
+def _scene_schedule(instance):
+    return (instance.auto_activate_time, instance.auto_deactivate_time, instance.is_active)
+
+
+@receiver(post_init, sender=Scene)
+def scene_loaded(sender, instance, **kwargs):
+    """Запам'ятати розклад, щоб post_save переіндексовував лише зміни."""
+    instance._loaded_schedule = _scene_schedule(instance)
+
+
+@receiver(post_save, sender=Scene)
+def scene_saved(sender, instance, created, **kwargs):
+    """Розклад сцени змінився - переіндексувати тільки її."""
+    schedule = _scene_schedule(instance)
+    if created:
+        changed = schedule[0] is not None or schedule[1] is not None
+    else:
+        changed = schedule != getattr(instance, '_loaded_schedule', None)
+    instance._loaded_schedule = schedule
+    if changed:
+        # Після commit - scheduler перечитує сцену з DB
+        transaction.on_commit(lambda pk=instance.pk: scene_scheduler.notify_changed(pk))
+
+
+@receiver(post_delete, sender=Scene)
+def scene_deleted(sender, instance, **kwargs):
+    """Прибрати спрацювання видаленої сцени."""
+    if instance.auto_activate_time is not None or instance.auto_deactivate_time is not None:
+        transaction.on_commit(lambda pk=instance.pk: scene_scheduler.notify_changed(pk))
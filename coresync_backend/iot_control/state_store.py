@@ -0,0 +1,319 @@
+"""
+Device State Store - live стан пристроїв у Redis, write-behind у DB.
+
+Redis layout (per location):
+
+    iot:devices:{location}   hash  pk -> JSON метаданих (name, type, ...)
+    iot:state:{location}     hash  pk -> JSON {current_status, is_online, last_updated}
+    iot:state:dirty          set   "{location}:{pk}" - ще не записані в DB
+
+Команди пишуть лише state hash + dirty set (одна pipeline), читання
+статусу локації - два HGETALL. flush() забирає dirty записи (кілька
+змін одного пристрою = один запис) і зберігає їх одним bulk_update;
+викликається Celery beat кожні 10 секунд та при завершенні процесу.
+
+Без Redis store вимкнений - DeviceController пише в DB напряму.
+"""
+import atexit
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.utils import timezone
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+META_FIELDS = ('id', 'name', 'device_type', 'device_type_display', 'location', 'location_display')
+
+
+class DeviceStateStore:
+    """
+    Redis hash per location як source of truth для live стану.
+    """
+
+    key_prefix = 'iot'
+    flush_batch = 500
+
+    def __init__(self):
+        self._atexit_registered = False
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _meta_key(self, location: str) -> str:
+        return f'{self.key_prefix}:devices:{location}'
+
+    def _state_key(self, location: str) -> str:
+        return f'{self.key_prefix}:state:{location}'
+
+    @property
+    def _dirty_key(self) -> str:
+        return f'{self.key_prefix}:state:dirty'
+
+    @property
+    def enabled(self) -> bool:
+        return get_redis() is not None
+
+    @staticmethod
+    def _encode_state(device) -> str:
+        return json.dumps({
+            'current_status': device.current_status,
+            'is_online': device.is_online,
+            'last_updated': device.last_updated.isoformat() if device.last_updated else None,
+        })
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def snapshot(self, location: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Пристрої локації у форматі IoTDeviceListSerializer.
+        None якщо Redis недоступний (читати з DB).
+        """
+        client = get_redis()
+        if client is None:
+            return None
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hgetall(self._meta_key(location))
+            pipe.hgetall(self._state_key(location))
+            meta, states = pipe.execute()
+            if not meta:
+                meta, states = self._hydrate(client, location)
+        except Exception as e:
+            logger.error(f"Device state read error for {location}: {str(e)}")
+            return None
+
+        devices = []
+        for pk, raw_meta in meta.items():
+            device = json.loads(raw_meta)
+            raw_state = states.get(pk)
+            if raw_state is not None:
+                state = json.loads(raw_state)
+                device['current_status'] = state['current_status']
+                device['is_online'] = state['is_online']
+            devices.append(device)
+
+        devices.sort(key=lambda device: (device['device_type'], device['name']))
+        return devices
+
+    def overlay(self, devices: Iterable) -> None:
+        """Підставити live стан з Redis в завантажені IoTDevice (HMGET per location)."""
+        devices = list(devices)
+        client = get_redis()
+        if client is None or not devices:
+            return
+
+        by_location = {}
+        for device in devices:
+            by_location.setdefault(device.location, []).append(device)
+        try:
+            pipe = client.pipeline(transaction=False)
+            for location, location_devices in by_location.items():
+                pipe.hmget(self._state_key(location), [str(device.pk) for device in location_devices])
+            values = pipe.execute()
+        except Exception as e:
+            logger.error(f"Device state read error: {str(e)}")
+            return
+
+        for location_devices, raw_states in zip(by_location.values(), values):
+            for device, raw_state in zip(location_devices, raw_states):
+                if raw_state is None:
+                    continue
+                state = json.loads(raw_state)
+                device.current_status = state['current_status']
+                device.is_online = state['is_online']
+                if state['last_updated']:
+                    device.last_updated = datetime.fromisoformat(state['last_updated'])
+
+    def _hydrate(self, client, location: str):
+        """Завантажити локацію з DB одним запитом (новіший стан у Redis не перезаписується)."""
+        from .models import IoTDevice
+        from .serializers import IoTDeviceListSerializer
+
+        devices = list(IoTDevice.objects.filter(location=location, is_active=True))
+        data = IoTDeviceListSerializer(devices, many=True).data
+
+        meta = {
+            str(item['id']): json.dumps({field: item[field] for field in META_FIELDS})
+            for item in data
+        }
+        pipe = client.pipeline(transaction=False)
+        if meta:
+            pipe.hset(self._meta_key(location), mapping=meta)
+        for device in devices:
+            pipe.hsetnx(self._state_key(location), str(device.pk), self._encode_state(device))
+        pipe.hgetall(self._state_key(location))
+        states = pipe.execute()[-1]
+        return meta, states
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+
+    def write(self, devices: Iterable) -> bool:
+        """
+        Записати новий стан пристроїв (одна pipeline).
+        Returns False якщо Redis недоступний - викликач пише в DB.
+        """
+        devices = list(devices)
+        client = get_redis()
+        if client is None or not devices:
+            return False
+
+        try:
+            pipe = client.pipeline(transaction=True)
+            for device in devices:
+                pipe.hset(self._state_key(device.location), str(device.pk), self._encode_state(device))
+                pipe.sadd(self._dirty_key, f'{device.location}:{device.pk}')
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Device state write error: {str(e)}")
+            return False
+
+        self._register_atexit()
+        return True
+
+    def set_online(self, devices: Iterable, is_online: bool):
+        """
+        Оновити is_online у live стані [(pk, location), ...], не чіпаючи
+        current_status (heartbeat sweep). WATCH - паралельна команда не губиться.
+        """
+        client = get_redis()
+        if client is None:
+            return
+
+        by_location = {}
+        for pk, location in devices:
+            by_location.setdefault(location, []).append(str(pk))
+
+        for location, pks in by_location.items():
+            key = self._state_key(location)
+
+            def update(pipe):
+                mapping = {}
+                for pk, raw_state in zip(pks, pipe.hmget(key, pks)):
+                    if raw_state is None:
+                        continue
+                    state = json.loads(raw_state)
+                    state['is_online'] = is_online
+                    mapping[pk] = json.dumps(state)
+                pipe.multi()
+                if mapping:
+                    pipe.hset(key, mapping=mapping)
+
+            try:
+                client.transaction(update, key)
+            except Exception as e:
+                logger.error(f"Device state liveness update error for {location}: {str(e)}")
+
+    def invalidate_location(self, location: str):
+        """Метадані локації змінились (IoTDevice saved / deleted)."""
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.delete(self._meta_key(location))
+        except Exception as e:
+            logger.error(f"Device state invalidate error for {location}: {str(e)}")
+
+    def forget(self, location: str, device_pk: int):
+        """Видалити стан пристрою (IoTDevice deleted)."""
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.hdel(self._state_key(location), str(device_pk))
+            pipe.hdel(self._meta_key(location), str(device_pk))
+            pipe.srem(self._dirty_key, f'{location}:{device_pk}')
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Device state forget error for {device_pk}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """
+        Записати dirty стани в IoTDevice (bulk_update батчами).
+        Returns кількість оновлених пристроїв.
+        """
+        client = get_redis()
+        if client is None:
+            return 0
+
+        flushed = 0
+        while True:
+            members = client.spop(self._dirty_key, self.flush_batch)
+            if not members:
+                break
+            try:
+                flushed += self._flush_members(client, members)
+            except Exception as e:
+                # Повернути в dirty set - наступний flush повторить
+                client.sadd(self._dirty_key, *members)
+                logger.error(f"Device state flush error: {str(e)}")
+                break
+
+        if flushed:
+            logger.info(f"Flushed live state of {flushed} IoT devices")
+        return flushed
+
+    def _flush_members(self, client, members) -> int:
+        from .models import IoTDevice
+
+        by_location = {}
+        for member in members:
+            location, _, pk = member.rpartition(':')
+            by_location.setdefault(location, []).append(pk)
+
+        pipe = client.pipeline(transaction=False)
+        for location, pks in by_location.items():
+            pipe.hmget(self._state_key(location), pks)
+        states = {}
+        for (location, pks), values in zip(by_location.items(), pipe.execute()):
+            for pk, raw_state in zip(pks, values):
+                if raw_state is not None:
+                    states[int(pk)] = json.loads(raw_state)
+
+        devices = IoTDevice.objects.in_bulk(list(states))
+        now = timezone.now()
+        for pk, device in devices.items():
+            state = states[pk]
+            device.current_status = state['current_status']
+            device.is_online = state['is_online']
+            device.last_updated = (
+                datetime.fromisoformat(state['last_updated']) if state['last_updated'] else now
+            )
+            device.updated_at = now
+
+        IoTDevice.objects.bulk_update(
+            list(devices.values()),
+            ['current_status', 'is_online', 'last_updated', 'updated_at'],
+            batch_size=self.flush_batch
+        )
+        return len(devices)
+
+    def _register_atexit(self):
+        """Flush при завершенні процесу (один раз, після першого write)."""
+        if not self._atexit_registered:
+            atexit.register(self._flush_on_exit)
+            self._atexit_registered = True
+
+    def _flush_on_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Device state flush on exit failed: {str(e)}")
+
+
+# Global instance
+device_state_store = DeviceStateStore()
@@ -0,0 +1,51 @@
+"""
+IoT Control Celery Tasks - Async operations.
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='iot_control.tasks.flush_device_state')
+def flush_device_state():
+    """
+    Записати live стан пристроїв з Redis в IoTDevice (write-behind).
+    Celery beat: кожні 10 секунд.
+    """
+    from .state_store import device_state_store
+    
+    return device_state_store.flush()
+
+
+@shared_task(name='iot_control.tasks.rollup_sensor_readings')
+def rollup_sensor_readings():
+    """
+    Оновити minute / hour / day rollups новими показаннями сенсорів.
+    Celery beat: щохвилини.
+    """
+    from .sensor_rollups import sensor_rollups
+    
+    return sensor_rollups.update()
+
+
+@shared_task(name='iot_control.tasks.prune_sensor_readings')
+def prune_sensor_readings():
+    """
+    Retention: видалити старі raw показання та minute rollups батчами.
+    Celery beat: щогодини.
+    """
+    from .sensor_rollups import sensor_rollups
+    
+    return sensor_rollups.prune()
+
+
+@shared_task(name='iot_control.tasks.sweep_device_heartbeats')
+def sweep_device_heartbeats():
+    """
+    Пристрої без heartbeat довше IOT_HEARTBEAT_TTL -> offline.
+    Celery beat: кожні 15 секунд.
+    """
+    from .heartbeat import device_heartbeats
+    
+    return device_heartbeats.sweep()
@@ -0,0 +1,12 @@
+"""
+IoT Control Throttling - DRF throttles на core.rate_limit.
+"""
+from core.rate_limit import UserScopeThrottle
+
+
+class IoTCommandThrottle(UserScopeThrottle):
+    """
+    Команди пристроям / активація сцен: IOT_COMMAND_RATE_LIMIT на хвилину
+    per user (спільний ліміт з IoTControlConsumer).
+    """
+    scope = 'iot_command'
@@ -5,10 +5,11 @@ Helper functions для IoT операцій.
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
-from django.core.cache import cache
 from django.utils import timezone
 from django.db import models
 
+from core.rate_limit import rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,16 +45,12 @@ def rate_limit_check(user_id: int, action: str, limit: int = 100, window: int =
     Returns:
         bool: True якщо дозволено, False якщо перевищено limit
     """
-    cache_key = f'rate_limit:{action}:{user_id}'
-    
-    current_count = cache.get(cache_key, 0)
+    result = rate_limiter.hit(f'{action}:{user_id}', limit, window)
     
-    if current_count >= limit:
+    if not result.allowed:
         logger.warning(f"Rate limit exceeded for user {user_id}, action: {action}")
-        return False
     
-    cache.set(cache_key, current_count + 1, window)
-    return True
+    return result.allowed
 
 
 def sanitize_device_status(status: Dict[str, Any]) -> Dict[str, Any]:
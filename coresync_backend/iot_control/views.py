@@ -2,11 +2,14 @@
 IoT Control Views для CoreSync API.
 REST API endpoints для управління IoT пристроями та сценами.
 """
+from datetime import timedelta
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from .models import IoTDevice, Scene, ControlLog, SensorReading
 from .serializers import (
@@ -20,11 +23,17 @@ from .serializers import (
     SensorReadingSerializer,
     LightingControlSerializer,
     TemperatureControlSerializer,
+    DeviceHeartbeatSerializer,
     ScentControlSerializer,
     MusicControlSerializer
 )
+from .heartbeat import device_heartbeats
+from .log_buffer import control_log_buffer
 from .permissions import IsMemberUser, IsDeviceOwnerOrPublic, IsAdminOrReadOnly
+from .sensor_ingest import IngestError, sensor_ingestor
+from .sensor_rollups import sensor_rollups
 from .services import DeviceController, SceneManager
+from .throttling import IoTCommandThrottle
 from .utils import get_client_ip
 
 
@@ -33,6 +42,7 @@ class IoTDeviceViewSet(viewsets.ModelViewSet):
     
     queryset = IoTDevice.objects.filter(is_active=True)
     permission_classes = [IsAuthenticated, IsMemberUser]
+    throttle_classes = [IoTCommandThrottle]
     
     def get_serializer_class(self):
         """Вибрати serializer в залежності від action"""
@@ -162,6 +172,27 @@ class IoTDeviceViewSet(viewsets.ModelViewSet):
         else:
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated, IsAdminOrReadOnly],
+        throttle_classes=[]
+    )
+    def heartbeat(self, request):
+        """
+        Batch heartbeats від gateway (staff only): {"device_ids": [...]}.
+        Пристрої без heartbeat довше IOT_HEARTBEAT_TTL стають offline.
+        """
+        serializer = DeviceHeartbeatSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        result = device_heartbeats.record(serializer.validated_data['device_ids'])
+        return Response(result)
 
 
 class SceneViewSet(viewsets.ModelViewSet):
@@ -169,6 +200,7 @@ class SceneViewSet(viewsets.ModelViewSet):
     
     queryset = Scene.objects.filter(is_active=True)
     permission_classes = [IsAuthenticated, IsMemberUser, IsDeviceOwnerOrPublic]
+    throttle_classes = [IoTCommandThrottle]
     
     def get_serializer_class(self):
         """Вибрати serializer"""
@@ -318,6 +350,17 @@ class ControlLogViewSet(viewsets.ReadOnlyModelViewSet):
             'count': len(logs),
             'logs': serializer.data
         })
+    
+    @action(detail=False, methods=['get'])
+    def pipeline(self, request):
+        """Метрики буфера ControlLog (staff only): buffered, lag, dropped"""
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Staff access required'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response(control_log_buffer.stats())
 
 
 class SensorReadingViewSet(viewsets.ReadOnlyModelViewSet):
@@ -341,4 +384,62 @@ class SensorReadingViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(reading_type=reading_type)
         
         return queryset.order_by('-timestamp')[:100]
+    
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """
+        Batch прийом показань від gateway (NDJSON / JSON / msgpack).
+        Тіло читається напряму - DRF parsers тут не використовуються.
+        """
+        try:
+            readings = sensor_ingestor.parse(request.body, request.content_type)
+            result = sensor_ingestor.ingest(readings)
+        except IngestError as e:
+            return Response({'error': str(e)}, status=e.status_code)
+        
+        if result['accepted']:
+            return Response(result, status=status.HTTP_201_CREATED)
+        else:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Дані для графіка: ?device=<pk>&type=temperature&start=<ISO>&end=<ISO>&max_points=500
+        Resolution (raw / minute / hour / day) обирається за діапазоном.
+        """
+        device_id = request.query_params.get('device')
+        reading_type = request.query_params.get('type')
+        if not device_id or not reading_type:
+            return Response(
+                {'error': 'device and type are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            end = self._parse_moment(request.query_params.get('end')) or timezone.now()
+            start = self._parse_moment(request.query_params.get('start')) or end - timedelta(days=1)
+            max_points = min(int(request.query_params.get('max_points', 500)), 5000)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if start >= end or max_points < 1:
+            return Response(
+                {'error': 'start must be before end and max_points positive'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(sensor_rollups.series(device_id, reading_type, start, end, max_points))
+    
+    @staticmethod
+    def _parse_moment(value):
+        """ISO 8601 -> aware datetime (None якщо не передано)."""
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f'Invalid datetime: {value}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
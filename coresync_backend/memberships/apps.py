@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MembershipsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'memberships'
+    
+    def ready(self):
+        """Import signals."""
+        import memberships.signals  # noqa
@@ -0,0 +1,222 @@
+"""
+Membership Context - privileges користувача, обчислені один раз.
+
+Замість того щоб кожен hot path (availability, booking, pricing, shop)
+ходив по user.membership.plan та перераховував Membership.is_active,
+MembershipContext резолвиться один раз на request (middleware) і
+кешується per user у спільному cache (CACHES default). Cache key
+включає поточну дату, тому is_active автоматично перераховується на
+межі дня; signals видаляють запис при зміні Membership /
+MembershipPlan / User.membership_status - одразу і ще раз після
+commit, бо інший процес міг закешувати рядок до commit.
+"""
+import logging
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Access tiers для priority windows
+TIER_VIP = 'vip'
+TIER_MEMBER = 'member'
+TIER_NON_MEMBER = 'non_member'
+
+# Booking advance window (days)
+ADVANCE_DAYS_VIP = 90
+ADVANCE_DAYS_PRIORITY = 60
+ADVANCE_DAYS_MEMBER = 30
+ADVANCE_DAYS_NON_MEMBER = 3
+
+
+class MembershipContext:
+    """
+    Незмінний знімок membership privileges користувача.
+    """
+
+    def __init__(
+        self,
+        user_id: Optional[int] = None,
+        is_active: bool = False,
+        plan_id: Optional[int] = None,
+        plan_name: str = '',
+        discount_percentage: int = 0,
+        priority_booking: bool = False,
+        monthly_service_credits: int = 0,
+        services_used_this_month: int = 0,
+        is_member_status: bool = False
+    ):
+        self.user_id = user_id
+        self.is_active = is_active
+        self.plan_id = plan_id
+        self.plan_name = plan_name
+        self.discount_percentage = discount_percentage
+        self.priority_booking = priority_booking
+        self.monthly_service_credits = monthly_service_credits
+        self.services_used_this_month = services_used_this_month
+        # User.membership_status != 'none' (used by Service member pricing)
+        self.is_member_status = is_member_status
+
+    def __repr__(self):
+        return f"<MembershipContext user={self.user_id} tier={self.tier} plan={self.plan_name!r}>"
+
+    @classmethod
+    def from_membership(cls, user, membership=None):
+        """Побудувати context з User та (опціонально) Membership з plan."""
+        is_member_status = getattr(user, 'membership_status', 'none') != 'none'
+        if membership is None:
+            return cls(user_id=user.pk, is_member_status=is_member_status)
+
+        plan = membership.plan
+        return cls(
+            user_id=user.pk,
+            is_active=membership.is_active,
+            plan_id=plan.id,
+            plan_name=plan.name,
+            discount_percentage=plan.discount_percentage,
+            priority_booking=plan.priority_booking,
+            monthly_service_credits=plan.monthly_service_credits,
+            services_used_this_month=membership.services_used_this_month,
+            is_member_status=is_member_status,
+        )
+
+    @property
+    def is_vip(self) -> bool:
+        return self.is_active and self.plan_name.lower() == 'unlimited'
+
+    @property
+    def tier(self) -> str:
+        """Access tier для priority windows."""
+        if self.is_vip:
+            return TIER_VIP
+        if self.is_active:
+            return TIER_MEMBER
+        return TIER_NON_MEMBER
+
+    @property
+    def booking_tier(self) -> str:
+        """Booking.booking_tier value."""
+        if self.is_vip:
+            return 'vip'
+        if self.is_active:
+            return 'member_priority' if self.priority_booking else 'member_standard'
+        return 'non_member'
+
+    @property
+    def is_priority_booking(self) -> bool:
+        return self.is_vip or (self.is_active and self.priority_booking)
+
+    @property
+    def max_advance_days(self) -> int:
+        """Maximum days a user can book in advance."""
+        if self.is_vip:
+            return ADVANCE_DAYS_VIP  # 3 months for VIP
+        if self.is_active:
+            if self.priority_booking:
+                return ADVANCE_DAYS_PRIORITY  # 2 months for priority members
+            return ADVANCE_DAYS_MEMBER  # 1 month for regular members
+        return ADVANCE_DAYS_NON_MEMBER  # 3 days for non-members
+
+    @property
+    def active_discount(self) -> int:
+        """Discount percentage, if membership is active."""
+        return self.discount_percentage if self.is_active else 0
+
+    @property
+    def credits_remaining(self) -> Optional[int]:
+        """Monthly service credits left (None = unlimited / no membership)."""
+        if not self.is_active or self.monthly_service_credits == 0:
+            return None
+        return max(0, self.monthly_service_credits - self.services_used_this_month)
+
+
+ANONYMOUS_CONTEXT = MembershipContext()
+
+
+class MembershipContextCache:
+    """
+    Per-user cache для MembershipContext.
+    """
+
+    cache_prefix = 'membership_context'
+    cache_ttl = 60 * 60  # 1 hour
+
+    @property
+    def _version_key(self) -> str:
+        return f'{self.cache_prefix}:version'
+
+    def _get_version(self) -> int:
+        version = cache.get(self._version_key)
+        if version is None:
+            version = 1
+            cache.add(self._version_key, version, None)
+        return version
+
+    def _user_key(self, user_id: int) -> str:
+        today = timezone.localdate().isoformat()
+        return f'{self.cache_prefix}:v{self._get_version()}:{user_id}:{today}'
+
+    def get(self, user) -> MembershipContext:
+        """Отримати context користувача (cache або один запит до БД)."""
+        if user is None or not user.is_authenticated:
+            return ANONYMOUS_CONTEXT
+
+        key = self._user_key(user.pk)
+        context = cache.get(key)
+        if context is None:
+            context = self._load(user)
+            cache.set(key, context, self.cache_ttl)
+        return context
+
+    def _load(self, user) -> MembershipContext:
+        from .models import Membership
+
+        membership = Membership.objects.select_related('plan').filter(user_id=user.pk).first()
+        return MembershipContext.from_membership(user, membership)
+
+    def invalidate(self, user_id: int):
+        """Видалити context користувача (Membership / User changes)."""
+        key = self._user_key(user_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    def invalidate_all(self):
+        """Інвалідувати всі contexts (MembershipPlan changes)."""
+        self._bump_version()
+        transaction.on_commit(self._bump_version)
+
+    def _bump_version(self):
+        """Атомарний cache.incr; ключ витіснено - створити (або incr, якщо інший процес встиг)."""
+        try:
+            cache.incr(self._version_key)
+        except ValueError:
+            if not cache.add(self._version_key, 2, None):
+                cache.incr(self._version_key)
+
+
+# Global instance
+membership_contexts = MembershipContextCache()
+
+
+def get_membership_context(user) -> MembershipContext:
+    """MembershipContext для user (cached)."""
+    return membership_contexts.get(user)
+
+
+def get_request_membership(request) -> MembershipContext:
+    """
+    MembershipContext поточного request - резолвиться один раз
+    (MembershipContextMiddleware або перший виклик) і зберігається
+    на request.
+    """
+    context = getattr(request, 'membership_context', None)
+    if context is None:
+        context = get_membership_context(getattr(request, 'user', None))
+        try:
+            request.membership_context = context
+        except AttributeError:
+            pass
+    return context
@@ -0,0 +1,25 @@
+"""
+Membership Middleware.
+Резолвить MembershipContext один раз на request.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .context import get_membership_context
+
+
+class MembershipContextMiddleware:
+    """
+    Додає request.membership_context (lazy).
+    
+    Context обчислюється при першому зверненні - вже після DRF
+    authentication (JWT), яка виставляє request.user.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.membership_context = SimpleLazyObject(
+            lambda: get_membership_context(request.user)
+        )
+        return self.get_response(request)
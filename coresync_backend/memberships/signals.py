@@ -0,0 +1,30 @@
+"""
+Memberships Django Signals - MembershipContext cache invalidation.
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Membership, MembershipPlan
+from .context import membership_contexts
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def membership_changed(sender, instance, **kwargs):
+    """Drop cached context of the membership owner."""
+    membership_contexts.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=MembershipPlan)
+@receiver(post_delete, sender=MembershipPlan)
+def plan_changed(sender, instance, **kwargs):
+    """Plan terms affect every member - drop all contexts."""
+    membership_contexts.invalidate_all()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, created, **kwargs):
+    """membership_status lives on User."""
+    if not created:
+        membership_contexts.invalidate(instance.pk)
@@ -93,6 +93,37 @@ class EmailSender:
             logger.error(f"Error sending reminder: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def send_waitlist_promotion(self, booking) -> Dict[str, Any]:
+        """Send notification that a waitlisted slot was booked for the user."""
+        try:
+            context = {
+                'booking': booking,
+                'user': booking.user,
+                'service': booking.service,
+                'date': booking.booking_date,
+                'time': booking.start_time,
+                'location': '1544 71st Street, Brooklyn, NY',
+                'manage_url': 'https://coresync.life/dashboard/bookings/'
+            }
+            
+            html_content = render_to_string(
+                'emails/waitlist_promotion.html',
+                context
+            )
+            text_content = strip_tags(html_content)
+            
+            return self._send_email(
+                to_email=booking.user.email,
+                to_name=booking.user.get_full_name(),
+                subject=f'A spot opened up - {booking.service.name} is booked',
+                html_content=html_content,
+                text_content=text_content
+            )
+        
+        except Exception as e:
+            logger.error(f"Error sending waitlist promotion: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
     def send_review_request(self, booking) -> Dict[str, Any]:
         """Send review request email."""
         try:
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_alter_emaillog_email_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emaillog',
+            name='email_type',
+            field=models.CharField(choices=[('booking_confirmation', 'Booking Confirmation'), ('booking_reminder', '24hr Reminder'), ('review_request', 'Review Request'), ('membership_welcome', 'Membership Welcome'), ('technician_notification', 'Technician Notification'), ('password_reset', 'Password Reset'), ('payment_receipt', 'Payment Receipt'), ('cancellation', 'Booking Cancellation'), ('waitlist_promotion', 'Waitlist Promotion')], max_length=30),
+        ),
+    ]
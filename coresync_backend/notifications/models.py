@@ -21,6 +21,7 @@ class EmailLog(models.Model):
         ('password_reset', 'Password Reset'),
         ('payment_receipt', 'Payment Receipt'),
         ('cancellation', 'Booking Cancellation'),
+        ('waitlist_promotion', 'Waitlist Promotion'),
     ]
     
     STATUS_CHOICES = [
@@ -195,6 +195,47 @@ def send_membership_welcome(user_id: int):
         raise
 
 
+@shared_task(name='notifications.tasks.send_waitlist_promotion')
+def send_waitlist_promotion(booking_id: int):
+    """
+    Send waitlist promotion email.
+    Trigger: cancel_booking звільнив місце і booking створено з waitlist.
+    """
+    try:
+        from services.booking_models import Booking
+        from .email_sender import EmailSender
+        from .models import EmailLog
+        
+        booking = Booking.objects.select_related('user', 'service').get(id=booking_id)
+        
+        # Booking змінює розклад клієнта - preference для confirmations
+        if not _check_email_preference(booking.user, 'email_booking_confirmations'):
+            logger.info(f"User {booking.user.email} opted out of confirmations")
+            return
+        
+        sender = EmailSender()
+        result = sender.send_waitlist_promotion(booking)
+        
+        EmailLog.objects.create(
+            booking=booking,
+            recipient_email=booking.user.email,
+            recipient_name=booking.user.get_full_name(),
+            email_type='waitlist_promotion',
+            subject=f'A spot opened up - {booking.service.name} is booked',
+            status='sent' if result['success'] else 'failed',
+            sent_at=timezone.now() if result['success'] else None,
+            sendgrid_message_id=result.get('message_id', ''),
+            error_message=result.get('error', '')
+        )
+        
+        logger.info(f"Waitlist promotion sent for booking {booking_id}")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Error sending waitlist promotion: {str(e)}")
+        raise
+
+
 @shared_task(name='notifications.tasks.send_daily_reminders_batch')
 def send_daily_reminders_batch():
     """
@@ -6,7 +6,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Count
 from .models import ServiceCategory, Service, ServiceAddon, ServiceHistory
-from .booking_models import Room, Booking, BookingAddon, AvailabilitySlot
+from .booking_models import Room, Booking, BookingAddon, AvailabilitySlot, SlotTemplate, WaitlistEntry
 
 
 @admin.register(ServiceCategory)
@@ -313,6 +313,45 @@ class AvailabilitySlotAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at', 'current_bookings']
 
 
+@admin.register(SlotTemplate)
+class SlotTemplateAdmin(admin.ModelAdmin):
+    """Admin interface for weekly Slot Templates."""
+    
+    list_display = ['room', 'weekday', 'start_time', 'end_time', 'slot_minutes', 'base_price_modifier', 'priority', 'is_active']
+    list_filter = ['weekday', 'is_active', 'is_premium_slot', 'room']
+    search_fields = ['room__name']
+    ordering = ['room', 'weekday', 'priority']
+    
+    fieldsets = (
+        ('Schedule', {
+            'fields': ('room', 'weekday', 'start_time', 'end_time', 'slot_minutes', 'priority'),
+            'description': 'Empty start/end time uses room opening hours'
+        }),
+        ('Slot Settings', {
+            'fields': ('max_bookings', 'base_price_modifier', 'is_premium_slot', 'tags')
+        }),
+        ('Priority Access', {
+            'fields': ('member_priority_days', 'vip_priority_days'),
+            'description': 'Days before the slot when non-members / members can book'
+        }),
+        ('Status', {
+            'fields': ('is_active',)
+        }),
+    )
+
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """Admin interface for slot waitlists."""
+    
+    list_display = ['user', 'slot', 'service', 'tier_rank', 'requested_at', 'status', 'booking']
+    list_filter = ['status', 'tier_rank', 'slot__date']
+    search_fields = ['user__email', 'user__first_name', 'user__last_name', 'slot__room__name']
+    ordering = ['slot', 'tier_rank', 'requested_at']
+    raw_id_fields = ['slot', 'user', 'booking']
+    readonly_fields = ['created_at', 'updated_at', 'promoted_at']
+
 # Inline admin for related models
 class BookingAddonInline(admin.TabularInline):
     """Inline admin for booking add-ons."""
@@ -0,0 +1,86 @@
+"""
+Availability Broadcast - push змін місткості слотів через Channels.
+
+Кожна пара (room, date) має свою group. Після commit транзакції, що
+змінила слоти (create_booking / cancel_booking / admin edit), в group
+відправляється мала delta:
+
+    {'type': 'availability.delta', 'room_id': 1, 'date': '2025-01-31',
+     'slots': [[slot_id, available_spots, max_capacity], ...]}
+
+Snapshot при підключенні будує AvailabilityConsumer з availability_index,
+тому клієнтам (calendar, Flutter app) не потрібен polling.
+"""
+import logging
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+try:
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    CHANNELS_AVAILABLE = True
+except ImportError:
+    CHANNELS_AVAILABLE = False
+
+
+class AvailabilityBroadcaster:
+    """
+    Відправка availability deltas у room-day groups.
+    """
+
+    group_prefix = 'availability'
+
+    def group_name(self, room_id: int, target_date) -> str:
+        return f'{self.group_prefix}_{room_id}_{target_date.isoformat()}'
+
+    @staticmethod
+    def slot_row(slot) -> list:
+        """Компактний рядок delta для слоту."""
+        free = 0 if slot.is_blocked else max(0, slot.max_bookings - slot.current_bookings)
+        return [slot.id, free, slot.max_bookings]
+
+    def publish_slots(self, slots: Iterable):
+        """
+        Відправити deltas для змінених слотів після commit поточної
+        транзакції (одне повідомлення на room-day).
+        """
+        groups = defaultdict(list)
+        for slot in slots:
+            groups[(slot.room_id, slot.date)].append(self.slot_row(slot))
+
+        if groups:
+            transaction.on_commit(lambda: self._send(groups))
+
+    def _send(self, groups):
+        if not CHANNELS_AVAILABLE:
+            return
+
+        try:
+            channel_layer = get_channel_layer()
+        except Exception as e:
+            logger.warning(f"Channel layer unavailable, availability push skipped: {e}")
+            return
+        if channel_layer is None:
+            return
+
+        for (room_id, target_date), rows in groups.items():
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    self.group_name(room_id, target_date),
+                    {
+                        'type': 'availability.delta',
+                        'room_id': room_id,
+                        'date': target_date.isoformat(),
+                        'slots': rows,
+                    }
+                )
+            except Exception as e:
+                logger.warning(f"Availability push failed for room {room_id} on {target_date}: {e}")
+
+
+# Global instance
+availability_broadcast = AvailabilityBroadcaster()
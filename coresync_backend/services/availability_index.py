@@ -0,0 +1,635 @@
+"""
+Availability Index - precomputed per-room, per-day slot capacity.
+
+Замість того щоб на кожен запит `availability` інстанціювати всі
+AvailabilitySlot та перевіряти membership для кожного, тримаємо в cache
+компактний колонковий індекс дня:
+
+    {room_id: {'id': [...], 'start': [...], 'end': [...], 'free': [...], ...}}
+
+Час зберігається як хвилини від півночі, priority windows - як epoch seconds.
+Індекс оновлюється інкрементально при зміні слоту (booking / cancel),
+тому запит availability = одне читання з cache + дешевий tier filter.
+
+Storage - спільний для всіх gunicorn workers, Celery та ASGI:
+
+    availability:day:{date}   Redis hash  slot_id -> JSON row, '_' - маркер побудованого дня
+    availability:gen:{date}   Redis string  generation дня
+
+Кожен слот - окреме поле, тому update_slot - один атомарний HSET і
+паралельні оновлення різних слотів дня не перезаписують одне одного.
+Кожна зміна (update_slot / invalidate) збільшує generation дня, навіть
+якщо день ще не в індексі. build_days читає generation ДО запиту до БД
+і записує день лише якщо вона не змінилась (перевірка в Lua) - інакше
+build з даними до зміни перезаписав би її на cache_ttl.
+Без Redis індекс дня лежить у Django cache під ключем з generation:
+update_slot лише збільшує generation (без read-modify-write), а build,
+що почався до зміни, пише під стару generation, яку вже ніхто не читає.
+"""
+import json
+import logging
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+from decimal import Decimal
+from typing import Dict, Any, Optional, List, Iterable
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from core.redis_client import get_redis
+from memberships.context import TIER_VIP, TIER_NON_MEMBER
+
+logger = logging.getLogger(__name__)
+
+
+SLOT_COLUMNS = (
+    'id', 'start', 'end', 'free', 'max',
+    'member_until', 'vip_until', 'premium', 'modifier',
+)
+
+# Колонки payload для multi-day range API
+RANGE_COLUMNS = (
+    'slot_id', 'room_id', 'start_time', 'end_time',
+    'available_spots', 'is_premium_slot', 'is_priority_slot', 'vip_only',
+)
+
+# Колонки snapshot для real-time availability (WebSocket)
+SNAPSHOT_COLUMNS = (
+    'slot_id', 'start_time', 'end_time', 'available_spots',
+    'max_capacity', 'is_priority_slot', 'vip_only',
+)
+
+
+# Позиції полів JSON row слоту в Redis hash
+ROW_FIELDS = (
+    'room', 'start', 'id', 'end', 'free', 'max',
+    'member_until', 'vip_until', 'premium', 'modifier',
+)
+
+# Маркер побудованого дня (день без слотів теж кешується)
+BUILT_FIELD = '_'
+
+# KEYS: day hash, generation; ARGV: slot id, JSON row, blocked ('1' / '0'), ttl
+# Returns 0 - день не в індексі, 1 - оновлено, 2 - слот новий (день видалено)
+UPDATE_SLOT_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[4]))
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[3] == '1' then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 1
+end
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    return 1
+end
+redis.call('DEL', KEYS[1])
+return 2
+"""
+
+# KEYS: day hash, generation; ARGV: generation до запиту до БД, ttl, field, row, ...
+# Returns 0 - день змінився під час build (не записано), 1 - записано
+STORE_DAY_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+
+def _to_minutes(value: dt_time) -> int:
+    if isinstance(value, str):
+        value = parse_time(value)
+    return value.hour * 60 + value.minute
+
+
+def _format_minutes(minutes: int) -> str:
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def _to_epoch(value) -> int:
+    return int(value.timestamp()) if value else 0
+
+
+class AvailabilityIndex:
+    """
+    Cache-backed індекс вільної місткості слотів по кімнатах та днях.
+    """
+
+    cache_prefix = 'availability_index'
+    redis_prefix = 'availability:day'
+    cache_ttl = 60 * 60 * 24  # 24 hours
+
+    redis_generation_prefix = 'availability:gen'
+
+    def __init__(self):
+        self._scripts = {}
+        self._script_client = None
+
+    def _day_key(self, target_date, generation: int) -> str:
+        return f'{self.cache_prefix}:day:{target_date.isoformat()}:g{generation}'
+
+    def _generation_key(self, target_date) -> str:
+        return f'{self.cache_prefix}:gen:{target_date.isoformat()}'
+
+    def _redis_day_key(self, target_date) -> str:
+        return f'{self.redis_prefix}:{target_date.isoformat()}'
+
+    def _redis_generation_key(self, target_date) -> str:
+        return f'{self.redis_generation_prefix}:{target_date.isoformat()}'
+
+    def _get_script(self, client, source: str = UPDATE_SLOT_SCRIPT):
+        if self._script_client is not client:
+            self._scripts = {}
+            self._script_client = client
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = client.register_script(source)
+        return script
+
+    # ------------------------------------------------------------------
+    # Generations
+    # ------------------------------------------------------------------
+
+    def _generations(self, client, dates: List) -> Dict[Any, int]:
+        """Generations днів (Redis або Django cache); 0 - ще не змінювався."""
+        if client is not None:
+            try:
+                values = client.mget([self._redis_generation_key(target_date) for target_date in dates])
+                return {target_date: int(value or 0) for target_date, value in zip(dates, values)}
+            except Exception as e:
+                logger.error(f"Availability index generation read error: {str(e)}")
+                return {target_date: -1 for target_date in dates}  # не збігається - не записувати
+
+        keys = {self._generation_key(target_date): target_date for target_date in dates}
+        cached = cache.get_many(list(keys))
+        return {target_date: cached.get(key, 0) for key, target_date in keys.items()}
+
+    def _bump_generation(self, target_date):
+        """Атомарний cache.incr generation дня (fallback без Redis)."""
+        key = self._generation_key(target_date)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, self.cache_ttl):
+                cache.incr(key)
+
+    @property
+    def _rooms_key(self) -> str:
+        return f'{self.cache_prefix}:rooms'
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    def build_rooms(self) -> Dict[int, Dict[str, Any]]:
+        """Побудувати метадані кімнат (одним запитом)."""
+        from .booking_models import Room
+
+        rooms = {}
+        for room in Room.objects.all().only(
+            'id', 'name', 'room_type', 'features', 'has_iot_control',
+            'premium_modifier', 'is_active', 'maintenance_mode'
+        ):
+            rooms[room.id] = {
+                'name': room.name,
+                'room_type': room.room_type,
+                'features': room.features,
+                'has_iot_control': room.has_iot_control,
+                'premium_modifier': str(room.premium_modifier),
+                'bookable': room.is_active and not room.maintenance_mode,
+            }
+
+        cache.set(self._rooms_key, rooms, self.cache_ttl)
+        return rooms
+
+    def build_day(self, target_date) -> Dict[int, Dict[str, list]]:
+        """Побудувати індекс одного дня (одним запитом)."""
+        return self.build_days([target_date])[target_date]
+
+    def build_days(self, dates: Iterable) -> Dict[Any, Dict[int, Dict[str, list]]]:
+        """
+        Побудувати індекси кількох днів одним set-based запитом,
+        згрупованим за датою та кімнатою.
+        """
+        from .booking_models import AvailabilitySlot
+
+        dates = list(dates)
+        days = {target_date: {} for target_date in dates}
+        if not dates:
+            return days
+
+        # Generation - до запиту: зміна під час build не буде перезаписана
+        client = get_redis()
+        generations = self._generations(client, dates)
+
+        rows = AvailabilitySlot.objects.filter(
+            date__in=dates,
+            is_blocked=False
+        ).order_by('date', 'room_id', 'start_time').values_list(
+            'date', 'id', 'room_id', 'start_time', 'end_time',
+            'max_bookings', 'current_bookings',
+            'member_only_until', 'vip_only_until',
+            'is_premium_slot', 'base_price_modifier'
+        )
+
+        day_rows = {target_date: [] for target_date in dates}
+        for (slot_date, slot_id, room_id, start_time, end_time, max_bookings,
+             current_bookings, member_until, vip_until, premium, modifier) in rows:
+            day_rows[slot_date].append([
+                room_id,
+                _to_minutes(start_time),
+                slot_id,
+                _to_minutes(end_time),
+                max(0, max_bookings - current_bookings),
+                max_bookings,
+                _to_epoch(member_until),
+                _to_epoch(vip_until),
+                premium,
+                str(modifier),
+            ])
+
+        days = {target_date: self._columns(rows) for target_date, rows in day_rows.items()}
+        if not self._store_redis(client, day_rows, generations):
+            cache.set_many(
+                {
+                    self._day_key(target_date, generations[target_date]): day
+                    for target_date, day in days.items()
+                },
+                self.cache_ttl
+            )
+        return days
+
+    @staticmethod
+    def _slot_row(slot) -> list:
+        """JSON row слоту (порядок - ROW_FIELDS)."""
+        return [
+            slot.room_id,
+            _to_minutes(slot.start_time),
+            slot.id,
+            _to_minutes(slot.end_time),
+            max(0, slot.max_bookings - slot.current_bookings),
+            slot.max_bookings,
+            _to_epoch(slot.member_only_until),
+            _to_epoch(slot.vip_only_until),
+            slot.is_premium_slot,
+            str(slot.base_price_modifier),
+        ]
+
+    @staticmethod
+    def _columns(rows: List[list]) -> Dict[int, Dict[str, list]]:
+        """Rows дня -> {room_id: columns}, слоти кімнати за часом початку."""
+        day = {}
+        for row in sorted(rows, key=lambda row: (row[0], row[1], row[2])):
+            columns = day.get(row[0])
+            if columns is None:
+                columns = day[row[0]] = {name: [] for name in SLOT_COLUMNS}
+            for position, name in enumerate(ROW_FIELDS[1:], start=1):
+                columns[name].append(row[position])
+        return day
+
+    def _store_redis(self, client, day_rows: Dict[Any, List[list]], generations: Dict[Any, int]) -> bool:
+        """
+        Записати дні як Redis hashes (один pipeline STORE_DAY_SCRIPT);
+        день, generation якого змінилась під час build, пропускається.
+        False без Redis або при помилці запису.
+        """
+        if client is None:
+            return False
+
+        try:
+            script = self._get_script(client, STORE_DAY_SCRIPT)
+            pipe = client.pipeline(transaction=False)
+            for target_date, rows in day_rows.items():
+                fields = [BUILT_FIELD, '1']
+                for row in rows:
+                    fields.extend((str(row[2]), json.dumps(row)))
+                script(
+                    keys=[self._redis_day_key(target_date), self._redis_generation_key(target_date)],
+                    args=[generations[target_date], self.cache_ttl, *fields],
+                    client=pipe,
+                )
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Availability index write error: {str(e)}")
+            return False
+        return True
+
+    def _read_redis(self, client, dates: List) -> Dict[Any, Dict[int, Dict[str, list]]]:
+        """Побудовані дні з Redis (один pipeline HGETALL)."""
+        try:
+            pipe = client.pipeline(transaction=False)
+            for target_date in dates:
+                pipe.hgetall(self._redis_day_key(target_date))
+            values = pipe.execute()
+        except Exception as e:
+            logger.error(f"Availability index read error: {str(e)}")
+            return {}
+
+        days = {}
+        for target_date, fields in zip(dates, values):
+            if fields:
+                days[target_date] = self._columns([
+                    json.loads(raw_row) for slot_id, raw_row in fields.items()
+                    if slot_id != BUILT_FIELD
+                ])
+        return days
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+
+    def get_day(self, target_date):
+        """
+        Отримати (rooms, day) для дати - одне читання з cache.
+        Відсутні частини будуються з БД.
+        """
+        rooms, days = self.get_days([target_date])
+        return rooms, days[target_date]
+
+    def get_days(self, dates: Iterable):
+        """
+        Отримати (rooms, {date: day}) для діапазону дат - одне читання
+        з cache; всі відсутні дні будуються одним запитом.
+        """
+        dates = list(dates)
+        client = get_redis()
+        if client is not None:
+            rooms = cache.get(self._rooms_key)
+            days = self._read_redis(client, dates)
+        else:
+            rooms = cache.get(self._rooms_key)
+            generations = self._generations(None, dates)
+            keys = {
+                self._day_key(target_date, generations[target_date]): target_date
+                for target_date in dates
+            }
+            cached = cache.get_many(list(keys))
+            days = {
+                target_date: cached[key]
+                for key, target_date in keys.items() if key in cached
+            }
+
+        if rooms is None:
+            rooms = self.build_rooms()
+
+        missing = [target_date for target_date in dates if target_date not in days]
+        if missing:
+            days.update(self.build_days(missing))
+
+        return rooms, days
+
+    def _iter_available(self, rooms, day, tier, now=None, room_type=None, room_types=None):
+        """
+        Пройти по слотах дня, доступних для access tier.
+
+        Yields: (room_id, room, columns, position, member_window, vip_window)
+        """
+        now_ts = (now or timezone.now()).timestamp()
+        allowed_types = set(room_types) if room_types is not None else None
+
+        for room_id, columns in day.items():
+            room = rooms.get(room_id)
+            if room is None or not room['bookable']:
+                continue
+            if room_type and room['room_type'] != room_type:
+                continue
+            if allowed_types is not None and room['room_type'] not in allowed_types:
+                continue
+
+            free = columns['free']
+            member_until = columns['member_until']
+            vip_until = columns['vip_until']
+
+            for i in range(len(free)):
+                if free[i] <= 0:
+                    continue
+
+                vip_window = bool(vip_until[i] and now_ts < vip_until[i])
+                if vip_window and tier != TIER_VIP:
+                    continue
+
+                member_window = now_ts < member_until[i]
+                if member_window and tier == TIER_NON_MEMBER:
+                    continue
+
+                yield room_id, room, columns, i, member_window, vip_window
+
+    def available_slots(
+        self,
+        rooms: Dict[int, Dict[str, Any]],
+        day: Dict[int, Dict[str, list]],
+        tier: str,
+        now=None,
+        room_type: Optional[str] = None,
+        room_types: Optional[Iterable[str]] = None,
+        service_price: Optional[Decimal] = None,
+        slot_prices: Optional[Dict[tuple, Decimal]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Відфільтрувати слоти дня для access tier.
+
+        Повертає список dict у форматі відповіді `availability`,
+        відсортований за часом початку. Якщо передано service_price,
+        додається 'price' з room premium та slot modifier (з
+        slot_prices pricing matrix, якщо передано).
+        """
+        result = []
+        for room_id, room, columns, i, member_window, vip_window in self._iter_available(
+            rooms, day, tier, now, room_type, room_types
+        ):
+            slot_data = {
+                'id': columns['id'][i],
+                'start_time': _format_minutes(columns['start'][i]),
+                'end_time': _format_minutes(columns['end'][i]),
+                'room_id': room_id,
+                'room_name': room['name'],
+                'room_type': room['room_type'],
+                'is_premium_slot': columns['premium'][i],
+                'available_spots': columns['free'][i],
+                'max_capacity': columns['max'][i],
+                'features': room['features'],
+                'has_iot_control': room['has_iot_control'],
+                'priority_info': {
+                    'is_priority_slot': member_window,
+                    'vip_only': vip_window,
+                    'member_only_until': datetime.fromtimestamp(
+                        columns['member_until'][i], tz=dt_timezone.utc
+                    ).isoformat(),
+                },
+            }
+
+            if service_price is not None:
+                slot_data['price'] = self._slot_price(service_price, room_id, room, columns, i, slot_prices)
+
+            result.append(slot_data)
+
+        result.sort(key=lambda item: (item['start_time'], item['room_id']))
+        return result
+
+    def available_columns(
+        self,
+        rooms: Dict[int, Dict[str, Any]],
+        day: Dict[int, Dict[str, list]],
+        tier: str,
+        now=None,
+        room_type: Optional[str] = None,
+        room_types: Optional[Iterable[str]] = None,
+        service_price: Optional[Decimal] = None,
+        slot_prices: Optional[Dict[tuple, Decimal]] = None
+    ) -> Dict[str, list]:
+        """
+        Те саме що available_slots, але в колонковому форматі
+        (dict of lists) - компактний payload для календаря.
+        """
+        rows = []
+        for room_id, room, columns, i, member_window, vip_window in self._iter_available(
+            rooms, day, tier, now, room_type, room_types
+        ):
+            row = [
+                columns['id'][i],
+                room_id,
+                _format_minutes(columns['start'][i]),
+                _format_minutes(columns['end'][i]),
+                columns['free'][i],
+                columns['premium'][i],
+                member_window,
+                vip_window,
+            ]
+            if service_price is not None:
+                row.append(str(self._slot_price(service_price, room_id, room, columns, i, slot_prices)))
+            rows.append(row)
+
+        rows.sort(key=lambda row: (row[2], row[1]))
+
+        names = list(RANGE_COLUMNS)
+        if service_price is not None:
+            names.append('price')
+
+        return {
+            name: [row[position] for row in rows]
+            for position, name in enumerate(names)
+        }
+
+    def room_snapshot(self, room_id: int, target_date, now=None) -> Dict[str, list]:
+        """
+        Колонковий snapshot всіх слотів кімнати за день (включно з
+        повними) - початковий стан для AvailabilityConsumer.
+        """
+        _, day = self.get_day(target_date)
+        columns = day.get(room_id)
+        now_ts = (now or timezone.now()).timestamp()
+
+        if not columns:
+            return {name: [] for name in SNAPSHOT_COLUMNS}
+
+        return {
+            'slot_id': list(columns['id']),
+            'start_time': [_format_minutes(minutes) for minutes in columns['start']],
+            'end_time': [_format_minutes(minutes) for minutes in columns['end']],
+            'available_spots': list(columns['free']),
+            'max_capacity': list(columns['max']),
+            'is_priority_slot': [now_ts < until for until in columns['member_until']],
+            'vip_only': [bool(until and now_ts < until) for until in columns['vip_until']],
+        }
+
+    @staticmethod
+    def _slot_price(service_price, room_id, room, columns, position, slot_prices=None):
+        """
+        Ціна слоту: lookup в pricing matrix (room, modifier), інакше
+        service price * room premium * slot modifier.
+        """
+        if slot_prices:
+            price = slot_prices.get((room_id, columns['modifier'][position]))
+            if price is not None:
+                return price
+        return round(
+            service_price
+            * Decimal(room['premium_modifier'])
+            * Decimal(columns['modifier'][position]),
+            2
+        )
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def update_slot(self, slot):
+        """
+        Оновити один слот в індексі дня.
+
+        Redis: один атомарний HSET поля слоту (абсолютні значення, тому
+        повторний виклик безпечний) + INCR generation дня; заблокований
+        слот прибирається, новий - інвалідовує день. Без Redis -
+        нова generation дня (перебудується при читанні).
+        """
+        client = get_redis()
+        if client is None:
+            self._bump_generation(slot.date)
+            return
+
+        try:
+            self._get_script(client)(
+                keys=[self._redis_day_key(slot.date), self._redis_generation_key(slot.date)],
+                args=[
+                    slot.id, json.dumps(self._slot_row(slot)),
+                    '1' if slot.is_blocked else '0', self.cache_ttl,
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Availability index update error for slot {slot.id}: {str(e)}")
+            self.invalidate_day(slot.date)
+
+    def refresh_slots(self, **lookup):
+        """
+        Перечитати слоти з БД та оновити індекс.
+
+        Потрібно після атомарних F() update (reserve / release), які
+        не викликають post_save.
+        """
+        from .booking_models import AvailabilitySlot
+
+        slots = list(AvailabilitySlot.objects.filter(**lookup))
+        for slot in slots:
+            self.update_slot(slot)
+        return slots
+
+    def invalidate_day(self, target_date):
+        """Видалити індекс дня."""
+        self.invalidate_days([target_date])
+
+    def invalidate_days(self, dates: Iterable):
+        """Видалити індекси кількох днів (нова generation; Redis та cache)."""
+        dates = list(dates)
+        if not dates:
+            return
+        client = get_redis()
+        if client is None:
+            for target_date in dates:
+                self._bump_generation(target_date)
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for target_date in dates:
+                generation_key = self._redis_generation_key(target_date)
+                pipe.delete(self._redis_day_key(target_date))
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, self.cache_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Availability index invalidate error: {str(e)}")
+
+    def invalidate_rooms(self):
+        """Видалити метадані кімнат з cache."""
+        cache.delete(self._rooms_key)
+
+
+# Global instance
+availability_index = AvailabilityIndex()
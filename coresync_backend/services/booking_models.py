@@ -2,11 +2,13 @@
 Booking models for the CoreSync application.
 Separate file to avoid conflicts with existing models.
 """
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from datetime import datetime, timedelta, time as dt_time
 from core.models import BaseModel
+from core.reference_allocator import reference_allocator
+from memberships.context import get_membership_context
 import uuid
 
 
@@ -262,18 +264,10 @@ class Booking(BaseModel):
         
         # Set booking tier based on user membership
         if self.user.is_authenticated:
-            if hasattr(self.user, 'membership') and self.user.membership.is_active:
-                membership = self.user.membership
-                if membership.plan.name.lower() == 'unlimited':
-                    self.booking_tier = 'vip'
-                    self.is_priority_booking = True
-                elif membership.plan.priority_booking:
-                    self.booking_tier = 'member_priority'
-                    self.is_priority_booking = True
-                else:
-                    self.booking_tier = 'member_standard'
-            else:
-                self.booking_tier = 'non_member'
+            membership = get_membership_context(self.user)
+            self.booking_tier = membership.booking_tier
+            if membership.is_priority_booking:
+                self.is_priority_booking = True
         
         # Calculate end time
         if not self.end_time and self.start_time and self.duration:
@@ -288,30 +282,21 @@ class Booking(BaseModel):
 
     def generate_booking_reference(self):
         """Generate unique booking reference."""
-        year = timezone.now().year
-        # Get last booking number for this year
-        last_booking = Booking.objects.filter(
-            booking_reference__startswith=f'CS-{year}-'
-        ).order_by('-booking_reference').first()
-        
-        if last_booking:
-            # Extract number and increment
-            last_num = int(last_booking.booking_reference.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-            
-        return f'CS-{year}-{next_num:06d}'
+        return reference_allocator.allocate(
+            'CS', model=Booking, field='booking_reference'
+        )
 
-    def can_cancel(self):
+    def can_cancel(self, now=None):
         """Check if booking can be cancelled."""
         if self.status in ['completed', 'cancelled', 'no_show']:
             return False
             
         # Members can cancel up to 24 hours before
         # Non-members up to 48 hours before
-        booking_datetime = datetime.combine(self.booking_date, self.start_time)
-        now = timezone.now()
+        booking_datetime = timezone.make_aware(
+            datetime.combine(self.booking_date, self.start_time)
+        )
+        now = now or timezone.now()
         
         if self.booking_tier in ['member_priority', 'member_standard', 'vip']:
             return booking_datetime - now > timedelta(hours=24)
@@ -331,20 +316,24 @@ class Booking(BaseModel):
         booking_datetime = datetime.combine(self.booking_date, self.start_time)
         return booking_datetime - timedelta(days=3)
 
-    def calculate_total(self):
-        """Calculate final total including addons and discounts."""
+    def calculate_total(self, context=None, addons=None):
+        """
+        Calculate final total including addons and discounts.
+        context: MembershipContext (resolved from user if not given).
+        addons: unsaved BookingAddon list (booking not yet inserted).
+        """
         total = self.base_price
         
         # Add addons
-        addon_total = sum(
-            addon.total_price for addon in self.booking_addons.all()
-        )
+        if addons is None:
+            addons = self.booking_addons.all()
+        addon_total = sum(addon.total_price for addon in addons)
         total += addon_total
         
         # Apply membership discount
-        if hasattr(self.user, 'membership') and self.user.membership.is_active:
-            membership = self.user.membership
-            discount_percent = membership.plan.discount_percentage
+        membership = context or get_membership_context(self.user)
+        if membership.is_active:
+            discount_percent = membership.discount_percentage
             discount_amount = (total * discount_percent) / 100
             total -= discount_amount
             self.discount_applied = discount_amount
@@ -447,36 +436,48 @@ class AvailabilitySlot(BaseModel):
     def __str__(self):
         return f"{self.room.name} - {self.date} {self.start_time}-{self.end_time}"
 
-    def is_available_for_user(self, user, check_date_time=None):
-        """Check if slot is available for specific user."""
+    def is_available_for_user(self, user, check_date_time=None, context=None, ignore_capacity=False):
+        """
+        Check if slot is available for specific user.
+        context: MembershipContext (resolved from user if not given).
+        ignore_capacity: only check blocking and priority windows (waitlist).
+        """
         now = check_date_time or timezone.now()
+        membership = context or get_membership_context(user)
         
         # Check if slot is blocked
         if self.is_blocked:
             return False
             
         # Check capacity
-        if self.current_bookings >= self.max_bookings:
+        if not ignore_capacity and self.current_bookings >= self.max_bookings:
             return False
         
         # Check VIP access
         if self.vip_only_until and now < self.vip_only_until:
-            if not (hasattr(user, 'membership') and 
-                   user.membership.is_active and 
-                   user.membership.plan.name.lower() == 'unlimited'):
+            if not membership.is_vip:
                 return False
         
         # Check member priority access
         if now < self.member_only_until:
-            if not (hasattr(user, 'membership') and user.membership.is_active):
+            if not membership.is_active:
                 return False
         
         return True
 
-    def get_price_for_service(self, service, user=None):
+    def get_price_for_service(self, service, user=None, context=None):
         """Calculate price for this slot based on service and user."""
+        from .models import Service
+        from .pricing_matrix import pricing_matrix
+
+        tier = Service.get_price_tier(user, context=context)
+        price = pricing_matrix.slot_price(service.id, tier, self.room_id, self.base_price_modifier)
+        if price is not None:
+            return price
+
+        # Modifier class not in the matrix yet
         if user:
-            base_price = service.get_price_for_user(user)
+            base_price = service.get_price_for_user(user, context=context)
         else:
             base_price = service.non_member_price
             
@@ -488,26 +489,202 @@ class AvailabilitySlot(BaseModel):
         
         return round(price, 2)
 
+    @classmethod
+    def reserve(cls, **lookup):
+        """
+        Atomically take one place in a slot.
+
+        Single conditional UPDATE (current_bookings < max_bookings) -
+        no read-modify-write, no oversell under concurrent bookings.
+        Returns True if a place was reserved.
+        """
+        return cls.objects.filter(
+            is_blocked=False,
+            current_bookings__lt=models.F('max_bookings'),
+            **lookup
+        ).update(current_bookings=models.F('current_bookings') + 1) > 0
+
+    @classmethod
+    def release(cls, **lookup):
+        """Atomically give back one place in a slot. Returns True if released."""
+        return cls.objects.filter(
+            current_bookings__gt=0,
+            **lookup
+        ).update(current_bookings=models.F('current_bookings') - 1) > 0
+
     def book_slot(self, user, service, **booking_data):
         """Create a booking for this slot."""
         if not self.is_available_for_user(user):
             raise ValueError("Slot not available for this user")
             
-        # Create booking
-        booking = Booking.objects.create(
-            user=user,
-            service=service,
-            room=self.room,
-            booking_date=self.date,
-            start_time=self.start_time,
-            end_time=self.end_time,
-            duration=service.duration,
-            base_price=self.get_price_for_service(service, user),
-            **booking_data
-        )
+        with transaction.atomic():
+            if not AvailabilitySlot.reserve(pk=self.pk):
+                raise ValueError("Slot is fully booked")
+            
+            # Create booking
+            base_price = self.get_price_for_service(service, user)
+            booking = Booking.objects.create(
+                user=user,
+                service=service,
+                room=self.room,
+                booking_date=self.date,
+                start_time=self.start_time,
+                end_time=self.end_time,
+                duration=service.duration,
+                base_price=base_price,
+                final_total=base_price,
+                **booking_data
+            )
         
-        # Update slot capacity
-        self.current_bookings += 1
-        self.save()
+        from .availability_index import availability_index
+        self.refresh_from_db(fields=['current_bookings'])
+        availability_index.update_slot(self)
         
         return booking
+
+
+class SlotTemplate(BaseModel):
+    """
+    Weekly template used to generate AvailabilitySlots for a room.
+    Several templates per room/weekday can overlap (e.g. peak evening
+    hours) - the one with the highest priority wins.
+    """
+    WEEKDAYS = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='slot_templates')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    
+    # Window (defaults to room opening/closing hours)
+    start_time = models.TimeField(
+        blank=True,
+        null=True,
+        help_text="Leave empty to use room opening time"
+    )
+    end_time = models.TimeField(
+        blank=True,
+        null=True,
+        help_text="Leave empty to use room closing time"
+    )
+    slot_minutes = models.PositiveIntegerField(default=15)
+    priority = models.IntegerField(
+        default=0,
+        help_text="Higher priority wins where templates overlap"
+    )
+    
+    # Slot attributes
+    max_bookings = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Leave empty to use room capacity"
+    )
+    base_price_modifier = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=1.00,
+        help_text="Price modifier for generated slots (e.g., 1.5 for peak hours)"
+    )
+    is_premium_slot = models.BooleanField(default=False)
+    tags = models.JSONField(default=list, blank=True)
+    
+    # Priority windows (relative to slot start)
+    member_priority_days = models.PositiveIntegerField(
+        default=3,
+        help_text="Members-only booking until N days before the slot"
+    )
+    vip_priority_days = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        default=60,
+        help_text="VIP-only booking until N days before the slot (empty = no VIP window)"
+    )
+
+    class Meta:
+        db_table = 'slot_templates'
+        verbose_name = 'Slot Template'
+        verbose_name_plural = 'Slot Templates'
+        ordering = ['room', 'weekday', 'priority']
+        indexes = [
+            models.Index(fields=['room', 'weekday']),
+        ]
+
+    def __str__(self):
+        return f"{self.room.name} - {self.get_weekday_display()}"
+
+
+class WaitlistEntry(BaseModel):
+    """
+    Waitlist for a fully booked AvailabilitySlot.
+    Queue order: membership tier (VIP, member, non-member), then request
+    time - the (slot, status, tier_rank, requested_at) index makes the
+    head lookup an index seek.
+    """
+    TIER_RANKS = {
+        'vip': 0,
+        'member': 1,
+        'non_member': 2,
+    }
+
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('cancelled', 'Cancelled'),
+        ('expired', 'Expired'),
+    ]
+
+    slot = models.ForeignKey(
+        AvailabilitySlot,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    user = models.ForeignKey(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    service = models.ForeignKey(
+        'services.Service',
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    
+    tier_rank = models.PositiveSmallIntegerField(default=2)
+    requested_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    
+    # Booking created on promotion
+    booking = models.OneToOneField(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry'
+    )
+    promoted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'booking_waitlist'
+        verbose_name = 'Waitlist Entry'
+        verbose_name_plural = 'Waitlist Entries'
+        ordering = ['tier_rank', 'requested_at', 'id']
+        indexes = [
+            models.Index(fields=['slot', 'status', 'tier_rank', 'requested_at']),
+            models.Index(fields=['user', 'status']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slot', 'user'],
+                condition=models.Q(status='waiting'),
+                name='unique_waiting_entry_per_slot'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.slot} ({self.status})"
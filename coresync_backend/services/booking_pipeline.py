@@ -0,0 +1,167 @@
+"""
+Booking Pipeline - створення booking однією транзакцією.
+
+Все, що можна порахувати до запису, рахується в пам'яті:
+
+    1. add-ons одним id__in запитом -> unsaved BookingAddon з total_price
+    2. calculate_total(addons=...) -> addons_total / discount / final_total
+    3. Payment інстанціюється заздалегідь (payment_id - uuid default),
+       тому stripe_payment_intent_id відомий до insert booking
+
+Далі одна транзакція: reserve slot (conditional UPDATE), один INSERT
+booking, bulk_create add-ons, INSERT payment, INSERT QuickBooksSync.
+"""
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction, OperationalError
+
+from .availability_broadcast import availability_broadcast
+from .availability_index import availability_index
+from .booking_models import AvailabilitySlot, Booking, BookingAddon
+from .models import ServiceAddon
+
+logger = logging.getLogger(__name__)
+
+
+class BookingPipeline:
+    """
+    Атомарне створення booking з add-ons, payment та sync queue.
+    """
+
+    reservation_attempts = 3
+    reservation_retry_delay = 0.05  # seconds, grows linearly per attempt
+
+    def build_addons(self, addons_data: Optional[Iterable[Dict]]) -> List[BookingAddon]:
+        """
+        Unsaved BookingAddon rows для request payload (один запит).
+        Невідомі add-on IDs пропускаються; повтор ID сумує quantity.
+        """
+        if not addons_data:
+            return []
+
+        quantities = {}
+        details = {}
+        for addon_data in addons_data:
+            try:
+                addon_id = int(addon_data['id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            quantities[addon_id] = quantities.get(addon_id, 0) + int(addon_data.get('quantity', 1))
+            details.setdefault(addon_id, addon_data)
+
+        addons = ServiceAddon.objects.in_bulk(list(quantities))
+
+        rows = []
+        for addon_id, quantity in quantities.items():
+            addon = addons.get(addon_id)
+            if addon is None:
+                continue
+            # bulk_create не викликає BookingAddon.save()
+            rows.append(BookingAddon(
+                addon=addon,
+                quantity=quantity,
+                unit_price=addon.price,
+                total_price=addon.price * quantity,
+                notes=details[addon_id].get('notes', ''),
+                preferences=details[addon_id].get('preferences', {}),
+            ))
+        return rows
+
+    def build_payment(self, booking: Booking, payment_method: str = 'pending'):
+        """Unsaved pending Payment для booking (insert у create())."""
+        from payments.models import Payment
+
+        return Payment(
+            user=booking.user,
+            payment_type='service',
+            payment_method=payment_method if payment_method != 'pending' else 'stripe_card',
+            amount=booking.final_total,
+            currency='USD',
+            status='pending',  # Will be updated by Stripe webhook
+            description=f"Service booking: {booking.service.name}",
+        )
+
+    def create(
+        self,
+        slot: AvailabilitySlot,
+        user,
+        booking_data: Dict,
+        addons_data: Optional[Iterable[Dict]] = None,
+        payment_method: str = 'pending',
+        context=None
+    ) -> Optional[Booking]:
+        """
+        Створити booking (з add-ons, payment та QuickBooks sync record).
+
+        Returns the booking, or None if the slot is full. Lock timeouts
+        are retried with backoff; OperationalError is re-raised once
+        the attempts are exhausted.
+        """
+        addons = self.build_addons(addons_data)
+
+        for attempt in range(1, self.reservation_attempts + 1):
+            booking = Booking(user=user, **booking_data)
+            booking.calculate_total(context=context, addons=addons)
+            payment = self.build_payment(booking, payment_method)
+            booking.payment_status = 'pending'
+            booking.stripe_payment_intent_id = f"pending_{payment.payment_id}"
+
+            try:
+                with transaction.atomic():
+                    if not AvailabilitySlot.reserve(pk=slot.pk):
+                        return None
+
+                    booking.save()
+
+                    for row in addons:
+                        row.pk = None
+                        row.booking = booking
+                    BookingAddon.objects.bulk_create(addons)
+
+                    payment.metadata = {
+                        'booking_id': booking.id,
+                        'booking_reference': booking.booking_reference,
+                        'service_name': booking.service.name,
+                        'room_name': booking.room.name,
+                        'booking_date': booking.booking_date.isoformat(),
+                    }
+                    payment.save()
+
+                    self._queue_invoice_sync(booking)
+                break
+            except OperationalError:
+                if attempt == self.reservation_attempts:
+                    raise
+                time.sleep(self.reservation_retry_delay * attempt)
+
+        logger.info(f"Created booking {booking.booking_reference} with payment {payment.payment_id}")
+
+        # F() update bypasses post_save - refresh the index explicitly, after commit
+        # (create() може виконуватись всередині зовнішньої транзакції - waitlist promote)
+        transaction.on_commit(
+            lambda: availability_broadcast.publish_slots(availability_index.refresh_slots(pk=slot.pk))
+        )
+        return booking
+
+    def _queue_invoice_sync(self, booking: Booking):
+        """QuickBooks invoice sync record - новий booking, тому просто INSERT."""
+        from payments.models import QuickBooksSync
+
+        QuickBooksSync.objects.create(
+            sync_type='invoice',
+            object_id=str(booking.id),
+            status='pending',
+            sync_data={
+                'booking_reference': booking.booking_reference,
+                'customer_name': booking.user.full_name,
+                'service_name': booking.service.name,
+                'total_amount': str(booking.final_total),
+                'booking_date': booking.booking_date.isoformat(),
+            }
+        )
+
+
+# Global instance
+booking_pipeline = BookingPipeline()
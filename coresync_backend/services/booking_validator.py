@@ -1,7 +1,8 @@
 """
 Booking Validation - Перевірка конфліктів перед створенням booking.
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from collections import defaultdict
 from datetime import datetime, timedelta
 from django.db import models
 import logging
@@ -9,6 +10,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+ACTIVE_STATUSES = ['confirmed', 'pending', 'in_progress']
+
+
+def _to_minutes(value) -> int:
+    return value.hour * 60 + value.minute
+
+
 class BookingValidator:
     """
     Validates booking requests - запобігає конфліктам та подвійним бронюванням.
@@ -39,7 +47,7 @@ class BookingValidator:
                 'error_message': str
             }
         """
-        from services.models import Booking
+        from services.booking_models import Booking
         
         if not technician_id:
             # Якщо technician не призначено, skip validation
@@ -102,25 +110,16 @@ class BookingValidator:
         Returns:
             Dict: {'valid': bool, 'error_message': str}
         """
-        from technicians.models import Schedule
+        from technicians.availability import technician_availability
         
         try:
-            weekday = booking_datetime.weekday()
-            booking_time = booking_datetime.time()
-            
-            # Перевіряємо recurring schedule
-            schedules = Schedule.objects.filter(
-                technician_id=technician_id,
-                is_active=True
-            ).filter(
-                models.Q(is_recurring=True, weekday=weekday) |
-                models.Q(is_recurring=False, specific_date=booking_datetime.date())
-            )
-            
-            # Перевіряємо чи час в межах якогось schedule
-            for schedule in schedules:
-                if schedule.start_time <= booking_time < schedule.end_time:
-                    return {'valid': True, 'error_message': ''}
+            # Перевіряємо recurring та one-off schedule з free/busy index
+            if technician_availability.is_scheduled(
+                technician_id,
+                booking_datetime.date(),
+                booking_datetime.time()
+            ):
+                return {'valid': True, 'error_message': ''}
             
             # Не знайдено відповідного schedule
             return {
@@ -146,34 +145,197 @@ class BookingValidator:
             List[Technician]: Вільні technicians
         """
         from technicians.models import Technician
+        from technicians.availability import technician_availability
         
         try:
-            # Всі technicians з потрібною спеціалізацією
-            technicians = Technician.objects.filter(
-                is_active=True
-            ).filter(
-                models.Q(specialties__contains=[service_type]) |
-                models.Q(specialties__contains=['all'])
-            )
-            
-            available = []
             end_datetime = booking_datetime + timedelta(minutes=duration_minutes)
             
-            for tech in technicians:
-                # Перевірка конфліктів
-                validation = BookingValidator.validate_no_conflicts(
-                    technician_id=tech.id,
-                    booking_date=booking_datetime.date(),
-                    start_time=booking_datetime.time(),
-                    end_time=end_datetime.time()
-                )
-                
-                if validation['valid']:
-                    available.append(tech)
+            # Вільні technicians з потрібною спеціалізацією - з free/busy index
+            # (як і раніше, лише конфлікти з bookings - Schedule не вимагається)
+            free_ids = technician_availability.free_technicians(
+                booking_datetime.date(),
+                booking_datetime.time(),
+                end_datetime.time(),
+                specialty=service_type,
+                require_schedule=False
+            )
             
-            return available
+            if not free_ids:
+                return []
+            
+            technicians = Technician.objects.in_bulk(free_ids)
+            return [technicians[tech_id] for tech_id in free_ids if tech_id in technicians]
         
         except Exception as e:
             logger.error(f"Get alternatives error: {str(e)}")
             return []
-
+    
+    @staticmethod
+    def validate_batch(proposals: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Batch перевірка конфліктів для списку proposed bookings
+        (імпорт зі старої системи, bulk reassign technician).
+        
+        Existing intervals technicians та rooms завантажуються одним
+        запитом, overlaps шукаються sweep-line по кожному ресурсу/дню -
+        включно з overlaps всередині самого batch.
+        
+        Args:
+            proposals: List[Dict] з ключами
+                booking_date, start_time, end_time (обов'язкові),
+                technician_id, room_id (опціонально),
+                booking_id (існуючий booking, що переноситься -
+                його поточний інтервал ігнорується)
+        
+        Returns:
+            Dict: {
+                'valid': bool,
+                'rows': [{'index', 'valid', 'conflicts', 'error_message'}],
+                'conflict_count': int
+            }
+        """
+        from services.booking_models import Booking, Room
+        
+        rows = [
+            {'index': index, 'valid': True, 'conflicts': [], 'error_message': ''}
+            for index in range(len(proposals))
+        ]
+        
+        # (resource_type, resource_id, date) -> [(start, end, ref)]
+        # ref: ('row', index) для batch або ('booking', id, reference) для existing
+        groups = defaultdict(list)
+        technician_ids, room_ids, dates, moved_ids = set(), set(), set(), set()
+        
+        for index, proposal in enumerate(proposals):
+            start = _to_minutes(proposal['start_time'])
+            end = _to_minutes(proposal['end_time'])
+            if end <= start:
+                rows[index]['valid'] = False
+                rows[index]['error_message'] = 'End time must be after start time'
+                continue
+            
+            booking_date = proposal['booking_date']
+            dates.add(booking_date)
+            if proposal.get('booking_id'):
+                moved_ids.add(proposal['booking_id'])
+            
+            for resource_type, key in (('technician', 'technician_id'), ('room', 'room_id')):
+                resource_id = proposal.get(key)
+                if resource_id:
+                    (technician_ids if resource_type == 'technician' else room_ids).add(resource_id)
+                    groups[(resource_type, resource_id, booking_date)].append(
+                        (start, end, ('row', index))
+                    )
+        
+        if not groups:
+            return {'valid': all(row['valid'] for row in rows), 'rows': rows, 'conflict_count': 0}
+        
+        try:
+            # Existing intervals - один запит для всіх technicians/rooms/днів
+            existing = Booking.objects.filter(
+                booking_date__in=dates,
+                status__in=ACTIVE_STATUSES
+            ).filter(
+                models.Q(technician_id__in=technician_ids) | models.Q(room_id__in=room_ids)
+            ).exclude(
+                id__in=moved_ids
+            ).values_list(
+                'id', 'booking_reference', 'technician_id', 'room_id',
+                'booking_date', 'start_time', 'end_time'
+            )
+            
+            for booking_id, reference, technician_id, room_id, booking_date, start_time, end_time in existing:
+                interval = (
+                    _to_minutes(start_time), _to_minutes(end_time),
+                    ('booking', booking_id, reference)
+                )
+                if technician_id in technician_ids and ('technician', technician_id, booking_date) in groups:
+                    groups[('technician', technician_id, booking_date)].append(interval)
+                if room_id in room_ids and ('room', room_id, booking_date) in groups:
+                    groups[('room', room_id, booking_date)].append(interval)
+            
+            capacities = dict(
+                Room.objects.filter(id__in=room_ids).values_list('id', 'capacity')
+            ) if room_ids else {}
+        
+        except Exception as e:
+            logger.error(f"Batch validation error: {str(e)}")
+            for row in rows:
+                row['valid'] = False
+                row['error_message'] = str(e)
+            return {'valid': False, 'rows': rows, 'conflict_count': 0}
+        
+        conflict_count = 0
+        for (resource_type, resource_id, booking_date), intervals in groups.items():
+            capacity = capacities.get(resource_id, 1) if resource_type == 'room' else 1
+            conflict_count += BookingValidator._sweep(
+                intervals, max(capacity, 1), resource_type, resource_id, rows
+            )
+        
+        for row in rows:
+            if row['conflicts']:
+                row['valid'] = False
+                row['error_message'] = (
+                    f"{len(row['conflicts'])} conflicting booking(s)"
+                )
+        
+        return {
+            'valid': all(row['valid'] for row in rows),
+            'rows': rows,
+            'conflict_count': conflict_count
+        }
+    
+    @staticmethod
+    def _sweep(intervals, capacity, resource_type, resource_id, rows) -> int:
+        """
+        Sweep-line по інтервалах одного ресурсу за день.
+        
+        Події сортуються за часом (end перед start в ту саму хвилину -
+        суміжні bookings не конфліктують). Коли новий інтервал стартує,
+        а зайнято вже >= capacity, він конфліктує з усіма активними.
+        Повертає кількість знайдених конфліктних пар.
+        """
+        events = []
+        for position, (start, end, ref) in enumerate(intervals):
+            events.append((start, 1, position))
+            events.append((end, 0, position))
+        events.sort()
+        
+        active = set()
+        pairs = 0
+        for _, is_start, position in events:
+            if not is_start:
+                active.discard(position)
+                continue
+            
+            if len(active) >= capacity:
+                for other in active:
+                    if BookingValidator._record_conflict(
+                        intervals[position], intervals[other],
+                        resource_type, resource_id, rows
+                    ):
+                        pairs += 1
+            active.add(position)
+        
+        return pairs
+    
+    @staticmethod
+    def _record_conflict(first, second, resource_type, resource_id, rows) -> bool:
+        """Записати конфлікт у звіт batch rows (existing vs existing ігнорується)."""
+        recorded = False
+        for this, other in ((first, second), (second, first)):
+            ref = this[2]
+            if ref[0] != 'row':
+                continue
+            other_ref = other[2]
+            rows[ref[1]]['conflicts'].append({
+                'type': resource_type,
+                'resource_id': resource_id,
+                'row': other_ref[1] if other_ref[0] == 'row' else None,
+                'booking_id': other_ref[1] if other_ref[0] == 'booking' else None,
+                'booking_reference': other_ref[2] if other_ref[0] == 'booking' else None,
+                'start_minute': other[0],
+                'end_minute': other[1],
+            })
+            recorded = True
+        return recorded
@@ -3,19 +3,27 @@ Booking API views for the CoreSync application.
 Handles calendar booking with member priority access.
 """
 import logging
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from django.db import transaction, OperationalError
 from django.db.models import Q, Count
-from datetime import datetime, timedelta, time as dt_time
+from datetime import datetime, timedelta
 from django.core.exceptions import ValidationError
 
-from .booking_models import Booking, Room, AvailabilitySlot, BookingAddon
-from .models import Service, ServiceAddon
+from .booking_models import Booking, Room, AvailabilitySlot
+from .availability_broadcast import availability_broadcast
+from .availability_index import availability_index
+from .booking_pipeline import booking_pipeline
+from .pricing_matrix import pricing_matrix
+from .slot_search import slot_search, compatible_room_types
+from .waitlist import waitlist
+from .models import Service
 from .serializers import ServiceDetailSerializer
-from memberships.models import Membership
-from payments.models import Payment, QuickBooksSync
+from memberships.context import get_request_membership
+from payments.models import QuickBooksSync
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +34,15 @@ class BookingViewSet(viewsets.ModelViewSet):
     """
     permission_classes = [permissions.IsAuthenticated]
     
+    # Longest range served by availability_range (VIP booking horizon)
+    MAX_RANGE_DAYS = 90
+    NEXT_AVAILABLE_MAX_RESULTS = 20
+    # my_bookings page sizes: section -> (default, max)
+    MY_BOOKINGS_SECTIONS = {
+        'upcoming': (10, 50),
+        'past': (20, 50),
+    }
+    
     def get_queryset(self):
         """Filter bookings by user."""
         return Booking.objects.filter(user=self.request.user)
@@ -54,14 +71,15 @@ class BookingViewSet(viewsets.ModelViewSet):
             else:
                 target_date = timezone.now().date()
             
-            # Check user's booking privileges
+            # Check user's booking privileges (resolved once per request)
             user = request.user
-            is_member = hasattr(user, 'membership') and user.membership.is_active
-            is_vip = is_member and user.membership.plan.name.lower() == 'unlimited'
-            has_priority = is_member and user.membership.plan.priority_booking
+            membership = get_request_membership(request)
+            is_member = membership.is_active
+            is_vip = membership.is_vip
+            has_priority = is_member and membership.priority_booking
             
             # Determine how far ahead user can book
-            max_advance_days = self._get_max_advance_days(user)
+            max_advance_days = membership.max_advance_days
             max_date = timezone.now().date() + timedelta(days=max_advance_days)
             
             if target_date > max_date:
@@ -71,62 +89,38 @@ class BookingViewSet(viewsets.ModelViewSet):
                     'is_member': is_member
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Build room filter
-            rooms = Room.objects.filter(is_active=True, maintenance_mode=False)
-            if room_type:
-                rooms = rooms.filter(room_type=room_type)
-            
-            # Get availability slots for the date
-            slots = AvailabilitySlot.objects.filter(
-                date=target_date,
-                room__in=rooms,
-                is_blocked=False
-            ).select_related('room')
-            
             # Filter by service compatibility if provided
+            room_types = None
+            service_price = None
+            slot_prices = None
             if service_id:
                 try:
-                    service = Service.objects.get(id=service_id)
-                    # Filter rooms that support this service
-                    compatible_rooms = self._get_compatible_rooms(service)
-                    slots = slots.filter(room__in=compatible_rooms)
+                    service = Service.objects.select_related('category').get(id=service_id)
+                    room_types = self._get_compatible_room_types(service)
+                    service_price, slot_prices = self._get_service_prices(service, user, membership)
                 except Service.DoesNotExist:
                     return Response({'error': 'Service not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            # Build response data
-            available_slots = []
+            # One cache read: precomputed per-room index for the date
+            rooms, day = availability_index.get_day(target_date)
+            
             now = timezone.now()
+            available_slots = availability_index.available_slots(
+                rooms,
+                day,
+                tier=membership.tier,
+                now=now,
+                room_type=room_type,
+                room_types=room_types,
+                service_price=service_price,
+                slot_prices=slot_prices
+            )
             
-            for slot in slots:
-                if slot.is_available_for_user(user, now):
-                    slot_data = {
-                        'id': slot.id,
-                        'start_time': slot.start_time.strftime('%H:%M'),
-                        'end_time': slot.end_time.strftime('%H:%M'),
-                        'room_id': slot.room.id,
-                        'room_name': slot.room.name,
-                        'room_type': slot.room.room_type,
-                        'is_premium_slot': slot.is_premium_slot,
-                        'available_spots': slot.max_bookings - slot.current_bookings,
-                        'max_capacity': slot.max_bookings,
-                        'features': slot.room.features,
-                        'has_iot_control': slot.room.has_iot_control,
-                    }
-                    
-                    # Add pricing if service specified
-                    if service_id:
-                        slot_data['price'] = slot.get_price_for_service(service, user)
-                        slot_data['member_price'] = service.member_price
-                        slot_data['non_member_price'] = service.non_member_price
-                    
-                    # Add priority info
-                    slot_data['priority_info'] = {
-                        'is_priority_slot': now < slot.member_only_until,
-                        'vip_only': slot.vip_only_until and now < slot.vip_only_until,
-                        'member_only_until': slot.member_only_until.isoformat() if slot.member_only_until else None,
-                    }
-                    
-                    available_slots.append(slot_data)
+            # Add list prices if service specified
+            if service_id:
+                for slot_data in available_slots:
+                    slot_data['member_price'] = service.member_price
+                    slot_data['non_member_price'] = service.non_member_price
             
             return Response({
                 'date': target_date.isoformat(),
@@ -146,6 +140,186 @@ class BookingViewSet(viewsets.ModelViewSet):
                 'error': f'Error fetching availability: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'])
+    def availability_range(self, request):
+        """
+        Get available slots for a range of days in one response.
+        Used by the booking calendar month view and the mobile app.
+        
+        Query parameters:
+        - start: YYYY-MM-DD (optional, defaults to today)
+        - end: YYYY-MM-DD (optional, defaults to start + 6 days)
+        - service_id: Service ID (optional, adds per-slot price)
+        - room_type: mensuite/private/shared/vip (optional)
+        
+        Slots are returned per day as columns (dict of lists) to keep
+        the payload compact.
+        """
+        try:
+            start_param = request.query_params.get('start')
+            end_param = request.query_params.get('end')
+            service_id = request.query_params.get('service_id')
+            room_type = request.query_params.get('room_type')
+            
+            today = timezone.now().date()
+            start_date = datetime.strptime(start_param, '%Y-%m-%d').date() if start_param else today
+            end_date = (
+                datetime.strptime(end_param, '%Y-%m-%d').date()
+                if end_param else start_date + timedelta(days=6)
+            )
+            
+            if end_date < start_date:
+                return Response({
+                    'error': 'end must be on or after start'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            if (end_date - start_date).days >= self.MAX_RANGE_DAYS:
+                return Response({
+                    'error': f'Range cannot exceed {self.MAX_RANGE_DAYS} days'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Check user's booking privileges
+            user = request.user
+            membership = get_request_membership(request)
+            is_member = membership.is_active
+            max_advance_days = membership.max_advance_days
+            max_date = today + timedelta(days=max_advance_days)
+            
+            if end_date > max_date:
+                return Response({
+                    'error': f'You can only book {max_advance_days} days in advance',
+                    'max_advance_days': max_advance_days,
+                    'is_member': is_member
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            room_types = None
+            service_price = None
+            slot_prices = None
+            if service_id:
+                try:
+                    service = Service.objects.select_related('category').get(id=service_id)
+                    room_types = self._get_compatible_room_types(service)
+                    service_price, slot_prices = self._get_service_prices(service, user, membership)
+                except Service.DoesNotExist:
+                    return Response({'error': 'Service not found'}, status=status.HTTP_404_NOT_FOUND)
+            
+            dates = [
+                start_date + timedelta(days=offset)
+                for offset in range((end_date - start_date).days + 1)
+            ]
+            
+            # One cache read; missing days built with one grouped query
+            rooms, days = availability_index.get_days(dates)
+            
+            now = timezone.now()
+            tier = membership.tier
+            
+            days_data = {}
+            total_slots = 0
+            used_rooms = set()
+            for target_date in dates:
+                columns = availability_index.available_columns(
+                    rooms,
+                    days[target_date],
+                    tier=tier,
+                    now=now,
+                    room_type=room_type,
+                    room_types=room_types,
+                    service_price=service_price,
+                    slot_prices=slot_prices
+                )
+                days_data[target_date.isoformat()] = columns
+                total_slots += len(columns['slot_id'])
+                used_rooms.update(columns['room_id'])
+            
+            return Response({
+                'start': start_date.isoformat(),
+                'end': end_date.isoformat(),
+                'max_advance_days': max_advance_days,
+                'access_tier': tier,
+                'rooms': {
+                    room_id: {
+                        'name': rooms[room_id]['name'],
+                        'type': rooms[room_id]['room_type'],
+                    }
+                    for room_id in sorted(used_rooms)
+                },
+                'days': days_data,
+                'total_slots': total_slots,
+            })
+            
+        except ValueError as e:
+            return Response({
+                'error': f'Invalid date: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': f'Error fetching availability: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """
+        Find the next openings for a service across rooms and technicians.
+        
+        Query parameters:
+        - service_id: Service ID (required)
+        - count: Number of results (default 5, max 20)
+        - after: YYYY-MM-DD or YYYY-MM-DDTHH:MM (optional, defaults to now)
+        - duration: Duration in minutes (optional, defaults to service duration)
+        - room_id / technician_id: Preferred room / technician (optional)
+        - require_technician: true/false (default true)
+        """
+        params = request.query_params
+        if not params.get('service_id'):
+            return Response({
+                'error': 'Missing required parameter: service_id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            service = Service.objects.select_related('category').get(id=params['service_id'])
+        except (Service.DoesNotExist, ValueError):
+            return Response({'error': 'Service not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            count = min(int(params.get('count', 5)), self.NEXT_AVAILABLE_MAX_RESULTS)
+            duration = int(params['duration']) if params.get('duration') else None
+            room_id = int(params['room_id']) if params.get('room_id') else None
+            technician_id = int(params['technician_id']) if params.get('technician_id') else None
+            after = None
+            if params.get('after'):
+                after_format = '%Y-%m-%dT%H:%M' if 'T' in params['after'] else '%Y-%m-%d'
+                after = timezone.make_aware(datetime.strptime(params['after'], after_format))
+                after = max(after, timezone.now())
+        except ValueError:
+            return Response({
+                'error': 'Invalid parameter format'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if count < 1 or (duration is not None and duration < 1):
+            return Response({
+                'error': 'count and duration must be positive'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        search = slot_search.find_next(
+            service,
+            count=count,
+            after=after,
+            duration=duration,
+            room_id=room_id,
+            technician_id=technician_id,
+            context=get_request_membership(request),
+            require_technician=params.get('require_technician', 'true').lower() != 'false',
+        )
+        
+        return Response({
+            'service_id': service.id,
+            'duration': duration or service.duration,
+            'results': search['results'],
+            'searched_until': search['searched_until'].isoformat() if search['searched_until'] else None,
+            'complete': search['complete'],
+        })
+    
     @action(detail=False, methods=['post'])
     def create_booking(self, request):
         """
@@ -177,11 +351,12 @@ class BookingViewSet(viewsets.ModelViewSet):
             start_time = datetime.strptime(data['start_time'], '%H:%M').time()
             
             # Check booking privileges
-            max_advance_days = self._get_max_advance_days(user)
+            membership = get_request_membership(request)
+            max_advance_days = membership.max_advance_days
             if booking_date > timezone.now().date() + timedelta(days=max_advance_days):
                 return Response({
                     'error': f'You can only book {max_advance_days} days in advance',
-                    'is_member': hasattr(user, 'membership') and user.membership.is_active
+                    'is_member': membership.is_active
                 }, status=status.HTTP_403_FORBIDDEN)
             
             # Find availability slot
@@ -196,8 +371,17 @@ class BookingViewSet(viewsets.ModelViewSet):
                     'error': 'No availability slot found for this time'
                 }, status=status.HTTP_404_NOT_FOUND)
             
+            # Fast path - the authoritative capacity check is the
+            # conditional UPDATE in _reserve_and_create_booking
+            if slot.is_blocked or slot.current_bookings >= slot.max_bookings:
+                return Response({
+                    'error': 'This time slot is fully booked',
+                    'retry': False,
+                    'waitlist_available': not slot.is_blocked,
+                }, status=status.HTTP_409_CONFLICT)
+            
             # Check if slot is available for user
-            if not slot.is_available_for_user(user):
+            if not slot.is_available_for_user(user, context=membership):
                 return Response({
                     'error': 'This time slot is not available for your membership level',
                     'priority_info': {
@@ -213,8 +397,10 @@ class BookingViewSet(viewsets.ModelViewSet):
                 'booking_date': booking_date,
                 'start_time': start_time,
                 'duration': service.duration,
-                'base_price': slot.get_price_for_service(service, user),
+                'base_price': slot.get_price_for_service(service, user, context=membership),
             }
+            # Recalculated with add-ons and discount before commit
+            booking_data['final_total'] = booking_data['base_price']
             
             # Add optional fields
             optional_fields = ['guest_name', 'guest_phone', 'guest_email', 
@@ -227,26 +413,28 @@ class BookingViewSet(viewsets.ModelViewSet):
             if 'scene_preferences' in data:
                 booking_data['scene_preferences'] = data['scene_preferences']
             
-            # Create the booking
-            booking = Booking.objects.create(user=user, **booking_data)
-            
-            # Handle add-ons
-            if 'addons' in data:
-                self._process_booking_addons(booking, data['addons'])
-            
-            # Calculate final total
-            booking.calculate_total()
-            booking.save()
-            
-            # Update slot availability
-            slot.current_bookings += 1
-            slot.save()
-            
-            # Create payment record for QuickBooks integration
-            payment = self._create_booking_payment(booking, data.get('payment_method', 'pending'))
+            # Reserve a place, create the booking, add-ons, payment and
+            # QuickBooks sync record in one transaction
+            try:
+                booking = booking_pipeline.create(
+                    slot, user, booking_data,
+                    addons_data=data.get('addons'),
+                    payment_method=data.get('payment_method', 'pending'),
+                    context=membership
+                )
+            except OperationalError:
+                logger.warning(f"Slot {slot.id} reservation contended, giving up")
+                return Response({
+                    'error': 'This time slot is busy, please try again',
+                    'retry': True,
+                }, status=status.HTTP_409_CONFLICT)
             
-            # Schedule QuickBooks sync
-            self._schedule_quickbooks_sync(booking, 'invoice')
+            if booking is None:
+                return Response({
+                    'error': 'This time slot is fully booked',
+                    'retry': False,
+                    'waitlist_available': not slot.is_blocked,
+                }, status=status.HTTP_409_CONFLICT)
             
             return Response({
                 'id': booking.id,
@@ -278,49 +466,70 @@ class BookingViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def my_bookings(self, request):
-        """Get user's bookings (upcoming and past)."""
+        """
+        Get user's bookings (upcoming and past) with keyset pagination.
+        
+        Без параметрів - перша сторінка обох секцій та totals.
+        ?section=upcoming|past&cursor=<next_cursor>&limit=N - наступна
+        сторінка однієї секції (один запит, без OFFSET).
+        """
         user = request.user
         now = timezone.now()
         today = now.date()
         
-        # Upcoming bookings
-        upcoming = Booking.objects.filter(
-            user=user,
-            booking_date__gte=today,
-            status__in=['confirmed', 'pending']
-        ).select_related('service', 'room').order_by('booking_date', 'start_time')
+        section = request.query_params.get('section')
+        if section is not None and section not in self.MY_BOOKINGS_SECTIONS:
+            return Response({
+                'error': 'section must be "upcoming" or "past"'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        try:
+            limit = int(request.query_params.get('limit', 0)) or None
+            if limit is not None and limit < 0:
+                raise ValueError('limit must be positive')
+            cursor = self._decode_booking_cursor(request.query_params.get('cursor'))
+        except ValueError:
+            return Response({
+                'error': 'Invalid cursor or limit'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        upcoming_filter = Q(booking_date__gte=today, status__in=['confirmed', 'pending'])
         # Past bookings (last 6 months)
         six_months_ago = today - timedelta(days=180)
-        past = Booking.objects.filter(
-            user=user,
+        past_filter = Q(
             booking_date__gte=six_months_ago,
             booking_date__lt=today,
             status__in=['completed', 'cancelled', 'no_show']
-        ).select_related('service', 'room').order_by('-booking_date', '-start_time')
+        )
         
-        def serialize_booking(booking):
-            return {
-                'id': booking.id,
-                'booking_reference': booking.booking_reference,
-                'service': booking.service.name,
-                'service_category': booking.service.category.name,
-                'date': booking.booking_date.isoformat(),
-                'start_time': booking.start_time.strftime('%H:%M'),
-                'end_time': booking.end_time.strftime('%H:%M'),
-                'room': booking.room.name,
-                'status': booking.status,
-                'can_cancel': booking.can_cancel(),
-                'can_reschedule': booking.can_reschedule(),
-                'final_total': str(booking.final_total),
-                'payment_status': booking.payment_status,
-            }
+        if section:
+            section_filter = upcoming_filter if section == 'upcoming' else past_filter
+            bookings, next_cursor = self._booking_page(
+                user, section_filter, section, cursor, limit
+            )
+            return Response({
+                'section': section,
+                'results': [self._serialize_my_booking(b, now) for b in bookings],
+                'next_cursor': next_cursor,
+            })
+        
+        # Both totals in one conditional aggregate
+        totals = Booking.objects.filter(user=user).aggregate(
+            total_upcoming=Count('id', filter=upcoming_filter),
+            total_past=Count('id', filter=past_filter),
+        )
+        upcoming, upcoming_cursor = self._booking_page(user, upcoming_filter, 'upcoming', None, limit)
+        past, past_cursor = self._booking_page(user, past_filter, 'past', None, limit)
         
         return Response({
-            'upcoming': [serialize_booking(b) for b in upcoming[:10]],
-            'past': [serialize_booking(b) for b in past[:20]],
-            'total_upcoming': upcoming.count(),
-            'total_past': past.count(),
+            'upcoming': [self._serialize_my_booking(b, now) for b in upcoming],
+            'past': [self._serialize_my_booking(b, now) for b in past],
+            'total_upcoming': totals['total_upcoming'],
+            'total_past': totals['total_past'],
+            'next_cursor': {
+                'upcoming': upcoming_cursor,
+                'past': past_cursor,
+            },
         })
     
     @action(detail=True, methods=['post'])
@@ -337,23 +546,28 @@ class BookingViewSet(viewsets.ModelViewSet):
             # Get cancellation reason
             reason = request.data.get('reason', 'Cancelled by customer')
             
-            # Cancel the booking
-            booking.status = 'cancelled'
-            booking.cancelled_at = timezone.now()
-            booking.cancellation_reason = reason
-            booking.save()
+            slot_lookup = {
+                'date': booking.booking_date,
+                'start_time': booking.start_time,
+                'room_id': booking.room_id,
+            }
             
-            # Free up the slot
-            try:
-                slot = AvailabilitySlot.objects.get(
-                    date=booking.booking_date,
-                    start_time=booking.start_time,
-                    room=booking.room
-                )
-                slot.current_bookings = max(0, slot.current_bookings - 1)
-                slot.save()
-            except AvailabilitySlot.DoesNotExist:
-                pass
+            # Cancel the booking and free up the slot in one transaction
+            with transaction.atomic():
+                booking.status = 'cancelled'
+                booking.cancelled_at = timezone.now()
+                booking.cancellation_reason = reason
+                booking.save(update_fields=[
+                    'status', 'cancelled_at', 'cancellation_reason', 'updated_at'
+                ])
+                AvailabilitySlot.release(**slot_lookup)
+                
+                # Freed place goes to the head of the waitlist
+                promoted = waitlist.promote(**slot_lookup)
+            
+            availability_broadcast.publish_slots(
+                availability_index.refresh_slots(**slot_lookup)
+            )
             
             # Schedule QuickBooks sync for cancellation
             self._schedule_quickbooks_sync(booking, 'invoice')
@@ -362,6 +576,7 @@ class BookingViewSet(viewsets.ModelViewSet):
                 'message': 'Booking cancelled successfully',
                 'booking_reference': booking.booking_reference,
                 'status': booking.status,
+                'waitlist_promoted': len(promoted),
             })
             
         except Exception as e:
@@ -369,82 +584,161 @@ class BookingViewSet(viewsets.ModelViewSet):
                 'error': f'Error cancelling booking: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    def _get_max_advance_days(self, user):
-        """Get maximum days a user can book in advance."""
-        if hasattr(user, 'membership') and user.membership.is_active:
-            membership = user.membership
-            if membership.plan.name.lower() == 'unlimited':
-                return 90  # 3 months for VIP
-            elif membership.plan.priority_booking:
-                return 60   # 2 months for priority members
-            else:
-                return 30   # 1 month for regular members
-        return 3  # 3 days for non-members
-    
-    def _get_compatible_rooms(self, service):
-        """Get rooms compatible with a service."""
-        # Logic to determine which rooms support which services
-        service_category = service.category.slug
-        
-        if service_category == 'mensuite':
-            return Room.objects.filter(room_type__in=['mensuite', 'shared'])
-        elif service_category == 'coresync-private':
-            return Room.objects.filter(room_type__in=['private', 'vip'])
-        else:
-            return Room.objects.filter(is_active=True)
+    @action(detail=False, methods=['post'])
+    def join_waitlist(self, request):
+        """
+        Join the waitlist for a fully booked slot. The user is booked
+        automatically when a place frees up.
+        """
+        data = request.data
+        
+        required_fields = ['service_id', 'date', 'start_time', 'room_id']
+        for field in required_fields:
+            if field not in data:
+                return Response({
+                    'error': f'Missing required field: {field}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            service = Service.objects.get(id=data['service_id'])
+            slot = AvailabilitySlot.objects.get(
+                date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
+                start_time=datetime.strptime(data['start_time'], '%H:%M').time(),
+                room_id=data['room_id']
+            )
+        except (Service.DoesNotExist, AvailabilitySlot.DoesNotExist):
+            return Response({
+                'error': 'No availability slot found for this time'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except ValueError:
+            return Response({
+                'error': 'Invalid date or time format'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            entry = waitlist.join(slot, request.user, service, context=get_request_membership(request))
+        except ValidationError as e:
+            return Response({
+                'error': e.messages[0]
+            }, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            'id': entry.id,
+            'slot_id': slot.id,
+            'status': entry.status,
+            'position': waitlist.position(entry),
+        }, status=status.HTTP_201_CREATED)
     
-    def _process_booking_addons(self, booking, addons_data):
-        """Process and create booking add-ons."""
-        for addon_data in addons_data:
-            try:
-                addon = ServiceAddon.objects.get(id=addon_data['id'])
-                quantity = addon_data.get('quantity', 1)
-                
-                BookingAddon.objects.create(
-                    booking=booking,
-                    addon=addon,
-                    quantity=quantity,
-                    unit_price=addon.price,
-                    notes=addon_data.get('notes', ''),
-                    preferences=addon_data.get('preferences', {})
-                )
-            except ServiceAddon.DoesNotExist:
-                continue
+    @action(detail=False, methods=['post'])
+    def leave_waitlist(self, request):
+        """Leave a slot waitlist."""
+        entry_id = request.data.get('entry_id')
+        if not entry_id:
+            return Response({
+                'error': 'Missing required field: entry_id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not waitlist.leave(entry_id, request.user):
+            return Response({
+                'error': 'Waitlist entry not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'message': 'Removed from waitlist'})
     
-    def _create_booking_payment(self, booking, payment_method='pending'):
-        """Create payment record for booking - ensures ALL payments go to QuickBooks."""
-        from payments.models import Payment
+    def _booking_page(self, user, section_filter, section, cursor=None, limit=None):
+        """
+        Одна keyset сторінка bookings секції.
+        Upcoming - за зростанням (date, start_time, id), past - за спаданням.
+        Returns (bookings, next_cursor).
+        """
+        default_limit, max_limit = self.MY_BOOKINGS_SECTIONS[section]
+        limit = min(limit or default_limit, max_limit)
+        ascending = section == 'upcoming'
         
-        try:
-            payment = Payment.objects.create(
-                user=booking.user,
-                payment_type='service',
-                payment_method=payment_method if payment_method != 'pending' else 'stripe_card',
-                amount=booking.final_total,
-                currency='USD',
-                status='pending',  # Will be updated by Stripe webhook
-                description=f"Service booking: {booking.service.name}",
-                metadata={
-                    'booking_id': booking.id,
-                    'booking_reference': booking.booking_reference,
-                    'service_name': booking.service.name,
-                    'room_name': booking.room.name,
-                    'booking_date': booking.booking_date.isoformat(),
-                }
+        queryset = Booking.objects.filter(section_filter, user=user).select_related(
+            'service__category', 'room'
+        )
+        
+        if cursor:
+            cursor_date, cursor_time, cursor_id = cursor
+            op = 'gt' if ascending else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'booking_date__{op}': cursor_date}) |
+                Q(booking_date=cursor_date, **{f'start_time__{op}': cursor_time}) |
+                Q(booking_date=cursor_date, start_time=cursor_time, **{f'id__{op}': cursor_id})
             )
-            
-            # Link payment to booking
-            booking.payment_status = 'pending'
-            booking.stripe_payment_intent_id = f"pending_{payment.payment_id}"
-            booking.save()
-            
-            logger.info(f"Created payment record {payment.payment_id} for booking {booking.booking_reference}")
-            return payment
-            
-        except Exception as e:
-            logger.error(f"Failed to create payment for booking {booking.booking_reference}: {e}")
+        
+        ordering = ('booking_date', 'start_time', 'id')
+        if not ascending:
+            ordering = tuple(f'-{field}' for field in ordering)
+        
+        # limit + 1 rows - чи є наступна сторінка без окремого count
+        bookings = list(queryset.order_by(*ordering)[:limit + 1])
+        next_cursor = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            next_cursor = self._encode_booking_cursor(bookings[-1])
+        return bookings, next_cursor
+    
+    @staticmethod
+    def _encode_booking_cursor(booking):
+        raw = f'{booking.booking_date.isoformat()}|{booking.start_time.strftime("%H:%M:%S")}|{booking.id}'
+        return urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def _decode_booking_cursor(cursor):
+        """(date, time, id) з cursor; ValueError для невалідного cursor."""
+        if not cursor:
             return None
-
+        try:
+            raw = urlsafe_b64decode(cursor.encode()).decode()
+            date_part, time_part, id_part = raw.split('|')
+        except ValueError:  # binascii.Error / UnicodeDecodeError included
+            raise ValueError('Invalid cursor')
+        return (
+            datetime.strptime(date_part, '%Y-%m-%d').date(),
+            datetime.strptime(time_part, '%H:%M:%S').time(),
+            int(id_part),
+        )
+    
+    @staticmethod
+    def _serialize_my_booking(booking, now):
+        can_cancel = booking.can_cancel(now=now)
+        return {
+            'id': booking.id,
+            'booking_reference': booking.booking_reference,
+            'service': booking.service.name,
+            'service_category': booking.service.category.name,
+            'date': booking.booking_date.isoformat(),
+            'start_time': booking.start_time.strftime('%H:%M'),
+            'end_time': booking.end_time.strftime('%H:%M'),
+            'room': booking.room.name,
+            'status': booking.status,
+            'can_cancel': can_cancel,
+            'can_reschedule': can_cancel and booking.status == 'confirmed',
+            'final_total': str(booking.final_total),
+            'payment_status': booking.payment_status,
+        }
+    
+    def _get_compatible_room_types(self, service):
+        """Get room types compatible with a service (None = all rooms)."""
+        return compatible_room_types(service)
+    
+    def _get_service_prices(self, service, user, membership):
+        """List price та (room, modifier) -> price з pricing matrix."""
+        tier = Service.get_price_tier(user, context=membership)
+        entry = pricing_matrix.service_prices(service.id, tier)
+        if entry is None:
+            return service.get_price_for_user(user, context=membership), None
+        return entry['list'], entry['slots']
+    
+    def _get_compatible_rooms(self, service):
+        """Get rooms compatible with a service."""
+        room_types = self._get_compatible_room_types(service)
+        if room_types is None:
+            return Room.objects.filter(is_active=True)
+        return Room.objects.filter(room_type__in=room_types)
+    
     def _schedule_quickbooks_sync(self, booking, sync_type='invoice'):
         """Schedule QuickBooks synchronization for booking."""
         try:
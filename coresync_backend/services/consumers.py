@@ -0,0 +1,108 @@
+"""
+WebSocket Consumers для booking calendar.
+Real-time availability замість polling `availability`.
+"""
+import json
+import logging
+from datetime import datetime
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+
+from .availability_broadcast import availability_broadcast
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilityConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer для місткості слотів кімнати за день.
+    Snapshot при підключенні, далі лише deltas від create/cancel booking.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection"""
+        kwargs = self.scope['url_route']['kwargs']
+        self.user = self.scope.get('user')
+        self.room_group_name = None
+
+        # Перевірити аутентифікацію
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        try:
+            self.room_id = int(kwargs['room_id'])
+            self.date = datetime.strptime(kwargs['date'], '%Y-%m-%d').date()
+        except ValueError:
+            await self.close()
+            return
+
+        self.room_group_name = availability_broadcast.group_name(self.room_id, self.date)
+
+        # Приєднатися до group до snapshot - deltas не загубляться
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+
+        await self.accept()
+
+        snapshot = await self.get_snapshot(self.room_id, self.date)
+        await self.send(text_data=json.dumps({
+            'type': 'snapshot',
+            'room_id': self.room_id,
+            'date': self.date.isoformat(),
+            'slots': snapshot,
+        }))
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnect"""
+        if self.room_group_name:
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+
+    async def receive(self, text_data):
+        """Клієнт може попросити повторний snapshot (після reconnect)."""
+        try:
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Invalid JSON format'
+            }))
+            return
+
+        if data.get('command') == 'snapshot':
+            snapshot = await self.get_snapshot(self.room_id, self.date)
+            await self.send(text_data=json.dumps({
+                'type': 'snapshot',
+                'room_id': self.room_id,
+                'date': self.date.isoformat(),
+                'slots': snapshot,
+            }))
+        else:
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': f"Unknown command: {data.get('command')}"
+            }))
+
+    async def availability_delta(self, event):
+        """
+        Broadcast delta: [[slot_id, available_spots, max_capacity], ...].
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'delta',
+            'room_id': event['room_id'],
+            'date': event['date'],
+            'slots': event['slots'],
+        }))
+
+    @database_sync_to_async
+    def get_snapshot(self, room_id, target_date):
+        """Колонковий snapshot слотів з availability index."""
+        from .availability_index import availability_index
+
+        return availability_index.room_snapshot(room_id, target_date)
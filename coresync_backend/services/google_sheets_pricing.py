@@ -3,7 +3,7 @@ Google Sheets Pricing Integration - Dynamic pricing tables.
 BLOCKED: потребує payment card для Google Cloud.
 """
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from decimal import Decimal
 from django.core.cache import cache
 
@@ -147,6 +147,10 @@ class GoogleSheetsPricingManager:
         Args:
             service_id: Specific service або None (all)
         """
+        # Precomputed slot prices derive from the same list prices
+        from services.pricing_matrix import pricing_matrix
+        pricing_matrix.invalidate()
+        
         if service_id:
             for tier in ['non_member', 'base', 'premium', 'unlimited']:
                 cache_key = f'price:{service_id}:{tier}'
@@ -1,23 +1,61 @@
 """
 Booking Management Commands - Manual technician assignment and conflict resolution.
+
+    python manage.py assign_technician 12 3
+    python manage.py assign_technician --bulk assignments.csv --dry-run
+    python manage.py assign_technician --move-day 2026-03-01 --from-technician 3 --to-technician 5
+
+CSV для --bulk: header booking_id,technician_id
 """
-from django.core.management.base import BaseCommand
+import csv
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from services.models import Booking
+from django.utils import timezone
+from services.booking_models import Booking
 from technicians.models import Technician
+from technicians.availability import technician_availability
 from services.booking_validator import BookingValidator
 from datetime import datetime, timedelta
 
 
+def get_service_type(service_name: str) -> str:
+    """Technician specialty для сервісу (з назви)."""
+    service_name_lower = service_name.lower()
+
+    if 'massage' in service_name_lower or 'масаж' in service_name_lower:
+        return 'massage'
+    elif 'facial' in service_name_lower or 'фейшал' in service_name_lower:
+        return 'facial'
+    elif 'barber' in service_name_lower or 'барбер' in service_name_lower or 'cut' in service_name_lower:
+        return 'barber'
+    elif 'mani' in service_name_lower or 'pedi' in service_name_lower:
+        return 'manicure'
+    else:
+        return 'all'
+
+
 class Command(BaseCommand):
     help = 'Assign technician до existing booking з conflict checking'
     
     def add_arguments(self, parser):
-        parser.add_argument('booking_id', type=int, help='Booking ID')
-        parser.add_argument('technician_id', type=int, help='Technician ID')
+        parser.add_argument('booking_id', type=int, nargs='?', help='Booking ID')
+        parser.add_argument('technician_id', type=int, nargs='?', help='Technician ID')
         parser.add_argument('--force', action='store_true', help='Force assignment (skip validation)')
+        
+        # Bulk mode
+        parser.add_argument('--bulk', metavar='CSV', help='CSV file з колонками booking_id,technician_id')
+        parser.add_argument('--move-day', metavar='YYYY-MM-DD', help='Перенести всі bookings technician за день')
+        parser.add_argument('--from-technician', type=int, help='Technician ID (для --move-day)')
+        parser.add_argument('--to-technician', type=int, help='Technician ID (для --move-day)')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate, do not save')
     
     def handle(self, *args, **options):
+        if options.get('bulk') or options.get('move_day'):
+            return self._handle_bulk(options)
+        
+        if options['booking_id'] is None or options['technician_id'] is None:
+            raise CommandError('booking_id and technician_id are required (or use --bulk / --move-day)')
+        
         booking_id = options['booking_id']
         technician_id = options['technician_id']
         force = options.get('force', False)
@@ -95,18 +133,114 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error: {str(e)}'))
     
+    def _handle_bulk(self, options):
+        """
+        Bulk assignment: одна batch validation (sweep-line) замість
+        запиту на кожен booking, потім bulk_update валідних рядків.
+        """
+        assignments = self._load_assignments(options)
+        if not assignments:
+            self.stdout.write('Nothing to assign')
+            return
+        
+        bookings = Booking.objects.select_related('service').in_bulk(
+            [booking_id for booking_id, _ in assignments]
+        )
+        technicians = Technician.objects.select_related('user').in_bulk(
+            {technician_id for _, technician_id in assignments}
+        )
+        
+        errors = {}
+        proposals = []
+        proposal_rows = []
+        for row, (booking_id, technician_id) in enumerate(assignments):
+            booking = bookings.get(booking_id)
+            technician = technicians.get(technician_id)
+            if booking is None:
+                errors[row] = f'Booking {booking_id} not found'
+                continue
+            if technician is None:
+                errors[row] = f'Technician {technician_id} not found'
+                continue
+            
+            service_type = self._get_service_type(booking.service.name)
+            if service_type not in technician.specialties and 'all' not in technician.specialties:
+                errors[row] = f'Technician {technician.full_name} не має спеціалізації {service_type}'
+                continue
+            
+            proposals.append({
+                'booking_id': booking.id,
+                'technician_id': technician.id,
+                'booking_date': booking.booking_date,
+                'start_time': booking.start_time,
+                'end_time': booking.end_time,
+            })
+            proposal_rows.append(row)
+        
+        if not options.get('force') and proposals:
+            report = BookingValidator.validate_batch(proposals)
+            for result in report['rows']:
+                if not result['valid']:
+                    row = proposal_rows[result['index']]
+                    details = ', '.join(
+                        conflict['booking_reference'] or f"row {conflict['row'] + 1}"
+                        for conflict in result['conflicts']
+                    )
+                    errors[row] = f"Конфлікт: {result['error_message']}" + (f' ({details})' if details else '')
+        
+        to_update = []
+        for row, (booking_id, technician_id) in enumerate(assignments):
+            if row in errors:
+                self.stdout.write(self.style.ERROR(f'  ✗ row {row + 1} booking {booking_id}: {errors[row]}'))
+                continue
+            booking = bookings[booking_id]
+            booking.technician = technicians[technician_id]
+            booking.updated_at = timezone.now()
+            to_update.append(booking)
+        
+        if options.get('dry_run'):
+            self.stdout.write(
+                self.style.WARNING(f'Dry run: {len(to_update)} valid, {len(errors)} rejected')
+            )
+            return
+        
+        with transaction.atomic():
+            Booking.objects.bulk_update(to_update, ['technician', 'updated_at'], batch_size=500)
+        
+        # bulk_update не викликає signals - оновлюємо free/busy index
+        for booking_date in {booking.booking_date for booking in to_update}:
+            technician_availability.invalidate_day(booking_date)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Assigned {len(to_update)} bookings, {len(errors)} rejected')
+        )
+    
+    def _load_assignments(self, options):
+        """List[(booking_id, technician_id)] з CSV або --move-day."""
+        if options.get('bulk'):
+            try:
+                with open(options['bulk'], newline='') as csv_file:
+                    return [
+                        (int(record['booking_id']), int(record['technician_id']))
+                        for record in csv.DictReader(csv_file)
+                    ]
+            except (OSError, KeyError, ValueError) as e:
+                raise CommandError(f'Invalid CSV: {e}')
+        
+        if not (options.get('from_technician') and options.get('to_technician')):
+            raise CommandError('--move-day requires --from-technician and --to-technician')
+        try:
+            day = datetime.strptime(options['move_day'], '%Y-%m-%d').date()
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        
+        booking_ids = Booking.objects.filter(
+            technician_id=options['from_technician'],
+            booking_date=day,
+            status__in=['confirmed', 'pending']
+        ).order_by('start_time').values_list('id', flat=True)
+        return [(booking_id, options['to_technician']) for booking_id in booking_ids]
+    
     def _get_service_type(self, service_name: str) -> str:
         """Визначає тип сервісу."""
-        service_name_lower = service_name.lower()
-        
-        if 'massage' in service_name_lower:
-            return 'massage'
-        elif 'facial' in service_name_lower:
-            return 'facial'
-        elif 'barber' in service_name_lower or 'cut' in service_name_lower:
-            return 'barber'
-        elif 'mani' in service_name_lower or 'pedi' in service_name_lower:
-            return 'manicure'
-        else:
-            return 'all'
-
+        return get_service_type(service_name)
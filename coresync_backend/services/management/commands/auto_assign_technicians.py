@@ -0,0 +1,55 @@
+"""
+Optimal technician assignment for unassigned bookings.
+
+    python manage.py auto_assign_technicians                 # tomorrow
+    python manage.py auto_assign_technicians --date 2026-03-01 --days 7
+    python manage.py auto_assign_technicians --dry-run
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from technicians.assignment import assignment_solver
+
+
+class Command(BaseCommand):
+    help = 'Призначити technicians для unassigned bookings (min-cost matching)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='First day YYYY-MM-DD (default: tomorrow)')
+        parser.add_argument('--days', type=int, default=1, help='Number of days (default: 1)')
+        parser.add_argument('--dry-run', action='store_true', help='Only solve, do not save')
+    
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                start_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError as e:
+                raise CommandError(f'Invalid date: {e}')
+        else:
+            start_date = timezone.localdate() + timedelta(days=1)
+        
+        if options['days'] < 1:
+            raise CommandError('--days must be positive')
+        
+        try:
+            results = assignment_solver.solve_range(
+                start_date, days=options['days'], dry_run=options['dry_run']
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        
+        for result in results:
+            line = (
+                f"{result['date'].isoformat()}: {len(result['assigned'])} assigned, "
+                f"{len(result['unassigned'])} unassigned"
+            )
+            self.stdout.write(self.style.SUCCESS(line) if not result['unassigned'] else self.style.WARNING(line))
+            for booking_id in result['unassigned']:
+                self.stdout.write(f'  ✗ booking {booking_id}: no qualified technician free')
+            for booking_id in result['skipped']:
+                self.stdout.write(f'  - booking {booking_id}: assigned manually meanwhile, kept')
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing saved'))
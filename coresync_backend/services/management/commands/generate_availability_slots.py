@@ -0,0 +1,52 @@
+"""
+Generate AvailabilitySlots from weekly room templates.
+
+    python manage.py generate_availability_slots             # extend horizon to 90 days
+    python manage.py generate_availability_slots --days 30
+    python manage.py generate_availability_slots --start 2026-01-01 --end 2026-03-31 --room 3
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.booking_models import Room
+from services.slot_generator import slot_generator
+
+
+class Command(BaseCommand):
+    help = 'Generate availability slots з SlotTemplate (incremental horizon by default)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=slot_generator.default_horizon_days,
+                            help='Horizon in days from today (default: 90)')
+        parser.add_argument('--start', help='Start date YYYY-MM-DD (explicit range)')
+        parser.add_argument('--end', help='End date YYYY-MM-DD (explicit range)')
+        parser.add_argument('--room', type=int, action='append', dest='rooms',
+                            help='Room ID (can be repeated)')
+    
+    def handle(self, *args, **options):
+        rooms = None
+        if options['rooms']:
+            rooms = Room.objects.filter(id__in=options['rooms'], is_active=True)
+        
+        if options['start'] or options['end']:
+            if not (options['start'] and options['end']):
+                raise CommandError('--start and --end must be used together')
+            try:
+                start_date = datetime.strptime(options['start'], '%Y-%m-%d').date()
+                end_date = datetime.strptime(options['end'], '%Y-%m-%d').date()
+            except ValueError as e:
+                raise CommandError(f'Invalid date: {e}')
+            if end_date < start_date:
+                raise CommandError('--end must be after --start')
+            
+            result = slot_generator.generate(start_date, end_date, rooms=rooms)
+        else:
+            result = slot_generator.extend_horizon(days=options['days'], rooms=rooms)
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {result['created']} slots, skipped {result['skipped']} existing "
+                f"({result['rooms']} rooms, {result['days']} days)"
+            )
+        )
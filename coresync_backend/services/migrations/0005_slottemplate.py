@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-18 07:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_booking_bookings_technic_883f03_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField(blank=True, help_text='Leave empty to use room opening time', null=True)),
+                ('end_time', models.TimeField(blank=True, help_text='Leave empty to use room closing time', null=True)),
+                ('slot_minutes', models.PositiveIntegerField(default=15)),
+                ('priority', models.IntegerField(default=0, help_text='Higher priority wins where templates overlap')),
+                ('max_bookings', models.PositiveIntegerField(blank=True, help_text='Leave empty to use room capacity', null=True)),
+                ('base_price_modifier', models.DecimalField(decimal_places=2, default=1.0, help_text='Price modifier for generated slots (e.g., 1.5 for peak hours)', max_digits=5)),
+                ('is_premium_slot', models.BooleanField(default=False)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('member_priority_days', models.PositiveIntegerField(default=3, help_text='Members-only booking until N days before the slot')),
+                ('vip_priority_days', models.PositiveIntegerField(blank=True, default=60, help_text='VIP-only booking until N days before the slot (empty = no VIP window)', null=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_templates', to='services.room')),
+            ],
+            options={
+                'verbose_name': 'Slot Template',
+                'verbose_name_plural': 'Slot Templates',
+                'db_table': 'slot_templates',
+                'ordering': ['room', 'weekday', 'priority'],
+                'indexes': [models.Index(fields=['room', 'weekday'], name='slot_templa_room_id_dd936e_idx')],
+            },
+        ),
+    ]
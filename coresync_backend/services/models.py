@@ -117,9 +117,28 @@ class Service(BaseModel):
             return round((self.savings_for_members / self.non_member_price) * 100, 1)
         return 0
 
-    def get_price_for_user(self, user):
-        """Get price based on user membership status."""
-        if user and user.is_authenticated and user.is_member:
+    @staticmethod
+    def get_price_tier(user, context=None):
+        """
+        Price tier ('member' / 'non_member') based on user membership status.
+        context: MembershipContext, if already resolved for the request.
+        """
+        from memberships.context import TIER_MEMBER, TIER_NON_MEMBER
+
+        if context is not None:
+            is_member = context.is_member_status
+        else:
+            is_member = user and user.is_authenticated and user.is_member
+        return TIER_MEMBER if is_member else TIER_NON_MEMBER
+
+    def get_price_for_user(self, user, context=None):
+        """
+        Get price based on user membership status.
+        context: MembershipContext, if already resolved for the request.
+        """
+        from memberships.context import TIER_MEMBER
+
+        if self.get_price_tier(user, context=context) == TIER_MEMBER:
             return self.member_price
         return self.non_member_price
 
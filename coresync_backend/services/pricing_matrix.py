@@ -0,0 +1,176 @@
+"""
+Pricing Matrix - precomputed ціни slots × services × tiers.
+
+Ціна слоту = service price (member / non-member) * room.premium_modifier
+* slot.base_price_modifier. Замість Decimal chain на кожен рядок
+availability, matrix будується трьома запитами (services, rooms,
+modifier classes слотів / шаблонів) і кешується по ключу
+(service, price tier):
+
+    {'list': Decimal, 'slots': {(room_id, modifier): Decimal}}
+
+Ключі versioned - Service / Room / SlotTemplate signals та Sheets
+sync інвалідують всю matrix одним cache.incr (одразу і ще раз після
+commit - паралельний build міг закешувати старі ціни під нову
+version). Кімнати та modifier classes кешуються окремо під тією ж
+version, тому miss одного ключа добудовує лише цей сервіс одним
+запитом; невідомий service_id кешується як MISSING.
+Слоти з modifier, якого немає в matrix, рахуються fallback chain.
+"""
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from memberships.context import TIER_MEMBER, TIER_NON_MEMBER
+
+logger = logging.getLogger(__name__)
+
+PRICE_TIERS = (TIER_MEMBER, TIER_NON_MEMBER)
+
+MODIFIER_QUANTUM = Decimal('0.01')
+
+# Negative cache entry: сервісу немає в matrix
+MISSING = 'missing'
+
+
+def modifier_key(value) -> str:
+    """Нормалізований modifier class ('1.50') - як str(DecimalField)."""
+    return str(Decimal(str(value)).quantize(MODIFIER_QUANTUM))
+
+
+class PricingMatrix:
+    """
+    Versioned cache цін по (service, tier, room, slot modifier).
+    """
+
+    cache_prefix = 'pricing_matrix'
+    cache_ttl = 60 * 60 * 24  # 24 hours
+    missing_ttl = 60 * 5  # 5 minutes
+
+    # ------------------------------------------------------------------
+    # Cache keys
+    # ------------------------------------------------------------------
+
+    @property
+    def _version_key(self) -> str:
+        return f'{self.cache_prefix}:version'
+
+    def _get_version(self) -> int:
+        version = cache.get(self._version_key)
+        if version is None:
+            version = 1
+            cache.add(self._version_key, version, None)
+        return version
+
+    def _entry_key(self, service_id: int, tier: str, version: int) -> str:
+        return f'{self.cache_prefix}:v{version}:{service_id}:{tier}'
+
+    def _dimensions_key(self, version: int) -> str:
+        return f'{self.cache_prefix}:v{version}:dimensions'
+
+    # ------------------------------------------------------------------
+    # Build / read
+    # ------------------------------------------------------------------
+
+    def _dimensions(self, version: int):
+        """
+        ([(room_id, premium_modifier)], [(modifier key, Decimal)]) - з
+        cache або двома-трьома запитами (лише майбутні слоти).
+        """
+        from .booking_models import AvailabilitySlot, Room, SlotTemplate
+
+        key = self._dimensions_key(version)
+        dimensions = cache.get(key)
+        if dimensions is not None:
+            return dimensions
+
+        rooms = list(Room.objects.values_list('id', 'premium_modifier'))
+        modifiers = {modifier_key(1)}
+        modifiers.update(
+            modifier_key(value) for value in
+            AvailabilitySlot.objects.filter(
+                date__gte=timezone.localdate()
+            ).values_list('base_price_modifier', flat=True).order_by().distinct()
+        )
+        modifiers.update(
+            modifier_key(value) for value in
+            SlotTemplate.objects.values_list('base_price_modifier', flat=True).order_by().distinct()
+        )
+        dimensions = (rooms, [(key, Decimal(key)) for key in sorted(modifiers)])
+        cache.set(key, dimensions, self.cache_ttl)
+        return dimensions
+
+    def build(self, service_ids: Optional[Iterable[int]] = None) -> Dict[Tuple[int, str], Dict[str, Any]]:
+        """Побудувати matrix (всю або лише service_ids) та записати в cache (set_many)."""
+        from .models import Service
+
+        version = self._get_version()
+        rooms, modifier_values = self._dimensions(version)
+
+        services = Service.objects.values_list('id', 'member_price', 'non_member_price')
+        if service_ids is not None:
+            services = services.filter(id__in=list(service_ids))
+
+        entries = {}
+        for service_id, member_price, non_member_price in services:
+            for tier, list_price in ((TIER_MEMBER, member_price), (TIER_NON_MEMBER, non_member_price)):
+                slots = {}
+                for room_id, premium_modifier in rooms:
+                    room_price = list_price * premium_modifier
+                    for key, modifier in modifier_values:
+                        slots[(room_id, key)] = round(room_price * modifier, 2)
+                entries[(service_id, tier)] = {'list': list_price, 'slots': slots}
+
+        cache.set_many(
+            {
+                self._entry_key(service_id, tier, version): entry
+                for (service_id, tier), entry in entries.items()
+            },
+            self.cache_ttl
+        )
+        logger.info(f"Built pricing matrix v{version}: {len(entries)} service tiers")
+        return entries
+
+    def service_prices(self, service_id: int, tier: str) -> Optional[Dict[str, Any]]:
+        """
+        Ціни сервісу для price tier: {'list', 'slots'} (одне читання з
+        cache; при miss - build лише цього сервісу). None для невідомого
+        сервісу.
+        """
+        key = self._entry_key(service_id, tier, self._get_version())
+        entry = cache.get(key)
+        if entry is None:
+            entry = self.build(service_ids=[service_id]).get((service_id, tier))
+            if entry is None:
+                cache.set(key, MISSING, self.missing_ttl)
+        if entry is None or entry == MISSING:
+            return None
+        return entry
+
+    def slot_price(self, service_id: int, tier: str, room_id: int, modifier) -> Optional[Decimal]:
+        """Ціна одного слоту або None (немає в matrix - рахувати напряму)."""
+        entry = self.service_prices(service_id, tier)
+        if entry is None:
+            return None
+        return entry['slots'].get((room_id, modifier_key(modifier)))
+
+    def invalidate(self):
+        """Інвалідувати всю matrix (Service / Room / Sheets pricing changes)."""
+        self._bump_version()
+        transaction.on_commit(self._bump_version)
+
+    def _bump_version(self):
+        """Атомарний cache.incr; ключ витіснено - створити (або incr, якщо інший процес встиг)."""
+        try:
+            cache.incr(self._version_key)
+        except ValueError:
+            if not cache.add(self._version_key, 2, None):
+                cache.incr(self._version_key)
+
+
+# Global instance
+pricing_matrix = PricingMatrix()
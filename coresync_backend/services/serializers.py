@@ -4,6 +4,7 @@ Clean, safe serializers without conflicts.
 """
 from rest_framework import serializers
 from .models import Service, ServiceCategory, ServiceAddon, ServiceHistory
+from memberships.context import get_request_membership
 
 
 class ServiceCategorySerializer(serializers.ModelSerializer):
@@ -63,7 +64,9 @@ class ServiceDetailSerializer(serializers.ModelSerializer):
         """Get price based on user membership status"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.get_price_for_user(request.user)
+            return obj.get_price_for_user(
+                request.user, context=get_request_membership(request)
+            )
         return obj.non_member_price
     
     price_for_user = serializers.SerializerMethodField()
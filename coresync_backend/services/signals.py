@@ -0,0 +1,44 @@
+"""
+Services Django Signals - keep availability index in sync.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from .booking_models import AvailabilitySlot, Room, SlotTemplate
+from .models import Service
+from .availability_broadcast import availability_broadcast
+from .availability_index import availability_index
+from .pricing_matrix import pricing_matrix
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=AvailabilitySlot)
+def availability_slot_saved(sender, instance, created, **kwargs):
+    """Інкрементально оновити індекс дня після зміни слоту."""
+    if created:
+        availability_index.invalidate_day(instance.date)
+    else:
+        availability_index.update_slot(instance)
+        availability_broadcast.publish_slots([instance])
+
+
+@receiver(post_delete, sender=AvailabilitySlot)
+def availability_slot_deleted(sender, instance, **kwargs):
+    """Інвалідувати індекс дня після видалення слоту."""
+    availability_index.invalidate_day(instance.date)
+
+
+@receiver([post_save, post_delete], sender=Room)
+def room_changed(sender, instance, **kwargs):
+    """Метадані кімнат (назва, maintenance, modifier) змінились."""
+    availability_index.invalidate_rooms()
+    pricing_matrix.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=SlotTemplate)
+def pricing_changed(sender, instance, **kwargs):
+    """Ціни сервісу або modifier classes шаблонів змінились."""
+    pricing_matrix.invalidate()
@@ -0,0 +1,204 @@
+"""
+Slot Generator - розгортає тижневі SlotTemplate в AvailabilitySlot.
+
+Слоти створюються chunked bulk_create з ignore_conflicts на unique
+(date, start_time, room), тому повторний запуск безпечний: існуючі
+слоти (з бронюваннями) не перезаписуються і рахуються як skipped.
+
+extend_horizon() дописує лише дні після останнього згенерованого дня
+кожної кімнати - нічний запуск займає секунди.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .availability_index import availability_index
+from .booking_models import AvailabilitySlot, Room, SlotTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class SlotGenerator:
+    """
+    Генерація availability slots з тижневих шаблонів кімнат.
+    """
+
+    chunk_size = 1000
+    default_horizon_days = 90
+
+    def generate(self, start_date, end_date, rooms: Optional[Iterable[Room]] = None) -> Dict[str, int]:
+        """Згенерувати слоти для всіх кімнат на діапазон дат (включно)."""
+        rooms = self._get_rooms(rooms)
+        ranges = {room.id: (start_date, end_date) for room in rooms}
+        return self._generate(rooms, ranges)
+
+    def extend_horizon(self, days: Optional[int] = None, rooms: Optional[Iterable[Room]] = None) -> Dict[str, int]:
+        """
+        Дописати слоти до today + days, починаючи з дня після
+        останнього існуючого слоту кожної кімнати.
+        """
+        today = timezone.localdate()
+        end_date = today + timedelta(days=days or self.default_horizon_days)
+        rooms = self._get_rooms(rooms)
+
+        # Один aggregate запит - поточний горизонт кожної кімнати
+        horizons = dict(
+            AvailabilitySlot.objects.filter(room__in=rooms)
+            .values('room')
+            .annotate(last_date=Max('date'))
+            .values_list('room', 'last_date')
+        )
+
+        ranges = {}
+        for room in rooms:
+            last_date = horizons.get(room.id)
+            start_date = max(today, last_date + timedelta(days=1)) if last_date else today
+            ranges[room.id] = (start_date, end_date)
+
+        return self._generate(rooms, ranges)
+
+    def _get_rooms(self, rooms) -> List[Room]:
+        if rooms is None:
+            rooms = Room.objects.filter(is_active=True)
+        return list(rooms)
+
+    def _generate(self, rooms: List[Room], ranges) -> Dict[str, int]:
+        templates = defaultdict(list)
+        for template in SlotTemplate.objects.filter(
+            room__in=rooms,
+            is_active=True
+        ).order_by('priority', 'id'):
+            templates[(template.room_id, template.weekday)].append(template)
+
+        dates = set()
+        batch = []
+        created = skipped = 0
+
+        for room in rooms:
+            start_date, end_date = ranges[room.id]
+            day = start_date
+            while day <= end_date:
+                day_templates = templates.get((room.id, day.weekday()))
+                if day_templates:
+                    for slot in self._expand_day(room, day, day_templates):
+                        batch.append(slot)
+                        if len(batch) >= self.chunk_size:
+                            chunk_created, chunk_skipped = self._flush(batch)
+                            created += chunk_created
+                            skipped += chunk_skipped
+                    dates.add(day)
+                day += timedelta(days=1)
+
+        chunk_created, chunk_skipped = self._flush(batch)
+        created += chunk_created
+        skipped += chunk_skipped
+
+        if dates:
+            availability_index.invalidate_days(dates)
+
+        logger.info(
+            f"Slot generator: {created} slots created, {skipped} existing skipped "
+            f"for {len(rooms)} rooms, {len(dates)} days"
+        )
+        return {
+            'rooms': len(rooms),
+            'days': len(dates),
+            'created': created,
+            'skipped': skipped,
+        }
+
+    def _flush(self, batch: List[AvailabilitySlot]) -> Tuple[int, int]:
+        """
+        Записати chunk без вже існуючих слотів (один SELECT + bulk_create).
+        Returns (created, skipped).
+        """
+        if not batch:
+            return 0, 0
+
+        existing = set(
+            AvailabilitySlot.objects.filter(
+                room__in={slot.room_id for slot in batch},
+                date__in={slot.date for slot in batch},
+                start_time__in={slot.start_time for slot in batch},
+            ).values_list('room_id', 'date', 'start_time')
+        )
+        new = [
+            slot for slot in batch
+            if (slot.room_id, slot.date, slot.start_time) not in existing
+        ]
+        # ignore_conflicts - на випадок паралельного запуску
+        AvailabilitySlot.objects.bulk_create(new, ignore_conflicts=True)
+
+        skipped = len(batch) - len(new)
+        batch.clear()
+        return len(new), skipped
+
+    def _expand_day(self, room: Room, day, day_templates: List[SlotTemplate]) -> Iterator[AvailabilitySlot]:
+        """
+        Розгорнути шаблони одного дня в слоти. Шаблони відсортовані
+        за priority; вікно шаблону з вищим priority вирізається з вікон
+        нижчих, тому слоти різної довжини не перекриваються.
+        """
+        by_start = {}
+        claimed = []
+        for template in reversed(day_templates):
+            window_start = datetime.combine(day, template.start_time or room.opening_time)
+            window_end = datetime.combine(day, template.end_time or room.closing_time)
+            step = timedelta(minutes=template.slot_minutes)
+            for free_start, free_end in self._subtract(window_start, window_end, claimed):
+                cursor = free_start
+                while cursor + step <= free_end:
+                    by_start[cursor.time()] = (template, (cursor + step).time())
+                    cursor += step
+            claimed.append((window_start, window_end))
+
+        weekend = day.weekday() >= 5
+
+        for start_time in sorted(by_start):
+            template, end_time = by_start[start_time]
+            slot_start = timezone.make_aware(datetime.combine(day, start_time))
+
+            tags = list(template.tags)
+            if weekend and 'weekend' not in tags:
+                tags.append('weekend')
+
+            yield AvailabilitySlot(
+                date=day,
+                start_time=start_time,
+                end_time=end_time,
+                room=room,
+                max_bookings=template.max_bookings or room.capacity,
+                member_only_until=slot_start - timedelta(days=template.member_priority_days),
+                vip_only_until=(
+                    slot_start - timedelta(days=template.vip_priority_days)
+                    if template.vip_priority_days else None
+                ),
+                base_price_modifier=template.base_price_modifier,
+                is_premium_slot=template.is_premium_slot,
+                tags=tags,
+            )
+
+    @staticmethod
+    def _subtract(start: datetime, end: datetime, claimed: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+        """Частини інтервалу [start, end), не покриті жодним із claimed."""
+        free = [(start, end)]
+        for claimed_start, claimed_end in claimed:
+            remaining = []
+            for free_start, free_end in free:
+                if claimed_end <= free_start or claimed_start >= free_end:
+                    remaining.append((free_start, free_end))
+                    continue
+                if free_start < claimed_start:
+                    remaining.append((free_start, claimed_start))
+                if claimed_end < free_end:
+                    remaining.append((claimed_end, free_end))
+            free = remaining
+        return free
+
+
+# Global instance
+slot_generator = SlotGenerator()
@@ -0,0 +1,236 @@
+"""
+Slot Search - "next available" пошук (room, technician, start).
+
+Для кожного дня горизонту (батчами з availability_index, без запитів
+для закешованих днів):
+
+    1. слоти, доступні для access tier (місткість + priority windows),
+       зливаються в неперервні free intervals кожної кімнати
+    2. free intervals technicians = merged Schedule мінус busy bookings
+       (technician_availability index)
+    3. sweep по стартах слотів у порядку часу: старт підходить, якщо
+       [start, start + duration) лежить в room interval і в interval
+       хоча б одного technician (bisect)
+
+Пошук зупиняється після N результатів, на межі горизонту (90 днів або
+max_advance_days tier) або коли вичерпано time budget - тоді
+повертається часткова відповідь з complete=False.
+"""
+import logging
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from memberships.context import ANONYMOUS_CONTEXT
+from technicians.availability import technician_availability
+from .availability_index import availability_index, _format_minutes
+from .management.commands.assign_technician import get_service_type
+
+logger = logging.getLogger(__name__)
+
+
+def compatible_room_types(service) -> Optional[List[str]]:
+    """Room types compatible with a service (None = all rooms)."""
+    service_category = service.category.slug
+
+    if service_category == 'mensuite':
+        return ['mensuite', 'shared']
+    elif service_category == 'coresync-private':
+        return ['private', 'vip']
+    return None
+
+
+def _subtract_busy(working: List[tuple], busy_start: List[int], busy_end: List[int]) -> List[tuple]:
+    """Merged working intervals мінус busy intervals (відсортовані за start)."""
+    free = []
+    for window_start, window_end in working:
+        cursor = window_start
+        for start, end in zip(busy_start, busy_end):
+            if end <= cursor or start >= window_end:
+                continue
+            if start > cursor:
+                free.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+
+def _contains(intervals: List[tuple], starts: List[int], start: int, end: int) -> bool:
+    """Чи [start, end) лежить в одному з merged intervals (bisect)."""
+    position = bisect_right(starts, start) - 1
+    return position >= 0 and intervals[position][1] >= end
+
+
+class SlotSearchService:
+    """
+    Пошук найближчих вільних (room, technician, start).
+    """
+
+    horizon_days = 90
+    batch_days = 7
+
+    @property
+    def time_budget(self) -> float:
+        """Latency budget (seconds) для одного пошуку."""
+        return getattr(settings, 'SLOT_SEARCH_TIME_BUDGET', 0.5)
+
+    def find_next(
+        self,
+        service,
+        count: int = 5,
+        after: Optional[datetime] = None,
+        duration: Optional[int] = None,
+        room_id: Optional[int] = None,
+        technician_id: Optional[int] = None,
+        context=None,
+        require_technician: bool = True,
+        room_types: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Перші `count` можливих стартів після `after` (default - зараз).
+
+        Returns: {
+            'results': [{date, start_time, end_time, room_id, room_name,
+                         slot_id, technician_id}, ...],
+            'searched_until': date,
+            'complete': bool,   # False - вичерпано time budget
+        }
+        """
+        deadline = time.monotonic() + self.time_budget
+        context = context or ANONYMOUS_CONTEXT
+        now = timezone.now()
+        after = after or now
+        if timezone.is_aware(after):
+            after = timezone.localtime(after)
+        duration = duration or service.duration
+        if room_types is None:
+            room_types = compatible_room_types(service)
+        specialty = get_service_type(service.name)
+
+        first_day = after.date()
+        horizon = min(self.horizon_days, context.max_advance_days)
+        last_day = timezone.localdate(now) + timedelta(days=horizon)
+
+        results = []
+        searched_until = None
+        complete = True
+        day = first_day
+        while day <= last_day and len(results) < count:
+            if time.monotonic() > deadline:
+                complete = False
+                break
+
+            batch = [day + timedelta(days=offset) for offset in range(self.batch_days)]
+            batch = [target_date for target_date in batch if target_date <= last_day]
+            rooms, days = availability_index.get_days(batch)
+
+            for target_date in batch:
+                if time.monotonic() > deadline:
+                    complete = False
+                    break
+                min_start = after.hour * 60 + after.minute if target_date == first_day else 0
+                results.extend(self._search_day(
+                    target_date, rooms, days[target_date], context.tier, now,
+                    duration, min_start, count - len(results),
+                    room_id, technician_id, specialty, require_technician, room_types
+                ))
+                searched_until = target_date
+                if len(results) >= count:
+                    break
+            if not complete:
+                break
+            day = batch[-1] + timedelta(days=1)
+
+        return {
+            'results': results,
+            'searched_until': searched_until,
+            'complete': complete,
+        }
+
+    def _search_day(
+        self, target_date, rooms, day, tier, now, duration, min_start, limit,
+        room_id, technician_id, specialty, require_technician, room_types
+    ) -> List[Dict[str, Any]]:
+        """Sweep одного дня - до `limit` результатів у порядку часу."""
+        # 1. Free room intervals з доступних для tier слотів
+        room_slots = {}
+        for slot_room_id, room, columns, i, _, _ in availability_index._iter_available(
+            rooms, day, tier, now, room_types=room_types
+        ):
+            if room_id and slot_room_id != room_id:
+                continue
+            room_slots.setdefault(slot_room_id, []).append(
+                (columns['start'][i], columns['end'][i], columns['id'][i])
+            )
+
+        if not room_slots:
+            return []
+
+        candidates = []
+        for slot_room_id, slots in room_slots.items():
+            slots.sort()
+            merged = []
+            for start, end, _ in slots:
+                if merged and start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            merged_starts = [start for start, _ in merged]
+
+            for start, _, slot_id in slots:
+                if start < min_start:
+                    continue
+                if _contains(merged, merged_starts, start, start + duration):
+                    candidates.append((start, slot_room_id, slot_id))
+
+        if not candidates:
+            return []
+        candidates.sort()
+
+        # 2. Free technician intervals
+        technicians = []
+        for tech_id, entry in technician_availability.get_day(target_date).items():
+            if technician_id and tech_id != technician_id:
+                continue
+            if not technician_availability._matches(entry, specialty):
+                continue
+            free = _subtract_busy(entry['working'], entry['busy_start'], entry['busy_end'])
+            if free:
+                technicians.append((tech_id, free, [start for start, _ in free]))
+
+        if require_technician and not technicians:
+            return []
+
+        # 3. Sweep по стартах
+        results = []
+        for start, slot_room_id, slot_id in candidates:
+            end = start + duration
+            assigned = None
+            for tech_id, free, free_starts in technicians:
+                if _contains(free, free_starts, start, end):
+                    assigned = tech_id
+                    break
+            if assigned is None and require_technician:
+                continue
+
+            results.append({
+                'date': target_date.isoformat(),
+                'start_time': _format_minutes(start),
+                'end_time': _format_minutes(end),
+                'room_id': slot_room_id,
+                'room_name': rooms[slot_room_id]['name'],
+                'slot_id': slot_id,
+                'technician_id': assigned,
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+
+# Global instance
+slot_search = SlotSearchService()
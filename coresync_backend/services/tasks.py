@@ -0,0 +1,26 @@
+"""
+Services Celery Tasks - Async operations.
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='services.tasks.extend_availability_horizon')
+def extend_availability_horizon(days: int = None):
+    """
+    Дописати availability slots до горизонту бронювання.
+    Celery beat: щоночі о 1 AM EST.
+    """
+    try:
+        from .slot_generator import slot_generator
+        
+        result = slot_generator.extend_horizon(days=days)
+        
+        logger.info(f"Availability horizon extended: {result}")
+        return result
+    
+    except Exception as e:
+        logger.error(f"Extend availability horizon error: {str(e)}")
+        raise
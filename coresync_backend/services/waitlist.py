@@ -0,0 +1,165 @@
+"""
+Waitlist - черга на повністю заброньовані AvailabilitySlot.
+
+Черга слоту впорядкована за (tier_rank, requested_at, id): VIP, потім
+members, потім non-members, всередині tier - хто раніше записався.
+Composite index (slot, status, tier_rank, requested_at) робить вибір
+голови черги index seek - O(log n). position() - range scan по тому ж
+індексу, O(log n + k) для k записів попереду, без завантаження черги
+в пам'ять.
+
+cancel_booking викликає promote() в тій самій транзакції, що звільняє
+місце: голова черги отримує booking через booking_pipeline, а
+notification відправляється після commit.
+"""
+import logging
+from typing import List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from memberships.context import get_membership_context
+from .booking_models import AvailabilitySlot, Booking, WaitlistEntry
+from .booking_pipeline import booking_pipeline
+
+logger = logging.getLogger(__name__)
+
+QUEUE_ORDER = ('tier_rank', 'requested_at', 'id')
+
+
+class WaitlistService:
+    """
+    Join / leave / promote для waitlist слотів.
+    """
+
+    def join(self, slot: AvailabilitySlot, user, service, context=None) -> WaitlistEntry:
+        """
+        Записати користувача в чергу слоту.
+        Raises ValidationError якщо слот вільний або недоступний для tier.
+        """
+        membership = context or get_membership_context(user)
+
+        if slot.is_blocked:
+            raise ValidationError('This time slot is not available')
+        if slot.current_bookings < slot.max_bookings:
+            raise ValidationError('This time slot still has capacity - book it directly')
+        if not slot.is_available_for_user(user, context=membership, ignore_capacity=True):
+            raise ValidationError('This time slot is not available for your membership level')
+
+        if self._has_booking(user, slot):
+            raise ValidationError('You already have a booking for this time slot')
+
+        # Дублікат ловить unique_waiting_entry_per_slot (паралельні join)
+        try:
+            with transaction.atomic():
+                return WaitlistEntry.objects.create(
+                    slot=slot,
+                    user=user,
+                    service=service,
+                    tier_rank=WaitlistEntry.TIER_RANKS.get(membership.tier, 2),
+                )
+        except IntegrityError:
+            raise ValidationError('You are already on the waitlist for this time slot')
+
+    def leave(self, entry_id: int, user) -> bool:
+        """Вийти з черги. Returns False якщо запис не знайдено."""
+        return WaitlistEntry.objects.filter(
+            id=entry_id, user=user, status='waiting'
+        ).update(status='cancelled', updated_at=timezone.now()) > 0
+
+    def position(self, entry: WaitlistEntry) -> int:
+        """
+        Позиція в черзі (1 = наступний).
+        COUNT по index range - O(log n + k), k = записів попереду.
+        """
+        ahead = WaitlistEntry.objects.filter(
+            slot_id=entry.slot_id, status='waiting'
+        ).filter(
+            Q(tier_rank__lt=entry.tier_rank) |
+            Q(tier_rank=entry.tier_rank, requested_at__lt=entry.requested_at) |
+            Q(tier_rank=entry.tier_rank, requested_at=entry.requested_at, id__lt=entry.id)
+        ).count()
+        return ahead + 1
+
+    def head(self, **slot_lookup) -> Optional[WaitlistEntry]:
+        """
+        Голова черги слоту (рядок блокується до кінця транзакції).
+        slot_lookup: поля AvailabilitySlot (pk / date, start_time, room_id).
+        """
+        lookup = {f'slot__{field}': value for field, value in slot_lookup.items()}
+        return WaitlistEntry.objects.select_for_update(
+            skip_locked=True, of=('self',)
+        ).select_related('slot__room', 'user', 'service').filter(
+            status='waiting', **lookup
+        ).order_by(*QUEUE_ORDER).first()
+
+    def promote(self, **slot_lookup) -> List[Booking]:
+        """
+        Перевести голову черги в bookings, поки у слоті є місця.
+        Викликається всередині транзакції, що звільнила місце.
+        Записи користувачів, які вже мають booking на цей слот, expire.
+        """
+        promoted = []
+        while True:
+            entry = self.head(**slot_lookup)
+            if entry is None:
+                break
+
+            slot = entry.slot
+            slot_lookup = {'pk': slot.pk}
+
+            if self._has_booking(entry.user, slot):
+                entry.status = 'expired'
+                entry.save(update_fields=['status', 'updated_at'])
+                logger.info(f"Expired waitlist entry {entry.id}: user already booked the slot")
+                continue
+
+            membership = get_membership_context(entry.user)
+            booking_data = {
+                'service': entry.service,
+                'room': slot.room,
+                'booking_date': slot.date,
+                'start_time': slot.start_time,
+                'duration': entry.service.duration,
+                'base_price': slot.get_price_for_service(entry.service, entry.user, context=membership),
+            }
+            booking_data['final_total'] = booking_data['base_price']
+
+            booking = booking_pipeline.create(slot, entry.user, booking_data, context=membership)
+            if booking is None:
+                break  # reserve() failed - slot is full again, queue waits
+
+            entry.status = 'promoted'
+            entry.booking = booking
+            entry.promoted_at = timezone.now()
+            entry.save(update_fields=['status', 'booking', 'promoted_at', 'updated_at'])
+
+            transaction.on_commit(lambda booking_id=booking.id: self._notify(booking_id))
+            logger.info(f"Promoted waitlist entry {entry.id} to booking {booking.booking_reference}")
+            promoted.append(booking)
+        return promoted
+
+    @staticmethod
+    def _has_booking(user, slot: AvailabilitySlot) -> bool:
+        return Booking.objects.filter(
+            user=user,
+            room_id=slot.room_id,
+            booking_date=slot.date,
+            start_time=slot.start_time,
+            status__in=['confirmed', 'pending', 'in_progress']
+        ).exists()
+
+    def _notify(self, booking_id: int):
+        try:
+            from notifications.tasks import send_waitlist_promotion
+            send_waitlist_promotion.delay(booking_id)
+        except ImportError:
+            logger.warning("Celery not configured, waitlist notification not queued")
+        except Exception as e:
+            logger.error(f"Error queueing waitlist notification: {str(e)}")
+
+
+# Global instance
+waitlist = WaitlistService()
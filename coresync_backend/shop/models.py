@@ -3,10 +3,10 @@ Shop models for CoreSync retail functionality.
 All products are pickup-only (no shipping).
 """
 from django.db import models
-from django.db import transaction
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from core.models import BaseModel
+from core.reference_allocator import reference_allocator
 
 
 class Product(BaseModel):
@@ -244,28 +244,11 @@ class PickupOrder(BaseModel):
         ]
     
     def save(self, *args, **kwargs):
-        """Generate unique order number - RACE CONDITION FIXED"""
+        """Generate unique order number from the shared counter"""
         if not self.order_number:
-            from django.utils import timezone
-            
-            year = timezone.now().year
-            
-            # Use atomic transaction with row-level lock
-            with transaction.atomic():
-                # Lock the last order to prevent race condition
-                last_order = PickupOrder.objects.select_for_update().filter(
-                    order_number__startswith=f'PO-{year}-'
-                ).order_by('-order_number').first()
-                
-                if last_order:
-                    # Extract number and increment
-                    last_num = int(last_order.order_number.split('-')[-1])
-                    next_num = last_num + 1
-                else:
-                    # First order of the year
-                    next_num = 1
-                
-                self.order_number = f'PO-{year}-{next_num:06d}'
+            self.order_number = reference_allocator.allocate(
+                'PO', model=PickupOrder, field='order_number'
+            )
         
         super().save(*args, **kwargs)
     
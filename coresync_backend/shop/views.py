@@ -1,4 +1,5 @@
 """Views for Shop app."""
+from decimal import Decimal
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -7,6 +8,7 @@ from django.db.models import Q, Prefetch
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 
+from memberships.context import get_request_membership
 from .models import Product, PickupOrder, OrderItem
 from .serializers import (
     ProductListSerializer,
@@ -134,8 +136,11 @@ class PickupOrderViewSet(viewsets.ModelViewSet):
                 pickup_date=data.get('pickup_date')
             )
             
+            # Membership resolved once, not per item
+            membership = get_request_membership(request)
+            
             # Add items
-            subtotal = 0
+            subtotal = Decimal('0.00')
             for item_data in items_data:
                 try:
                     product = Product.objects.get(
@@ -158,7 +163,7 @@ class PickupOrderViewSet(viewsets.ModelViewSet):
                     )
                 
                 # Determine price (member vs non-member)
-                if hasattr(request.user, 'membership') and request.user.membership.is_active:
+                if membership.is_active:
                     unit_price = product.member_price
                 else:
                     unit_price = product.price
@@ -179,7 +184,7 @@ class PickupOrderViewSet(viewsets.ModelViewSet):
                 product.save()
             
             # Calculate totals
-            tax = subtotal * 0.08  # 8% tax (adjust as needed)
+            tax = round(subtotal * Decimal('0.08'), 2)  # 8% tax (adjust as needed)
             order.subtotal = subtotal
             order.tax = tax
             order.total = subtotal + tax
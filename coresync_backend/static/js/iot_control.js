@@ -12,6 +12,10 @@ class IoTController {
         this.reconnectAttempts = 0;
         this.eventHandlers = {};
         
+        // Delta protocol: останній застосований seq та статуси пристроїв
+        this.seq = null;
+        this.statuses = {};
+        
         this.init();
     }
     
@@ -51,11 +55,21 @@ class IoTController {
             
             switch (data.type) {
                 case 'connection_established':
+                    this.applySnapshot(data);
                     this.trigger('devices_status', data.devices);
                     break;
                 
-                case 'device_update':
-                    this.trigger('device_update', data);
+                case 'device_delta':
+                    this.applyDelta(data);
+                    break;
+                
+                case 'device_liveness':
+                    Object.entries(data.devices).forEach(([deviceId, isOnline]) => {
+                        this.trigger('device_liveness', {
+                            device_id: Number(deviceId),
+                            is_online: isOnline
+                        });
+                    });
                     break;
                 
                 case 'scene_update':
@@ -71,6 +85,7 @@ class IoTController {
                     break;
                 
                 case 'status_update':
+                    this.applySnapshot(data);
                     this.trigger('status_update', data);
                     break;
                 
@@ -86,6 +101,41 @@ class IoTController {
         }
     }
     
+    applySnapshot(data) {
+        this.seq = data.seq;
+        this.statuses = {};
+        (data.devices || []).forEach(device => {
+            this.statuses[device.id] = device.current_status || {};
+        });
+    }
+    
+    applyDelta(data) {
+        if (this.seq === null || data.seq <= this.seq) {
+            return;  // Вже враховано в snapshot
+        }
+        if (data.seq !== this.seq + 1) {
+            // Пропущений frame - повний resync
+            console.warn(`[IoT] Missed updates (${this.seq} -> ${data.seq}), resyncing`);
+            this.seq = null;
+            this.send({ command: 'resync' });
+            return;
+        }
+        this.seq = data.seq;
+        
+        Object.entries(data.devices).forEach(([deviceId, delta]) => {
+            const status = Object.assign({}, this.statuses[deviceId], delta.set);
+            delta.unset.forEach(key => delete status[key]);
+            this.statuses[deviceId] = status;
+            
+            this.trigger('device_update', {
+                device_id: Number(deviceId),
+                status: status,
+                changed: delta.set,
+                updated_by: data.updated_by.join(', ')
+            });
+        });
+    }
+    
     handleError(error) {
         console.error('[IoT] WebSocket error:', error);
         this.trigger('error', { message: 'Connection error' });
@@ -0,0 +1,268 @@
+"""
+Technician Assignment Solver - оптимальне денне призначення technicians.
+
+Для дня будується bipartite cost matrix (unassigned bookings ×
+technicians) з free/busy index:
+
+    - INFEASIBLE, якщо немає спеціалізації, booking поза Schedule або
+      перетинається з busy interval technician
+    - load: вже зайнята частка робочого дня (рівномірне навантаження)
+    - gap: відстань до найближчого busy interval (менше фрагментації -
+      bookings притягуються до існуючих блоків)
+    - generalist: technician 'all' дорожчий за профільного
+
+Matrix розв'язується Hungarian алгоритмом (shortest augmenting path,
+O(n^3), inner loop векторизований NumPy). Один technician за раунд
+отримує максимум один booking, тому раунди повторюються з оновленим
+busy, поки щось призначається.
+
+Busy map будується з DB на кожен solve (не з cache): solver працює в
+Celery, а bookings створюються у web workers. Призначення записуються
+в одній транзакції умовним UPDATE на рядок (technician IS NULL) -
+booking, якому тим часом призначили technician вручну, не
+перезаписується і потрапляє в 'skipped'.
+"""
+import logging
+from bisect import bisect_left
+from datetime import timedelta
+from typing import Any, Dict, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import technician_availability, ACTIVE_BOOKING_STATUSES, _to_minutes
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+INFEASIBLE = 1e6
+
+# Cost weights
+LOAD_WEIGHT = 1.0
+GAP_WEIGHT = 0.5       # per hour of gap to the nearest busy block
+GENERALIST_PENALTY = 0.25
+
+
+def hungarian(cost) -> List[Tuple[int, int]]:
+    """
+    Min-cost assignment для прямокутної cost matrix.
+    Returns [(row, col), ...] - кожен row/col максимум один раз.
+    """
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        return []
+
+    # 1-indexed potentials; p[j] - row matched to column j (0 = none)
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    pairs = [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+    if transposed:
+        pairs = [(col, row) for row, col in pairs]
+    return sorted(pairs)
+
+
+class TechnicianAssignmentSolver:
+    """
+    Batch призначення technicians для unassigned bookings дня / тижня.
+    """
+
+    def solve_day(self, target_date, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Призначити technicians для bookings дня.
+
+        Returns: {'date', 'assigned': [(booking_id, technician_id)],
+                  'unassigned': [booking_id], 'skipped': [booking_id], 'rounds': int}
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError('numpy is required for technician assignment')
+
+        from services.booking_models import Booking
+        from services.management.commands.assign_technician import get_service_type
+
+        bookings = list(
+            Booking.objects.filter(
+                booking_date=target_date,
+                technician__isnull=True,
+                status__in=ACTIVE_BOOKING_STATUSES
+            ).select_related('service').order_by('start_time', 'id')
+        )
+        result = {'date': target_date, 'assigned': [], 'unassigned': [], 'skipped': [], 'rounds': 0}
+        if not bookings:
+            return result
+
+        # Свіжий free/busy з DB - cache міг не бачити bookings інших процесів
+        day = technician_availability.build_day(target_date)
+        technician_ids = list(day)
+
+        intervals = [(_to_minutes(b.start_time), _to_minutes(b.end_time)) for b in bookings]
+        specialties = [get_service_type(b.service.name) for b in bookings]
+
+        # Mutable busy per technician (sorted lists), working minutes
+        busy = {
+            tech_id: sorted(zip(day[tech_id]['busy_start'], day[tech_id]['busy_end']))
+            for tech_id in technician_ids
+        }
+        working_minutes = {
+            tech_id: sum(end - start for start, end in day[tech_id]['working']) or 1
+            for tech_id in technician_ids
+        }
+
+        # Static feasibility (specialty + schedule) - один раз
+        static = np.zeros((len(bookings), len(technician_ids)), dtype=bool)
+        for column, tech_id in enumerate(technician_ids):
+            entry = day[tech_id]
+            for row, (start, end) in enumerate(intervals):
+                static[row, column] = (
+                    technician_availability._matches(entry, specialties[row])
+                    and technician_availability._is_working(entry, start, end)
+                )
+
+        pending = list(range(len(bookings)))
+        assignments = {}
+        while pending and technician_ids:
+            cost = self._cost_matrix(
+                pending, intervals, technician_ids, day, busy, working_minutes, static
+            )
+            pairs = [
+                (pending[row], technician_ids[column])
+                for row, column in hungarian(cost)
+                if cost[row, column] < INFEASIBLE
+            ]
+            if not pairs:
+                break
+
+            result['rounds'] += 1
+            for row, tech_id in pairs:
+                assignments[row] = tech_id
+                start, end = intervals[row]
+                position = bisect_left(busy[tech_id], (start, end))
+                busy[tech_id].insert(position, (start, end))
+
+            assigned_rows = {row for row, _ in pairs}
+            pending = [row for row in pending if row not in assigned_rows]
+
+        result['assigned'] = [(bookings[row].id, tech_id) for row, tech_id in sorted(assignments.items())]
+        result['unassigned'] = [bookings[row].id for row in pending]
+
+        if not dry_run and assignments:
+            skipped = self._apply(bookings, assignments, target_date)
+            result['assigned'] = [pair for pair in result['assigned'] if pair[0] not in skipped]
+            result['skipped'] = sorted(skipped)
+        return result
+
+    def solve_range(self, start_date, days: int = 1, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """solve_day для кожного дня діапазону."""
+        return [
+            self.solve_day(start_date + timedelta(days=offset), dry_run=dry_run)
+            for offset in range(days)
+        ]
+
+    def _cost_matrix(self, pending, intervals, technician_ids, day, busy, working_minutes, static):
+        """Cost matrix pending bookings × technicians (INFEASIBLE для заборонених пар)."""
+        rows = np.array(pending)
+        starts = np.array([intervals[row][0] for row in pending], dtype=float)
+        ends = np.array([intervals[row][1] for row in pending], dtype=float)
+
+        cost = np.full((len(pending), len(technician_ids)), INFEASIBLE)
+        for column, tech_id in enumerate(technician_ids):
+            feasible = static[rows, column].copy()
+            tech_busy = busy[tech_id]
+            load = sum(end - start for start, end in tech_busy) / working_minutes[tech_id]
+
+            if tech_busy:
+                busy_start = np.array([start for start, _ in tech_busy], dtype=float)
+                busy_end = np.array([end for _, end in tech_busy], dtype=float)
+                # Overlap: busy_start < end AND busy_end > start
+                overlap = (busy_start[None, :] < ends[:, None]) & (busy_end[None, :] > starts[:, None])
+                feasible &= ~overlap.any(axis=1)
+                gap_before = np.where(busy_end[None, :] <= starts[:, None], starts[:, None] - busy_end[None, :], np.inf)
+                gap_after = np.where(busy_start[None, :] >= ends[:, None], busy_start[None, :] - ends[:, None], np.inf)
+                gap = np.minimum(gap_before.min(axis=1), gap_after.min(axis=1))
+                gap = np.where(np.isfinite(gap), gap / 60.0, 0.0)
+            else:
+                # Порожній день - без бонусу за прилягання
+                gap = np.full(len(pending), 1.0)
+
+            column_cost = LOAD_WEIGHT * load + GAP_WEIGHT * gap
+            if 'all' in day[tech_id]['specialties']:
+                column_cost = column_cost + GENERALIST_PENALTY
+            cost[:, column] = np.where(feasible, column_cost, INFEASIBLE)
+        return cost
+
+    def _apply(self, bookings, assignments, target_date) -> set:
+        """
+        Записати призначення умовним UPDATE на рядок (лише якщо booking
+        досі без technician). Returns ids пропущених bookings.
+        """
+        from services.booking_models import Booking
+
+        now = timezone.now()
+        skipped = set()
+        with transaction.atomic():
+            for row, tech_id in assignments.items():
+                booking = bookings[row]
+                updated = Booking.objects.filter(
+                    pk=booking.pk,
+                    technician__isnull=True,
+                    status__in=ACTIVE_BOOKING_STATUSES
+                ).update(technician_id=tech_id, updated_at=now)
+                if updated:
+                    booking.technician_id = tech_id
+                    booking.updated_at = now
+                else:
+                    skipped.add(booking.id)
+
+        # update() не викликає signals - оновлюємо free/busy index
+        technician_availability.invalidate_day(target_date)
+
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} bookings on {target_date} assigned meanwhile")
+        logger.info(f"Auto-assigned {len(assignments) - len(skipped)} bookings on {target_date}")
+        return skipped
+
+
+# Global instance
+assignment_solver = TechnicianAssignmentSolver()
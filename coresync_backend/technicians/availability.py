@@ -0,0 +1,230 @@
+"""
+Technician Availability Index - free/busy по technicians на день.
+
+Для дати будується один словник (два запити до БД):
+
+    {technician_id: {
+        'specialties': [...],
+        'working': [(start, end), ...],   # merged Schedule intervals
+        'busy_start': [...],              # active bookings, sorted by start
+        'busy_end': [...],
+        'busy_max_end': [...],            # prefix max of busy_end
+        'busy_ids': [...],
+    }}
+
+Час - хвилини від півночі. Індекс кешується per day та інвалідовується
+signals при зміні Booking / Schedule / Technician - одразу і ще раз
+після commit (паралельний read міг закешувати день до commit), тому питання
+"хто вільний з X до Y" вирішується в пам'яті через bisect.
+"""
+import logging
+from bisect import bisect_left
+from datetime import time as dt_time
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_BOOKING_STATUSES = ['confirmed', 'pending', 'in_progress']
+
+
+def _to_minutes(value: dt_time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _merge_intervals(intervals: List[tuple]) -> List[tuple]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class TechnicianAvailabilityIndex:
+    """
+    Cache-backed free/busy індекс technicians по днях.
+    """
+
+    cache_prefix = 'technician_availability'
+    cache_ttl = 60 * 60 * 6  # 6 hours
+
+    # ------------------------------------------------------------------
+    # Cache keys
+    # ------------------------------------------------------------------
+
+    @property
+    def _version_key(self) -> str:
+        return f'{self.cache_prefix}:version'
+
+    def _get_version(self) -> int:
+        version = cache.get(self._version_key)
+        if version is None:
+            version = 1
+            cache.add(self._version_key, version, None)
+        return version
+
+    def _day_key(self, target_date, version: int) -> str:
+        return f'{self.cache_prefix}:v{version}:day:{target_date.isoformat()}'
+
+    # ------------------------------------------------------------------
+    # Build / read
+    # ------------------------------------------------------------------
+
+    def build_day(self, target_date) -> Dict[int, Dict[str, Any]]:
+        """
+        Побудувати індекс дня: active technicians з Schedule цього дня
+        (recurring по weekday + one-off по даті) одним запитом і
+        active bookings другим.
+        """
+        from technicians.models import Technician
+        from services.booking_models import Booking
+
+        day = {}
+
+        schedule_rows = Technician.objects.filter(is_active=True).annotate(
+            day_schedule=FilteredRelation(
+                'schedules',
+                condition=Q(schedules__is_active=True) & (
+                    Q(schedules__is_recurring=True, schedules__weekday=target_date.weekday()) |
+                    Q(schedules__is_recurring=False, schedules__specific_date=target_date)
+                )
+            )
+        ).order_by('user__first_name', 'user__last_name', 'id').values_list(
+            'id', 'specialties', 'day_schedule__start_time', 'day_schedule__end_time'
+        )
+
+        working = {}
+        for technician_id, specialties, start_time, end_time in schedule_rows:
+            if technician_id not in day:
+                day[technician_id] = {'specialties': list(specialties or [])}
+                working[technician_id] = []
+            if start_time is not None and end_time is not None:
+                working[technician_id].append((_to_minutes(start_time), _to_minutes(end_time)))
+
+        busy = {technician_id: [] for technician_id in day}
+        for booking_id, technician_id, start_time, end_time in Booking.objects.filter(
+            booking_date=target_date,
+            technician__isnull=False,
+            status__in=ACTIVE_BOOKING_STATUSES
+        ).values_list('id', 'technician_id', 'start_time', 'end_time'):
+            if technician_id in busy:
+                busy[technician_id].append(
+                    (_to_minutes(start_time), _to_minutes(end_time), booking_id)
+                )
+
+        for technician_id, entry in day.items():
+            entry['working'] = _merge_intervals(working[technician_id])
+
+            intervals = sorted(busy[technician_id])
+            entry['busy_start'] = [start for start, _, _ in intervals]
+            entry['busy_end'] = [end for _, end, _ in intervals]
+            entry['busy_ids'] = [booking_id for _, _, booking_id in intervals]
+
+            max_end = []
+            running = -1
+            for end in entry['busy_end']:
+                running = max(running, end)
+                max_end.append(running)
+            entry['busy_max_end'] = max_end
+
+        cache.set(self._day_key(target_date, self._get_version()), day, self.cache_ttl)
+        return day
+
+    def get_day(self, target_date) -> Dict[int, Dict[str, Any]]:
+        """Отримати індекс дня з cache (або побудувати)."""
+        day = cache.get(self._day_key(target_date, self._get_version()))
+        if day is None:
+            day = self.build_day(target_date)
+        return day
+
+    # ------------------------------------------------------------------
+    # Queries (in memory)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _matches(entry, specialty: Optional[str]) -> bool:
+        if not specialty:
+            return True
+        specialties = entry['specialties']
+        return specialty in specialties or 'all' in specialties
+
+    @staticmethod
+    def _is_working(entry, start: int, end: Optional[int]) -> bool:
+        for window_start, window_end in entry['working']:
+            if end is None:
+                if window_start <= start < window_end:
+                    return True
+            elif window_start <= start and end <= window_end:
+                return True
+        return False
+
+    @staticmethod
+    def _is_busy(entry, start: int, end: int) -> bool:
+        # Overlap: existing_start < end AND existing_end > start
+        position = bisect_left(entry['busy_start'], end)
+        return position > 0 and entry['busy_max_end'][position - 1] > start
+
+    def free_technicians(
+        self,
+        target_date,
+        start_time: dt_time,
+        end_time: dt_time,
+        specialty: Optional[str] = None,
+        require_schedule: bool = True
+    ) -> List[int]:
+        """
+        IDs technicians, вільних з start_time до end_time (у порядку імен).
+
+        require_schedule=False - ігнорувати Schedule і перевіряти лише
+        конфлікти з bookings.
+        """
+        start, end = _to_minutes(start_time), _to_minutes(end_time)
+        free = []
+        for technician_id, entry in self.get_day(target_date).items():
+            if not self._matches(entry, specialty):
+                continue
+            if require_schedule and not self._is_working(entry, start, end):
+                continue
+            if self._is_busy(entry, start, end):
+                continue
+            free.append(technician_id)
+        return free
+
+    def is_scheduled(self, technician_id: int, target_date, at_time: dt_time) -> bool:
+        """Чи technician працює в цей момент згідно Schedule."""
+        entry = self.get_day(target_date).get(technician_id)
+        return bool(entry) and self._is_working(entry, _to_minutes(at_time), None)
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate_day(self, target_date):
+        """Видалити індекс дня (booking changes)."""
+        self._delete_day(target_date)
+        transaction.on_commit(lambda: self._delete_day(target_date))
+
+    def _delete_day(self, target_date):
+        cache.delete(self._day_key(target_date, self._get_version()))
+
+    def invalidate_all(self):
+        """Інвалідувати всі дні (Schedule / Technician changes)."""
+        self._bump_version()
+        transaction.on_commit(self._bump_version)
+
+    def _bump_version(self):
+        """Атомарний cache.incr; ключ витіснено - створити (або incr, якщо інший процес встиг)."""
+        try:
+            cache.incr(self._version_key)
+        except ValueError:
+            if not cache.add(self._version_key, 2, None):
+                cache.incr(self._version_key)
+
+
+# Global instance
+technician_availability = TechnicianAvailabilityIndex()
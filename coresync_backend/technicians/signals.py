@@ -1,11 +1,12 @@
 """
 Technicians Django Signals - Auto-sync triggers.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 import logging
 
-from .models import WorkLog, Schedule
+from .models import Technician, WorkLog, Schedule
+from .availability import technician_availability
 
 logger = logging.getLogger(__name__)
 
@@ -46,3 +47,28 @@ def schedule_saved(sender, instance, created, **kwargs):
     except Exception as e:
         logger.error(f"Error queueing availability update: {str(e)}")
 
+
+
+@receiver(post_init, sender='services.Booking')
+def booking_loaded(sender, instance, **kwargs):
+    """Запам'ятати дату, щоб перенесення booking інвалідовувало і старий день."""
+    instance._loaded_booking_date = instance.booking_date
+
+
+@receiver(post_save, sender='services.Booking')
+@receiver(post_delete, sender='services.Booking')
+def booking_changed(sender, instance, **kwargs):
+    """Refresh technician free/busy for the booking day (old and new on reschedule)."""
+    dates = {instance.booking_date, getattr(instance, '_loaded_booking_date', None)}
+    for booking_date in dates - {None}:
+        technician_availability.invalidate_day(booking_date)
+    instance._loaded_booking_date = instance.booking_date
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(post_save, sender=Technician)
+@receiver(post_delete, sender=Technician)
+def schedule_changed(sender, instance, **kwargs):
+    """Recurring schedules affect every day - drop the whole index."""
+    technician_availability.invalidate_all()
@@ -100,3 +100,33 @@ def update_technician_availability(technician_id: int):
         logger.error(f"Update availability error: {str(e)}")
         raise
 
+
+
+@shared_task(name='technicians.tasks.auto_assign_technicians')
+def auto_assign_technicians(days: int = 1, start_date: str = None):
+    """
+    Optimal batch призначення technicians для unassigned bookings.
+    Celery beat: щовечора о 8 PM EST на наступний день.
+    """
+    try:
+        from .assignment import assignment_solver
+        
+        if start_date:
+            first_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        else:
+            first_day = timezone.localdate() + timedelta(days=1)
+        
+        results = assignment_solver.solve_range(first_day, days=days)
+        
+        summary = {
+            'status': 'success',
+            'assigned': sum(len(result['assigned']) for result in results),
+            'unassigned': sum(len(result['unassigned']) for result in results),
+            'skipped': sum(len(result['skipped']) for result in results),
+        }
+        logger.info(f"Auto-assigned technicians from {first_day}: {summary}")
+        return summary
+    
+    except Exception as e:
+        logger.error(f"Auto assign technicians error: {str(e)}")
+        raise
@@ -0,0 +1,91 @@
+"""
+Tests for real-time availability push over WebSockets.
+"""
+import json
+
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from services.consumers import AvailabilityConsumer
+from tests.test_booking_api import BookingTestMixin
+
+IN_MEMORY_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class WebsocketClient(ApplicationCommunicator):
+    """
+    Minimal websocket test client (channels.testing needs daphne).
+    """
+
+    async def connect(self):
+        await self.send_input({'type': 'websocket.connect'})
+        response = await self.receive_output(1)
+        return response['type'] == 'websocket.accept'
+
+    async def receive_json(self):
+        response = await self.receive_output(1)
+        return json.loads(response['text'])
+
+    async def disconnect(self):
+        await self.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await self.wait(1)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYERS)
+class AvailabilityConsumerTestCase(BookingTestMixin, TestCase):
+    """Snapshot on connect, deltas after create / cancel booking."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.create_fixtures()
+        self.slot = self.create_slot(max_bookings=2)
+
+    def communicator(self, user=None):
+        return WebsocketClient(AvailabilityConsumer.as_asgi(), {
+            'type': 'websocket',
+            'path': f'/ws/availability/{self.room.id}/{self.target_date.isoformat()}/',
+            'user': user or self.user,
+            'url_route': {'kwargs': {
+                'room_id': str(self.room.id),
+                'date': self.target_date.isoformat(),
+            }},
+        })
+
+    def book(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/bookings/create_booking/', {
+                'service_id': self.service.id,
+                'room_id': self.room.id,
+                'date': self.target_date.isoformat(),
+                'start_time': '10:00',
+            }, format='json').json()
+
+    def cancel(self, booking_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/bookings/{booking_id}/cancel_booking/')
+
+    async def test_anonymous_rejected(self):
+        self.assertFalse(await self.communicator(AnonymousUser()).connect())
+
+    async def test_snapshot_then_deltas(self):
+        communicator = self.communicator()
+        self.assertTrue(await communicator.connect())
+
+        snapshot = await communicator.receive_json()
+        self.assertEqual(snapshot['type'], 'snapshot')
+        self.assertEqual(snapshot['slots']['slot_id'], [self.slot.id])
+        self.assertEqual(snapshot['slots']['available_spots'], [2])
+
+        booking = await database_sync_to_async(self.book)()
+        delta = await communicator.receive_json()
+        self.assertEqual(delta['type'], 'delta')
+        self.assertEqual(delta['slots'], [[self.slot.id, 1, 2]])
+
+        await database_sync_to_async(self.cancel)(booking['id'])
+        delta = await communicator.receive_json()
+        self.assertEqual(delta['slots'], [[self.slot.id, 2, 2]])
+
+        await communicator.disconnect()
@@ -0,0 +1,461 @@
+"""
+Tests for the booking calendar API (availability, booking lifecycle).
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from datetime import timedelta, time as dt_time
+from decimal import Decimal
+from unittest import mock
+
+from core.reference_allocator import reference_allocator
+from payments.models import Payment, QuickBooksSync
+from services.availability_index import availability_index
+from services.booking_pipeline import booking_pipeline
+from services.pricing_matrix import pricing_matrix
+from services.models import Service, ServiceAddon, ServiceCategory
+from services.booking_models import Booking, Room, AvailabilitySlot
+from memberships.models import MembershipPlan, Membership
+
+User = get_user_model()
+
+
+class BookingTestMixin:
+    """Shared fixtures for booking API tests."""
+
+    def create_fixtures(self):
+        cache.clear()
+        reference_allocator.reset()
+        self.user = User.objects.create_user(
+            username='booker',
+            email='booker@test.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Booker'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.category = ServiceCategory.objects.create(name='Mensuite', slug='mensuite')
+        self.service = Service.objects.create(
+            name='Deep Tissue Massage',
+            slug='deep-tissue-massage',
+            description='Test',
+            category=self.category,
+            member_price=Decimal('80.00'),
+            non_member_price=Decimal('100.00'),
+            duration=60,
+        )
+        self.room = Room.objects.create(
+            name='Suite A',
+            room_type='mensuite',
+            premium_modifier=Decimal('1.20'),
+        )
+        self.target_date = timezone.now().date() + timedelta(days=2)
+
+    def create_slot(self, start=dt_time(10, 0), end=dt_time(11, 0), room=None,
+                    slot_date=None, **kwargs):
+        kwargs.setdefault('member_only_until', timezone.now() - timedelta(days=1))
+        return AvailabilitySlot.objects.create(
+            date=slot_date or self.target_date,
+            start_time=start,
+            end_time=end,
+            room=room or self.room,
+            **kwargs
+        )
+
+    def make_member(self, plan_name='Premium', priority_booking=True, discount=20):
+        plan = MembershipPlan.objects.create(
+            name=plan_name,
+            slug=plan_name.lower(),
+            description='Test plan',
+            price=Decimal('300.00'),
+            duration_months=1,
+            discount_percentage=discount,
+            priority_booking=priority_booking,
+        )
+        today = timezone.now().date()
+        return Membership.objects.create(
+            user=self.user,
+            plan=plan,
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=30),
+        )
+
+
+class AvailabilityIndexTestCase(BookingTestMixin, APITestCase):
+    """Availability endpoint served from the per-day index."""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def get_availability(self, **params):
+        params.setdefault('date', self.target_date.isoformat())
+        return self.client.get('/api/bookings/availability/', params)
+
+    def test_lists_open_slots_with_pricing(self):
+        slot = self.create_slot(base_price_modifier=Decimal('1.50'))
+        response = self.get_availability(service_id=self.service.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = response.json()['available_slots']
+        self.assertEqual(len(slots), 1)
+        self.assertEqual(slots[0]['id'], slot.id)
+        self.assertEqual(slots[0]['start_time'], '10:00')
+        # non-member price * room premium * slot modifier
+        self.assertEqual(Decimal(str(slots[0]['price'])), Decimal('180.00'))
+
+    def test_priority_window_hides_slot_from_non_members(self):
+        self.create_slot(member_only_until=timezone.now() + timedelta(days=1))
+        response = self.get_availability()
+        self.assertEqual(response.json()['total_slots'], 0)
+
+        self.make_member()
+        response = self.get_availability()
+        self.assertEqual(response.json()['total_slots'], 1)
+
+    def test_index_updates_when_slot_fills(self):
+        slot = self.create_slot()
+        self.assertEqual(self.get_availability().json()['total_slots'], 1)
+
+        slot.current_bookings = 1
+        slot.save()
+        self.assertEqual(self.get_availability().json()['total_slots'], 0)
+
+    def test_updates_to_different_slots_of_a_day_are_not_lost(self):
+        first = self.create_slot()
+        second = self.create_slot(start=dt_time(11, 0), end=dt_time(12, 0))
+        self.get_availability()
+
+        # Два workers оновлюють різні слоти дня - жоден update не губиться
+        AvailabilitySlot.objects.filter(pk=first.pk).update(current_bookings=1)
+        AvailabilitySlot.objects.filter(pk=second.pk).update(current_bookings=1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        availability_index.update_slot(first)
+        availability_index.update_slot(second)
+
+        self.assertEqual(self.get_availability().json()['total_slots'], 0)
+
+    def test_update_during_build_is_not_overwritten(self):
+        slot = self.create_slot()
+        columns = availability_index._columns
+
+        def book_meanwhile(rows):
+            # Booking lands after the build read the DB, before it stored the day
+            AvailabilitySlot.objects.filter(pk=slot.pk).update(current_bookings=1)
+            slot.refresh_from_db()
+            availability_index.update_slot(slot)
+            return columns(rows)
+
+        with mock.patch.object(availability_index, '_columns', side_effect=book_meanwhile):
+            availability_index.build_day(self.target_date)
+
+        self.assertEqual(self.get_availability().json()['total_slots'], 0)
+
+    def test_failed_redis_write_reports_fallback(self):
+        client = mock.Mock()
+        client.pipeline.return_value.execute.side_effect = ConnectionError('down')
+        self.assertFalse(availability_index._store_redis(client, {self.target_date: []}, {self.target_date: 0}))
+
+    def test_cached_day_served_without_slot_queries(self):
+        self.create_slot()
+        self.get_availability()
+
+        # Served entirely from the cached index
+        with self.assertNumQueries(0):
+            response = self.get_availability()
+        self.assertEqual(response.json()['total_slots'], 1)
+
+    def test_range_returns_columnar_days_in_one_query(self):
+        self.make_member(plan_name='Unlimited')
+        for offset in range(3):
+            self.create_slot(slot_date=self.target_date + timedelta(days=offset))
+        start = self.target_date
+        end = self.target_date + timedelta(days=29)
+
+        # membership context + rooms metadata + one grouped slot query for all 30 days
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/bookings/availability_range/', {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data['days']), 30)
+        self.assertEqual(data['total_slots'], 3)
+        first_day = data['days'][start.isoformat()]
+        self.assertEqual(first_day['start_time'], ['10:00'])
+        self.assertEqual(first_day['room_id'], [self.room.id])
+
+    def test_range_respects_advance_booking_window(self):
+        response = self.client.get('/api/bookings/availability_range/', {
+            'start': self.target_date.isoformat(),
+            'end': (self.target_date + timedelta(days=10)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PricingMatrixTestCase(BookingTestMixin, APITestCase):
+    """Slot prices read from the precomputed pricing matrix."""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_slot_price_read_without_queries(self):
+        slot = self.create_slot(base_price_modifier=Decimal('1.50'))
+        pricing_matrix.build()
+
+        with self.assertNumQueries(0):
+            non_member = slot.get_price_for_service(self.service)
+            member = pricing_matrix.slot_price(self.service.id, 'member', self.room.id, Decimal('1.5'))
+        self.assertEqual(non_member, Decimal('180.00'))
+        self.assertEqual(member, Decimal('144.00'))
+
+    def test_service_and_room_changes_rebuild_matrix(self):
+        slot = self.create_slot()
+        self.assertEqual(slot.get_price_for_service(self.service), Decimal('120.00'))
+
+        self.service.non_member_price = Decimal('110.00')
+        self.service.save()
+        self.assertEqual(slot.get_price_for_service(self.service), Decimal('132.00'))
+
+        self.room.premium_modifier = Decimal('1.00')
+        self.room.save()
+        self.assertEqual(slot.get_price_for_service(self.service), Decimal('110.00'))
+
+    def test_miss_builds_only_requested_service(self):
+        self.assertIsNotNone(pricing_matrix.service_prices(self.service.id, 'member'))
+
+        # Unknown service: one build attempt (rooms / modifiers already cached),
+        # then the negative entry is served from cache
+        with self.assertNumQueries(1):
+            self.assertIsNone(pricing_matrix.service_prices(999999, 'member'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(pricing_matrix.service_prices(999999, 'member'))
+            self.assertIsNotNone(pricing_matrix.service_prices(self.service.id, 'non_member'))
+
+    def test_prices_cached_before_commit_are_dropped_after_commit(self):
+        slot = self.create_slot()
+        pricing_matrix.build()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.non_member_price = Decimal('110.00')
+            self.service.save()
+            # Concurrent request still sees the old price and rebuilds under the new version
+            Service.objects.filter(pk=self.service.pk).update(non_member_price=Decimal('100.00'))
+            pricing_matrix.build()
+            Service.objects.filter(pk=self.service.pk).update(non_member_price=Decimal('110.00'))
+
+        self.assertEqual(slot.get_price_for_service(self.service), Decimal('132.00'))
+
+    def test_unknown_modifier_falls_back_to_direct_price(self):
+        slot = self.create_slot()
+        pricing_matrix.build()
+        AvailabilitySlot.objects.filter(pk=slot.pk).update(base_price_modifier=Decimal('1.75'))
+        slot.refresh_from_db()
+
+        self.assertEqual(slot.get_price_for_service(self.service), Decimal('210.00'))
+
+
+class SlotReservationTestCase(BookingTestMixin, APITestCase):
+    """Atomic slot reservation in create_booking / cancel_booking."""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def book(self, slot):
+        return self.client.post('/api/bookings/create_booking/', {
+            'service_id': self.service.id,
+            'room_id': slot.room_id,
+            'date': slot.date.isoformat(),
+            'start_time': slot.start_time.strftime('%H:%M'),
+        }, format='json')
+
+    def test_booking_reserves_one_place(self):
+        slot = self.create_slot(max_bookings=2)
+        response = self.book(slot)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['pricing']['final_total'], '120.00')
+        slot.refresh_from_db()
+        self.assertEqual(slot.current_bookings, 1)
+
+    def test_full_slot_returns_conflict(self):
+        slot = self.create_slot(max_bookings=1)
+        self.assertEqual(self.book(slot).status_code, status.HTTP_200_OK)
+
+        response = self.book(slot)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(response.json()['retry'])
+        slot.refresh_from_db()
+        self.assertEqual(slot.current_bookings, 1)
+
+    def test_cancel_releases_place_and_updates_index(self):
+        slot = self.create_slot(
+            max_bookings=1,
+            slot_date=timezone.now().date() + timedelta(days=3)
+        )
+        booking_id = self.book(slot).json()['id']
+
+        availability = self.client.get(
+            '/api/bookings/availability/', {'date': slot.date.isoformat()}
+        )
+        self.assertEqual(availability.json()['total_slots'], 0)
+
+        response = self.client.post(f'/api/bookings/{booking_id}/cancel_booking/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        slot.refresh_from_db()
+        self.assertEqual(slot.current_bookings, 0)
+        availability = self.client.get(
+            '/api/bookings/availability/', {'date': slot.date.isoformat()}
+        )
+        self.assertEqual(availability.json()['total_slots'], 1)
+
+
+class BookingPipelineTestCase(BookingTestMixin, APITestCase):
+    """Single-transaction booking creation with bulk add-ons."""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.oil = ServiceAddon.objects.create(name='Hot Oil', price=Decimal('15.00'))
+        self.stones = ServiceAddon.objects.create(name='Hot Stones', price=Decimal('25.00'))
+
+    def create(self, slot, addons):
+        booking_data = {
+            'service': self.service,
+            'room': self.room,
+            'booking_date': slot.date,
+            'start_time': slot.start_time,
+            'duration': self.service.duration,
+            'base_price': Decimal('100.00'),
+        }
+        return booking_pipeline.create(slot, self.user, booking_data, addons_data=addons)
+
+    def test_query_count_is_fixed_per_booking(self):
+        slot = self.create_slot(max_bookings=5)
+        addons = [
+            {'id': self.oil.id, 'quantity': 2},
+            {'id': self.stones.id},
+            {'id': 999999},  # unknown - skipped
+        ]
+        # Warm the membership context and the reference block
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create(slot, addons)
+
+        # addons in_bulk, savepoint + reserve, booking insert, add-ons
+        # bulk insert, payment insert, sync insert, savepoint release,
+        # slot refresh (on commit)
+        with self.assertNumQueries(9), self.captureOnCommitCallbacks(execute=True):
+            booking = self.create(slot, addons)
+
+        self.assertEqual(booking.addons_total, Decimal('55.00'))
+        self.assertEqual(booking.final_total, Decimal('155.00'))
+        self.assertEqual(
+            sorted(booking.booking_addons.values_list('total_price', flat=True)),
+            [Decimal('25.00'), Decimal('30.00')]
+        )
+
+        payment = Payment.objects.get(metadata__booking_id=booking.id)
+        self.assertEqual(payment.amount, booking.final_total)
+        self.assertEqual(booking.stripe_payment_intent_id, f'pending_{payment.payment_id}')
+        self.assertTrue(
+            QuickBooksSync.objects.filter(sync_type='invoice', object_id=str(booking.id)).exists()
+        )
+
+    def test_full_slot_writes_nothing(self):
+        slot = self.create_slot(max_bookings=0)
+
+        self.assertIsNone(self.create(slot, [{'id': self.oil.id}]))
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+
+
+class MyBookingsTestCase(BookingTestMixin, APITestCase):
+    """Keyset-paginated booking history."""
+
+    def setUp(self):
+        self.create_fixtures()
+        today = timezone.now().date()
+        bookings = []
+        # 45 past visits, several per day to exercise the (date, time, id) keyset
+        for i in range(45):
+            bookings.append(self.make_booking(
+                today - timedelta(days=1 + i // 3), dt_time(9 + i % 3, 0), 'completed', i
+            ))
+        for i in range(3):
+            bookings.append(self.make_booking(
+                today + timedelta(days=5 + i), dt_time(10, 0), 'confirmed', 100 + i
+            ))
+        Booking.objects.bulk_create(bookings)
+
+    def make_booking(self, booking_date, start, status_value, number):
+        return Booking(
+            booking_reference=f'CS-TEST-{number:04d}',
+            user=self.user,
+            service=self.service,
+            room=self.room,
+            booking_date=booking_date,
+            start_time=start,
+            end_time=dt_time(start.hour + 1, 0),
+            duration=60,
+            base_price=Decimal('100.00'),
+            final_total=Decimal('100.00'),
+            status=status_value,
+            booking_tier='non_member',
+        )
+
+    def test_first_page_and_totals_in_three_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/bookings/my_bookings/')
+
+        data = response.json()
+        self.assertEqual(data['total_upcoming'], 3)
+        self.assertEqual(data['total_past'], 45)
+        self.assertEqual(len(data['past']), 20)
+        self.assertEqual(data['past'][0]['service_category'], 'Mensuite')
+        self.assertIsNone(data['next_cursor']['upcoming'])
+        self.assertTrue(data['upcoming'][0]['can_cancel'])
+
+    def test_cursor_walks_full_history_without_gaps(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'section': 'past', 'limit': 10}
+            if cursor:
+                params['cursor'] = cursor
+            with self.assertNumQueries(1):
+                data = self.client.get('/api/bookings/my_bookings/', params).json()
+            seen.extend(booking['id'] for booking in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+
+        expected = list(
+            Booking.objects.filter(status='completed')
+            .order_by('-booking_date', '-start_time', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_past_limited_to_six_months(self):
+        Booking.objects.bulk_create([self.make_booking(
+            timezone.now().date() - timedelta(days=200), dt_time(9, 0), 'completed', 200
+        )])
+
+        data = self.client.get('/api/bookings/my_bookings/').json()
+        self.assertEqual(data['total_past'], 45)
+        section = self.client.get(
+            '/api/bookings/my_bookings/', {'section': 'past', 'limit': 50}
+        ).json()
+        self.assertEqual(len(section['results']), 45)
+        self.assertNotIn('CS-TEST-0200', [b['booking_reference'] for b in section['results']])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            '/api/bookings/my_bookings/', {'section': 'past', 'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
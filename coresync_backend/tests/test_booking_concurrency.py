@@ -0,0 +1,67 @@
+"""
+Concurrency test for atomic slot reservation.
+
+Fires parallel create_booking requests at a single slot and checks that
+capacity is never oversold. Each worker thread uses its own DB connection.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from services.booking_models import Booking
+from .test_booking_api import BookingTestMixin
+
+User = get_user_model()
+
+
+@skipIf(
+    connection.vendor == 'sqlite',
+    'SQLite serialises writers with table locks; run against PostgreSQL'
+)
+class SlotReservationConcurrencyTestCase(BookingTestMixin, TransactionTestCase):
+    """Parallel bookings against one slot must never oversell it."""
+
+    REQUESTS = 300
+    WORKERS = 16
+    CAPACITY = 25
+
+    def setUp(self):
+        self.client = APIClient()
+        self.create_fixtures()
+        self.slot = self.create_slot(max_bookings=self.CAPACITY)
+        self.users = User.objects.bulk_create([
+            User(username=f'rush{i}', email=f'rush{i}@test.com')
+            for i in range(self.REQUESTS)
+        ])
+
+    def _book(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            response = client.post('/api/bookings/create_booking/', {
+                'service_id': self.service.id,
+                'room_id': self.room.id,
+                'date': self.target_date.isoformat(),
+                'start_time': '10:00',
+            }, format='json')
+            return response.status_code
+        finally:
+            connections.close_all()
+
+    def test_parallel_bookings_do_not_oversell(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            codes = list(pool.map(self._book, self.users))
+
+        booked = codes.count(status.HTTP_200_OK)
+        rejected = codes.count(status.HTTP_409_CONFLICT)
+
+        self.slot.refresh_from_db()
+        self.assertEqual(booked + rejected, self.REQUESTS, codes)
+        self.assertLessEqual(booked, self.CAPACITY)
+        self.assertEqual(self.slot.current_bookings, booked)
+        self.assertEqual(Booking.objects.filter(room=self.room).count(), booked)
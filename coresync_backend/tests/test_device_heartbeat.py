@@ -0,0 +1,94 @@
+"""
+Tests for heartbeat-based device liveness (DB fallback, no Redis).
+"""
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.redis_client import redis_client
+from iot_control.heartbeat import device_heartbeats
+from iot_control.models import IoTDevice
+from iot_control.serializers import IoTDeviceSerializer
+from iot_control.services import DeviceController
+from tests.test_availability_push import IN_MEMORY_LAYERS
+
+User = get_user_model()
+
+
+@override_settings(REDIS_URL='redis://localhost:1/0', CHANNEL_LAYERS=IN_MEMORY_LAYERS, IOT_HEARTBEAT_TTL=90)
+class DeviceHeartbeatTestCase(TestCase):
+
+    def setUp(self):
+        redis_client.reset()
+        self.addCleanup(redis_client.reset)
+
+        self.gateway = User.objects.create_user(
+            username='gateway', email='gateway@test.com', password='testpass123', is_staff=True
+        )
+        self.lamp = IoTDevice.objects.create(
+            name='Lamp', device_type='lighting', location='coresync_suite', device_id='lamp-1'
+        )
+        self.fan = IoTDevice.objects.create(
+            name='Fan', device_type='climate', location='coresync_suite', device_id='fan-1', is_online=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.gateway)
+
+    def test_heartbeat_brings_device_online(self):
+        response = self.client.post(
+            '/api/iot/devices/heartbeat/', {'device_ids': ['lamp-1', 'fan-1', 'ghost']}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'accepted': 2, 'unknown': ['ghost'], 'came_online': 1})
+
+        self.lamp.refresh_from_db()
+        self.assertTrue(self.lamp.is_online)
+
+    def test_heartbeat_requires_staff(self):
+        member = User.objects.create_user(
+            username='member', email='member@test.com', password='testpass123', membership_status='premium'
+        )
+        self.client.force_authenticate(member)
+        response = self.client.post('/api/iot/devices/heartbeat/', {'device_ids': ['lamp-1']}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_sweep_flips_expired_devices_and_broadcasts(self):
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('iot_location_coresync_suite', channel)
+
+        self.assertEqual(device_heartbeats.sweep(), 0)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(device_heartbeats.sweep(now=time.time() + 120), 1)
+
+        self.fan.refresh_from_db()
+        self.assertFalse(self.fan.is_online)
+
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message['type'], 'device.liveness')
+        self.assertEqual(message['devices'], {str(self.fan.pk): False})
+
+    def test_connection_status_reads_heartbeat_store(self):
+        client = mock.Mock()
+        client.mget.return_value = [b'1700000000', None]
+
+        with mock.patch('iot_control.heartbeat.get_redis', return_value=client):
+            data = IoTDeviceSerializer([self.lamp, self.fan], many=True).data
+
+        # Один MGET на весь список; DB is_online не використовується
+        client.mget.assert_called_once()
+        self.assertEqual([item['connection_status'] for item in data], ['online', 'offline'])
+
+    def test_successful_command_counts_as_heartbeat(self):
+        with mock.patch('iot_control.services.device_controller.device_state_store.write', return_value=True), \
+                mock.patch.object(device_heartbeats, 'touch') as touch:
+            result = DeviceController.control_device(self.lamp.pk, 'turn_on', user=self.gateway)
+
+        self.assertTrue(result['success'])
+        touch.assert_called_once_with([self.lamp.pk])
@@ -0,0 +1,98 @@
+"""
+Tests for delta-only, coalesced IoT WebSocket updates.
+"""
+import json
+
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.redis_client import redis_client
+from iot_control.consumers import IoTControlConsumer
+from iot_control.live_updates import device_update_publisher, merge_delta, status_delta
+from iot_control.models import IoTDevice
+from tests.test_availability_push import IN_MEMORY_LAYERS, WebsocketClient
+
+User = get_user_model()
+
+GROUP = 'iot_location_coresync_suite'
+
+
+class StatusDeltaTestCase(SimpleTestCase):
+
+    def test_only_changed_keys(self):
+        delta = status_delta({'power': 'on', 'brightness': 30, 'color': 'warm'}, {'power': 'on', 'brightness': 40})
+        self.assertEqual(delta, {'set': {'brightness': 40}, 'unset': ['color']})
+        self.assertIsNone(status_delta({'power': 'on'}, {'power': 'on'}))
+
+    def test_later_changes_win(self):
+        pending = {'set': {'brightness': 40}, 'unset': ['color']}
+        merge_delta(pending, {'set': {'brightness': 45, 'color': 'cool'}, 'unset': []})
+        self.assertEqual(pending, {'set': {'brightness': 45, 'color': 'cool'}, 'unset': []})
+
+
+@override_settings(
+    CHANNEL_LAYERS=IN_MEMORY_LAYERS,
+    REDIS_URL='redis://localhost:1/0',
+    IOT_UPDATE_COALESCE_WINDOW=0.05,
+)
+class IoTControlConsumerDeltaTestCase(TestCase):
+    """Snapshot with seq on connect, one coalesced delta frame per burst."""
+
+    def setUp(self):
+        cache.clear()
+        redis_client.reset()
+        self.addCleanup(redis_client.reset)
+        self.user = User.objects.create_user(
+            username='guest', email='guest@test.com', password='testpass123'
+        )
+        self.light = IoTDevice.objects.create(
+            name='Dimmer',
+            device_type='lighting',
+            location='coresync_suite',
+            device_id='dimmer-1',
+            current_status={'power': 'on', 'brightness': 10},
+        )
+
+    def communicator(self):
+        return WebsocketClient(IoTControlConsumer.as_asgi(), {
+            'type': 'websocket',
+            'path': '/ws/iot/control/coresync_suite/',
+            'user': self.user,
+            'url_route': {'kwargs': {'location': 'coresync_suite'}},
+        })
+
+    async def test_slider_burst_is_one_delta_frame(self):
+        communicator = self.communicator()
+        self.assertTrue(await communicator.connect())
+        snapshot = await communicator.receive_json()
+        self.assertEqual(snapshot['type'], 'connection_established')
+        self.assertEqual(snapshot['seq'], 0)
+        self.assertEqual(snapshot['devices'][0]['current_status']['brightness'], 10)
+
+        channel_layer = get_channel_layer()
+        previous = {'power': 'on', 'brightness': 10}
+        for brightness in range(11, 31):
+            status = {'power': 'on', 'brightness': brightness}
+            await device_update_publisher.publish(
+                channel_layer, GROUP, self.light.pk, previous, status, user='guest'
+            )
+            previous = status
+
+        frame = await communicator.receive_json()
+        self.assertEqual(frame, {
+            'type': 'device_delta',
+            'seq': 1,
+            'devices': {str(self.light.pk): {'set': {'brightness': 30}, 'unset': []}},
+            'updated_by': ['guest'],
+        })
+        self.assertTrue(await communicator.receive_nothing(0.1))
+
+        # Client detected a gap -> full snapshot with the current seq
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'command': 'resync'})})
+        resync = await communicator.receive_json()
+        self.assertEqual(resync['type'], 'status_update')
+        self.assertEqual(resync['seq'], 1)
+
+        await communicator.disconnect()
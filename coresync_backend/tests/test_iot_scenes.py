@@ -0,0 +1,175 @@
+"""
+Tests for IoT scene activation (bulk device writes).
+"""
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.redis_client import redis_client
+from iot_control.dispatcher import command_dispatcher
+from iot_control.drivers import DeviceCommand, SimulatedDriver, driver_registry
+from iot_control.log_buffer import control_log_buffer
+from iot_control.models import ControlLog, IoTDevice, Scene
+from iot_control.services import SceneManager
+
+User = get_user_model()
+
+
+class SlowDriver(SimulatedDriver):
+    latency = 0.1
+
+
+@override_settings(REDIS_URL='redis://localhost:1/0', IOT_LOG_BACKGROUND_FLUSH=False)
+class SceneActivationTestCase(TestCase):
+    """Scene activation with one device fetch and batched writes (no Redis - DB path)."""
+
+    def setUp(self):
+        redis_client.reset()
+        self.addCleanup(redis_client.reset)
+        control_log_buffer.clear()
+        self.addCleanup(control_log_buffer.clear)
+        self.user = User.objects.create_user(
+            username='guest', email='guest@test.com', password='testpass123'
+        )
+        self.devices = [
+            IoTDevice.objects.create(
+                name=f'Light {number}',
+                device_type='lighting',
+                location='coresync_suite',
+                device_id=f'light-{number}',
+                current_status={'power': 'on'},
+            )
+            for number in range(20)
+        ]
+        self.scene = Scene.objects.create(
+            name='Relax',
+            scene_type='custom',
+            user=self.user,
+            device_settings={
+                device.device_id: {'brightness': 30, 'color': 'warm'}
+                for device in self.devices
+            },
+        )
+
+    def test_query_count_is_fixed_per_scene(self):
+        # scene, devices, savepoint, bulk_update, usage counter, release - logs are buffered
+        with self.assertNumQueries(6):
+            result = SceneManager.activate_scene(self.scene.id, user=self.user)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['devices_updated'], 20)
+
+        device = IoTDevice.objects.get(device_id='light-7')
+        self.assertEqual(device.current_status['brightness'], 30)
+        self.assertEqual(device.current_status['power'], 'on')
+        self.assertTrue(device.is_online)
+
+        self.assertEqual(control_log_buffer.stats()['buffered'], 21)
+        with self.assertNumQueries(1):
+            self.assertEqual(control_log_buffer.flush(), 21)
+        self.assertEqual(ControlLog.objects.filter(device__isnull=False).count(), 20)
+        self.assertEqual(ControlLog.objects.filter(scene=self.scene, action_type='scene').count(), 1)
+        self.scene.refresh_from_db()
+        self.assertEqual(self.scene.usage_count, 1)
+
+    def test_missing_devices_reported_without_failing_others(self):
+        IoTDevice.objects.filter(device_id='light-0').update(is_active=False)
+        self.scene.device_settings['ghost'] = {'brightness': 10}
+        self.scene.save()
+
+        result = SceneManager.activate_scene(self.scene.id, user=self.user)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['devices_updated'], 19)
+        self.assertEqual(
+            sorted(error['device_id'] for error in result['errors']),
+            ['ghost', 'light-0']
+        )
+        self.assertNotIn('brightness', IoTDevice.objects.get(device_id='light-0').current_status)
+
+    @override_settings(IOT_LOG_BUFFER_SIZE=25)
+    def test_log_buffer_is_bounded(self):
+        SceneManager.activate_scene(self.scene.id, user=self.user)
+        SceneManager.activate_scene(self.scene.id, user=self.user)
+
+        stats = control_log_buffer.stats()
+        self.assertEqual(stats['buffered'], 25)
+        self.assertEqual(stats['dropped'], 17)
+
+        control_log_buffer.flush()
+        # Oldest entries dropped - both scene logs (last in each batch) survive
+        self.assertEqual(ControlLog.objects.filter(action_type='scene').count(), 2)
+        self.assertEqual(control_log_buffer.stats()['flushed'], 25)
+
+
+@override_settings(IOT_DRIVERS={'default': 'tests.test_iot_scenes.SlowDriver'})
+class CommandDispatchTestCase(TestCase):
+    """Concurrent dispatch through pooled driver connections."""
+
+    def setUp(self):
+        driver_registry.reset()
+        self.addCleanup(driver_registry.reset)
+
+    def command(self, number, ip_address=None):
+        return DeviceCommand(
+            device_id=number,
+            device_type='lighting',
+            ip_address=ip_address,
+            status={},
+            action='turn_on',
+        )
+
+    def test_batch_latency_is_slowest_device(self):
+        started = time.monotonic()
+        outcomes = command_dispatcher.dispatch_sync([self.command(number) for number in range(10)])
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(outcome['success'] for outcome in outcomes))
+        self.assertEqual(outcomes[3]['status']['power'], 'on')
+        # 10 devices x 0.1s sequentially would be 1s
+        self.assertLess(elapsed, 0.5)
+
+    @override_settings(IOT_DEVICE_TIMEOUT=0.02)
+    def test_slow_device_times_out(self):
+        outcome = command_dispatcher.dispatch_sync([self.command(1)])[0]
+        self.assertFalse(outcome['success'])
+        self.assertIn('timeout', outcome['error'])
+
+    def test_connections_reused_per_device_address(self):
+        driver = driver_registry.get('lighting')
+
+        async def run():
+            for _ in range(3):
+                await command_dispatcher.dispatch([self.command(1, '10.0.0.5'), self.command(2, '10.0.0.5')])
+            return driver.pool._slot('10.0.0.5')[1]
+
+        idle = async_to_sync(run)()
+        # Two concurrent commands per round -> two connections, reused across rounds
+        self.assertEqual(len(idle), 2)
+        self.assertEqual(sum(connection.commands_sent for connection in idle), 6)
+
+    def test_sync_dispatch_reuses_connections_across_calls(self):
+        driver = driver_registry.get('lighting')
+        for _ in range(3):
+            command_dispatcher.dispatch_sync([self.command(1, '10.0.0.6')])
+
+        pools = [slots['10.0.0.6'][1] for slots in driver.pool._loops.values() if '10.0.0.6' in slots]
+        # One long-lived dispatch loop -> one connection for all calls
+        self.assertEqual(len(pools), 1)
+        self.assertEqual([connection.commands_sent for connection in pools[0]], [3])
+
+    def test_connections_of_finished_loops_are_closed(self):
+        driver = driver_registry.get('lighting')
+
+        async def run():
+            await command_dispatcher.dispatch([self.command(1, '10.0.0.7')])
+            return driver.pool._slot('10.0.0.7')[1][0]
+
+        connection = async_to_sync(run)()
+        self.assertFalse(connection.is_closed())
+
+        # Next loop prunes the closed async_to_sync loop
+        async_to_sync(run)()
+        self.assertTrue(connection.is_closed())
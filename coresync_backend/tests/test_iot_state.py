@@ -0,0 +1,68 @@
+"""
+Tests for the Redis-backed live IoT device state.
+"""
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.redis_client import get_redis
+from iot_control.log_buffer import control_log_buffer
+from iot_control.models import IoTDevice
+from iot_control.services import DeviceController
+from iot_control.state_store import device_state_store
+
+User = get_user_model()
+
+
+@skipIf(get_redis() is None, 'Redis server not available')
+@override_settings(IOT_LOG_BACKGROUND_FLUSH=False)
+class DeviceStateStoreTestCase(TestCase):
+    """Commands write to Redis; flush coalesces them into the DB."""
+
+    def setUp(self):
+        self.original_prefix = device_state_store.key_prefix
+        device_state_store.key_prefix = 'test-iot'
+        self.addCleanup(self.cleanup)
+        control_log_buffer.clear()
+        self.addCleanup(control_log_buffer.clear)
+
+        self.user = User.objects.create_user(
+            username='guest', email='guest@test.com', password='testpass123'
+        )
+        self.device = IoTDevice.objects.create(
+            name='Dimmer',
+            device_type='lighting',
+            location='coresync_suite',
+            device_id='dimmer-1',
+        )
+
+    def cleanup(self):
+        client = get_redis()
+        keys = client.keys('test-iot:*')
+        if keys:
+            client.delete(*keys)
+        device_state_store.key_prefix = self.original_prefix
+
+    def test_commands_coalesce_until_flush(self):
+        for brightness in (10, 40, 70):
+            result = DeviceController.control_device(
+                self.device.id, 'set_value', {'brightness': brightness}, user=self.user
+            )
+            self.assertTrue(result['success'])
+
+        # Not written through
+        self.device.refresh_from_db()
+        self.assertEqual(self.device.current_status, {})
+
+        # First read loads location metadata; later reads never touch the DB
+        device_state_store.snapshot('coresync_suite')
+        with self.assertNumQueries(0):
+            snapshot = device_state_store.snapshot('coresync_suite')
+        self.assertEqual(snapshot[0]['current_status']['brightness'], 70)
+
+        self.assertEqual(device_state_store.flush(), 1)
+        self.device.refresh_from_db()
+        self.assertEqual(self.device.current_status['brightness'], 70)
+        self.assertTrue(self.device.is_online)
+        self.assertEqual(device_state_store.flush(), 0)
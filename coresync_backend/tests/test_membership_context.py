@@ -0,0 +1,99 @@
+"""
+Tests for the cached membership privilege context.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from memberships.context import (
+    MembershipContext, get_membership_context, membership_contexts, TIER_MEMBER, TIER_NON_MEMBER, TIER_VIP
+)
+from memberships.models import Membership, MembershipPlan
+
+User = get_user_model()
+
+
+class MembershipContextTestCase(TestCase):
+    """Context resolution, caching and invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='member', email='member@test.com', password='testpass123'
+        )
+        self.plan = MembershipPlan.objects.create(
+            name='Premium',
+            slug='premium',
+            description='Test plan',
+            price=Decimal('300.00'),
+            duration_months=1,
+            discount_percentage=20,
+            priority_booking=True,
+            monthly_service_credits=4,
+        )
+
+    def subscribe(self, plan=None, **kwargs):
+        today = timezone.localdate()
+        kwargs.setdefault('start_date', today - timedelta(days=1))
+        kwargs.setdefault('end_date', today + timedelta(days=30))
+        return Membership.objects.create(user=self.user, plan=plan or self.plan, **kwargs)
+
+    def test_non_member_defaults(self):
+        context = get_membership_context(self.user)
+        self.assertEqual(context.tier, TIER_NON_MEMBER)
+        self.assertEqual(context.max_advance_days, 3)
+        self.assertEqual(context.booking_tier, 'non_member')
+
+    def test_member_privileges_cached_after_one_query(self):
+        self.subscribe(services_used_this_month=1)
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            context = get_membership_context(self.user)
+        with self.assertNumQueries(0):
+            get_membership_context(self.user)
+
+        self.assertEqual(context.tier, TIER_MEMBER)
+        self.assertEqual(context.booking_tier, 'member_priority')
+        self.assertEqual(context.max_advance_days, 60)
+        self.assertEqual(context.active_discount, 20)
+        self.assertEqual(context.credits_remaining, 3)
+
+    def test_membership_and_plan_changes_invalidate(self):
+        membership = self.subscribe()
+        self.assertEqual(get_membership_context(self.user).active_discount, 20)
+
+        self.plan.discount_percentage = 25
+        self.plan.save()
+        self.assertEqual(get_membership_context(self.user).active_discount, 25)
+
+        membership.status = 'suspended'
+        membership.save()
+        self.assertEqual(get_membership_context(self.user).tier, TIER_NON_MEMBER)
+
+    def test_context_cached_before_commit_is_dropped_after_commit(self):
+        membership = self.subscribe()
+        get_membership_context(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.status = 'suspended'
+            membership.save()
+            # Another process reads the still-committed membership and caches it
+            stale = MembershipContext(user_id=self.user.pk, is_active=True, plan_id=self.plan.id)
+            cache.set(membership_contexts._user_key(self.user.pk), stale, 60)
+
+        self.assertEqual(get_membership_context(self.user).tier, TIER_NON_MEMBER)
+
+    def test_unlimited_plan_is_vip(self):
+        unlimited = MembershipPlan.objects.create(
+            name='Unlimited', slug='unlimited', description='Test',
+            price=Decimal('900.00'), duration_months=1,
+        )
+        self.subscribe(plan=unlimited)
+        context = get_membership_context(self.user)
+        self.assertEqual(context.tier, TIER_VIP)
+        self.assertEqual(context.max_advance_days, 90)
@@ -0,0 +1,108 @@
+"""
+Tests for the shared sliding-window rate limiter.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.rate_limit import rate_limiter
+from core.redis_client import redis_client
+from iot_control.consumers import IoTControlConsumer
+from iot_control.log_buffer import control_log_buffer
+from iot_control.models import IoTDevice
+from iot_control.throttling import IoTCommandThrottle
+from tests.test_availability_push import IN_MEMORY_LAYERS, WebsocketClient
+
+User = get_user_model()
+
+
+class SlidingWindowTestCase(SimpleTestCase):
+    """In-process fallback (same algorithm as the Redis script)."""
+
+    def setUp(self):
+        rate_limiter.reset()
+        self.addCleanup(rate_limiter.reset)
+
+    def test_previous_window_is_weighted(self):
+        # Window 10 fills 8/10; at 25% into window 11 it still counts 6
+        for _ in range(8):
+            self.assertTrue(rate_limiter.hit_local('k', 10, window=60, now=600.0).allowed)
+
+        results = [rate_limiter.hit_local('k', 10, window=60, now=675.0) for _ in range(5)]
+        self.assertEqual([result.allowed for result in results], [True, True, True, True, False])
+        self.assertEqual(results[-1].remaining, 0)
+        self.assertEqual(results[-1].retry_after, 45.0)
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: rate_limiter.hit_local('burst', 20), range(200)))
+        self.assertEqual(sum(result.allowed for result in results), 20)
+
+
+@override_settings(REDIS_URL='redis://localhost:1/0', CHANNEL_LAYERS=IN_MEMORY_LAYERS, IOT_LOG_BACKGROUND_FLUSH=False)
+class IoTCommandLimitTestCase(TestCase):
+    """REST throttle and WebSocket hook share one per-user budget."""
+
+    def setUp(self):
+        redis_client.reset()
+        rate_limiter.reset()
+        control_log_buffer.clear()
+        self.addCleanup(redis_client.reset)
+        self.addCleanup(rate_limiter.reset)
+        self.addCleanup(control_log_buffer.clear)
+
+        self.user = User.objects.create_user(
+            username='member', email='member@test.com', password='testpass123', membership_status='premium'
+        )
+        self.device = IoTDevice.objects.create(
+            name='Dimmer', device_type='lighting', location='coresync_suite', device_id='dimmer-1'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def control(self):
+        return self.client.post(
+            f'/api/iot/devices/{self.device.pk}/control/', {'action': 'turn_on'}, format='json'
+        )
+
+    @mock.patch.object(IoTCommandThrottle, 'THROTTLE_RATES', {'iot_command': '3/min'})
+    def test_rest_commands_throttled(self):
+        statuses = [self.control().status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 200])
+
+        response = self.control()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        # Reads are not limited
+        self.assertEqual(self.client.get(f'/api/iot/devices/{self.device.pk}/status/').status_code, 200)
+
+    @override_settings(IOT_COMMAND_RATE_LIMIT=2, IOT_UPDATE_COALESCE_WINDOW=0)
+    async def test_websocket_commands_limited(self):
+        communicator = WebsocketClient(IoTControlConsumer.as_asgi(), {
+            'type': 'websocket',
+            'path': '/ws/iot/control/coresync_suite/',
+            'user': self.user,
+            'url_route': {'kwargs': {'location': 'coresync_suite'}},
+        })
+        self.assertTrue(await communicator.connect())
+        await communicator.receive_json()  # snapshot
+
+        command = json.dumps({'command': 'control_device', 'device_id': self.device.pk, 'action': 'turn_on'})
+        replies = []
+        for _ in range(3):
+            await communicator.send_input({'type': 'websocket.receive', 'text': command})
+            reply = await communicator.receive_json()
+            while reply['type'] == 'device_delta':
+                reply = await communicator.receive_json()
+            replies.append(reply)
+
+        self.assertEqual([reply['type'] for reply in replies], ['control_result', 'control_result', 'error'])
+        self.assertEqual(replies[-1]['code'], 'rate_limited')
+        self.assertGreater(replies[-1]['retry_after'], 0)
+
+        await communicator.disconnect()
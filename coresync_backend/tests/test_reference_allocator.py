@@ -0,0 +1,69 @@
+"""
+Tests for the shared reference number allocator.
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import ReferenceCounter
+from core.reference_allocator import ReferenceAllocator
+from shop.models import PickupOrder
+
+User = get_user_model()
+
+
+class ReferenceAllocatorTestCase(TestCase):
+    """Block allocation, seeding and year rollover."""
+
+    def setUp(self):
+        self.allocator = ReferenceAllocator(block_size=5)
+
+    def test_block_served_from_memory_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.allocator.allocate('TS')
+
+        with self.assertNumQueries(0):
+            second = self.allocator.allocate('TS')
+
+        year = timezone.now().year
+        self.assertEqual(first, f'TS-{year}-000001')
+        self.assertEqual(second, f'TS-{year}-000002')
+        self.assertEqual(ReferenceCounter.objects.get(prefix='TS').last_value, 5)
+
+    def test_uncommitted_block_is_not_reused(self):
+        # Without commit the rest of the block stays with the transaction
+        first = self.allocator.allocate('TS')
+        second = self.allocator.allocate('TS')
+        self.assertNotEqual(first, second)
+        self.assertTrue(second.endswith('000006'))
+
+    def test_counter_seeded_from_existing_references(self):
+        year = timezone.now().year
+        user = User.objects.create_user(
+            username='shopper', email='shopper@test.com', password='testpass123'
+        )
+        PickupOrder.objects.create(
+            user=user,
+            order_number=f'PO-{year}-000041',
+            subtotal=Decimal('10.00'),
+            tax=Decimal('0.80'),
+            total=Decimal('10.80'),
+        )
+
+        reference = self.allocator.allocate('PO', model=PickupOrder, field='order_number')
+        self.assertEqual(reference, f'PO-{year}-000042')
+
+    def test_year_rollover_starts_new_sequence(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocator.allocate('TS')
+
+        next_year = datetime(timezone.now().year + 1, 1, 1, tzinfo=dt_timezone.utc)
+        with mock.patch('core.reference_allocator.timezone.now', return_value=next_year):
+            reference = self.allocator.allocate('TS')
+
+        self.assertEqual(reference, f'TS-{next_year.year}-000001')
+        self.assertEqual(ReferenceCounter.objects.filter(prefix='TS').count(), 2)
@@ -0,0 +1,106 @@
+"""
+Tests for the heap-based scene auto activation scheduler.
+"""
+from datetime import datetime, time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.redis_client import redis_client
+from iot_control.log_buffer import control_log_buffer
+from iot_control.models import IoTDevice, Scene
+from iot_control.scene_scheduler import ACTIVATE, DEACTIVATE, SceneScheduler, next_occurrence, scene_scheduler
+
+User = get_user_model()
+
+
+def local(hour, minute=0, day=1):
+    return timezone.make_aware(datetime(2026, 3, day, hour, minute))
+
+
+@override_settings(REDIS_URL='redis://localhost:1/0', IOT_LOG_BACKGROUND_FLUSH=False)
+class SceneSchedulerTestCase(TestCase):
+
+    def setUp(self):
+        redis_client.reset()
+        control_log_buffer.clear()
+        self.addCleanup(redis_client.reset)
+        self.addCleanup(control_log_buffer.clear)
+
+        self.user = User.objects.create_user(username='owner', email='owner@test.com', password='testpass123')
+        self.lamp = IoTDevice.objects.create(
+            name='Lamp', device_type='lighting', location='coresync_suite', device_id='lamp-1'
+        )
+        self.morning = Scene.objects.create(
+            name='Morning', scene_type='custom', user=self.user, is_public=True,
+            device_settings={'lamp-1': {'brightness': 80}},
+            auto_activate_time=time(7, 0), auto_deactivate_time=time(9, 30),
+        )
+        self.evening = Scene.objects.create(
+            name='Evening', scene_type='custom', user=self.user, is_public=True,
+            device_settings={'lamp-1': {'brightness': 20}},
+            auto_activate_time=time(19, 0),
+        )
+        Scene.objects.create(name='Manual', scene_type='custom', user=self.user, device_settings={})
+        self.scheduler = SceneScheduler()
+
+    def test_next_occurrence_rolls_to_next_day(self):
+        self.assertEqual(next_occurrence(time(7, 0), local(6, 59)), local(7, 0))
+        self.assertEqual(next_occurrence(time(7, 0), local(7, 0)), local(7, 0, day=2))
+
+    def test_load_orders_heap_and_pops_due_once(self):
+        self.assertEqual(self.scheduler.load(now=local(6)), 3)
+        self.assertEqual(self.scheduler.next_fire_at(), local(7).timestamp())
+
+        self.assertEqual(self.scheduler.pop_due(now=local(6, 59)), [])
+        self.assertEqual(self.scheduler.pop_due(now=local(10)), [
+            (self.morning.pk, ACTIVATE), (self.morning.pk, DEACTIVATE),
+        ])
+        # Переплановано на наступний день, вечірня сцена - наступна
+        self.assertEqual(self.scheduler.pop_due(now=local(10)), [])
+        self.assertEqual(self.scheduler.next_fire_at(), local(19).timestamp())
+
+    def test_reindex_replaces_only_changed_scene(self):
+        self.scheduler.load(now=local(6))
+        self.scheduler.reindex(self.morning.pk, time(8, 0), None, now=local(6))
+        self.scheduler.reindex(self.evening.pk, None, None, now=local(6))
+
+        self.assertEqual(self.scheduler.pop_due(now=local(23)), [(self.morning.pk, ACTIVATE)])
+        self.assertEqual(self.scheduler.pop_due(now=local(23)), [])
+        self.assertEqual(self.scheduler.next_fire_at(), local(8, day=2).timestamp())
+
+    def test_signals_notify_on_schedule_change_only(self):
+        with mock.patch.object(scene_scheduler, 'notify_changed') as notify:
+            scene = Scene.objects.get(pk=self.evening.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                scene.usage_count = 5
+                scene.save()
+            notify.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                scene.auto_activate_time = time(20, 0)
+                scene.save()
+                # Scheduler reads the scene back from DB - only after commit
+                notify.assert_not_called()
+            notify.assert_called_once_with(scene.pk)
+
+            notify.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                scene.is_active = False
+                scene.save()
+            notify.assert_called_once_with(scene.pk)
+
+    def test_fire_activates_and_deactivates(self):
+        self.scheduler.load(now=local(6))
+
+        fired = self.scheduler.run_pending(now=local(8))
+        self.assertEqual(fired, {ACTIVATE: 1, DEACTIVATE: 0})
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.current_status['brightness'], 80)
+
+        fired = self.scheduler.run_pending(now=local(9, 30))
+        self.assertEqual(fired, {ACTIVATE: 0, DEACTIVATE: 1})
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.current_status['power'], 'off')
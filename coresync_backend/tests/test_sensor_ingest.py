@@ -0,0 +1,113 @@
+"""
+Tests for batch sensor reading ingestion.
+"""
+import json
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from iot_control.models import IoTDevice, SensorReading
+from iot_control.sensor_ingest import sensor_ingestor
+
+User = get_user_model()
+
+INGEST_URL = '/api/iot/sensors/ingest/'
+
+
+class SensorIngestTestCase(TestCase):
+    """Vectorized validation, chunked bulk_create, latest-value fan-out."""
+
+    def setUp(self):
+        cache.clear()
+        self.started = int(time.time())
+        self.client = APIClient()
+        self.gateway = User.objects.create_user(
+            username='gateway', email='gateway@test.com', password='testpass123', is_staff=True
+        )
+        self.client.force_authenticate(self.gateway)
+        self.sensors = [
+            IoTDevice.objects.create(
+                name=f'Sensor {number}',
+                device_type='temperature',
+                location='coresync_suite',
+                device_id=f'sensor-{number}',
+            )
+            for number in range(3)
+        ]
+
+    def post_lines(self, readings):
+        body = '\n'.join(json.dumps(reading) for reading in readings)
+        return self.client.post(INGEST_URL, data=body, content_type='application/x-ndjson')
+
+    def readings(self, count):
+        return [
+            {
+                'device_id': f'sensor-{number % 3}',
+                'reading_type': 'temperature',
+                'value': 70 + number / 100,
+                'unit': 'F',
+                'timestamp': self.started - 3600 + number,
+            }
+            for number in range(count)
+        ]
+
+    def test_bulk_insert_and_latest_value_fan_out(self):
+        with mock.patch.object(sensor_ingestor, '_send') as send:
+            response = self.post_lines(self.readings(3000))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['accepted'], 3000)
+        self.assertEqual(SensorReading.objects.count(), 3000)
+
+        # One message per device/reading_type, carrying the newest value
+        rows = send.call_args[0][0]
+        self.assertEqual(len(rows), 3)
+        latest = {row.device_id: row.value for row in rows}
+        self.assertEqual(latest[self.sensors[2].pk], 70 + 2999 / 100)
+
+    def test_broadcast_is_throttled(self):
+        with mock.patch.object(sensor_ingestor, '_send') as send:
+            self.post_lines(self.readings(3))
+            response = self.post_lines(self.readings(3))
+
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(response.data['broadcast'], 0)
+        self.assertEqual(SensorReading.objects.count(), 6)
+
+    def test_invalid_readings_are_rejected_individually(self):
+        readings = self.readings(2) + [
+            {'device_id': 'ghost', 'reading_type': 'temperature', 'value': 1},
+            {'device_id': 'sensor-0', 'reading_type': 'temperature', 'value': 'hot'},
+            {'device_id': 'sensor-0', 'reading_type': 'humidity', 'value': 40, 'quality_score': 2},
+        ]
+        with mock.patch.object(sensor_ingestor, '_send'):
+            response = self.post_lines(readings)
+
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual(response.data['rejected'], 3)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2, 3, 4])
+        self.assertEqual(SensorReading.objects.count(), 2)
+
+    def test_out_of_range_timestamps_are_rejected(self):
+        readings = self.readings(1) + [
+            dict(self.readings(1)[0], timestamp=-1e11),
+            dict(self.readings(1)[0], timestamp=self.started - 8 * 86400),
+            dict(self.readings(1)[0], timestamp=1e20),
+        ]
+        with mock.patch.object(sensor_ingestor, '_send'):
+            response = self.post_lines(readings)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual([error['error'] for error in response.data['errors']], ['invalid timestamp'] * 3)
+
+    def test_ingest_requires_staff(self):
+        self.client.force_authenticate(User.objects.create_user(
+            username='guest', email='guest@test.com', password='testpass123'
+        ))
+        response = self.post_lines(self.readings(1))
+        self.assertEqual(response.status_code, 403)
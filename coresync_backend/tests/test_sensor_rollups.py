@@ -0,0 +1,142 @@
+"""
+Tests for sensor reading rollups and retention.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from iot_control.models import IoTDevice, SensorReading, SensorRollup
+from iot_control.sensor_rollups import sensor_rollups
+
+
+class SensorRollupTestCase(TestCase):
+    """Incremental minute / hour / day rollups, resolution choice, pruning."""
+
+    def setUp(self):
+        cache.clear()
+        self.sauna = IoTDevice.objects.create(
+            name='Sauna Sensor',
+            device_type='temperature',
+            location='coresync_suite',
+            device_id='sauna-1',
+        )
+        self.day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    def add_readings(self, start, values, step=timedelta(seconds=20)):
+        SensorReading.objects.bulk_create([
+            SensorReading(
+                device=self.sauna,
+                reading_type='temperature',
+                value=value,
+                timestamp=start + step * number,
+            )
+            for number, value in enumerate(values)
+        ])
+
+    def rollup(self, resolution, start):
+        return SensorRollup.objects.get(
+            device=self.sauna, reading_type='temperature', resolution=resolution, bucket_start=start
+        )
+
+    def test_rollups_are_incremental_and_idempotent(self):
+        ten = self.day + timedelta(hours=10)
+        self.add_readings(ten, [180, 190, 200])
+        self.assertEqual(sensor_rollups.update(), 3)
+
+        minute = self.rollup('minute', ten)
+        self.assertEqual((minute.count, minute.min_value, minute.max_value), (3, 180, 200))
+        self.assertEqual(minute.avg_value, 190)
+
+        # Late reading in the same minute + a new hour; earlier rows are not re-read
+        self.add_readings(ten + timedelta(seconds=50), [170])
+        self.add_readings(ten + timedelta(hours=1), [210])
+        self.assertEqual(sensor_rollups.update(), 2)
+        self.assertEqual(sensor_rollups.update(), 0)
+
+        self.assertEqual(self.rollup('minute', ten).count, 4)
+        self.assertEqual(self.rollup('hour', ten).min_value, 170)
+        day = self.rollup('day', self.day)
+        self.assertEqual((day.count, day.min_value, day.max_value), (5, 170, 210))
+
+    def test_series_picks_resolution_for_range(self):
+        now = timezone.now()
+        self.assertEqual(sensor_rollups.choose_resolution(now - timedelta(minutes=30), now, 500), 'raw')
+        self.assertEqual(sensor_rollups.choose_resolution(now - timedelta(hours=6), now, 500), 'minute')
+        self.assertEqual(sensor_rollups.choose_resolution(now - timedelta(days=7), now, 500), 'hour')
+        self.assertEqual(sensor_rollups.choose_resolution(now - timedelta(days=90), now, 500), 'day')
+
+        self.add_readings(self.day, [150 + hour for hour in range(24)], step=timedelta(hours=1))
+        sensor_rollups.update()
+        series = sensor_rollups.series(
+            self.sauna.pk, 'temperature', self.day, self.day + timedelta(days=1), max_points=100
+        )
+        self.assertEqual(series['resolution'], 'hour')
+        self.assertEqual(len(series['points']), 24)
+        self.assertEqual(series['points'][5]['avg'], 155)
+
+    @override_settings(SENSOR_RAW_RETENTION_DAYS=2, SENSOR_PRUNE_BATCH_SIZE=10)
+    def test_prune_removes_only_rolled_up_raw_readings(self):
+        old = self.day - timedelta(days=5)
+        self.add_readings(old, range(25))
+        sensor_rollups.update()
+        self.add_readings(old, range(5))  # not rolled up yet
+
+        deleted = sensor_rollups.prune()
+
+        self.assertEqual(deleted['readings'], 25)
+        self.assertEqual(SensorReading.objects.count(), 5)
+        # Aggregates survive raw retention
+        self.assertEqual(self.rollup('day', old).count, 25)
+
+    @override_settings(SENSOR_RAW_RETENTION_DAYS=2)
+    def test_late_reading_merges_into_pruned_bucket(self):
+        old = self.day - timedelta(days=5)
+        self.add_readings(old, [180, 190, 200])
+        sensor_rollups.update()
+        sensor_rollups.prune()
+        self.assertEqual(SensorReading.objects.count(), 0)
+
+        # Raw source of the bucket is gone - recomputing would keep only this reading
+        self.add_readings(old + timedelta(seconds=50), [170])
+        self.assertEqual(sensor_rollups.update(), 1)
+
+        minute = self.rollup('minute', old)
+        self.assertEqual((minute.count, minute.min_value, minute.max_value), (4, 170, 200))
+        self.assertEqual(self.rollup('day', old).count, 4)
+
+    @override_settings(SENSOR_RAW_RETENTION_DAYS=2)
+    def test_failed_run_does_not_double_count_merged_buckets(self):
+        old = self.day - timedelta(days=5)
+        self.add_readings(old, [180, 190, 200])
+        sensor_rollups.update()
+        sensor_rollups.prune()
+        self.add_readings(old + timedelta(seconds=50), [170])
+
+        recompute = sensor_rollups._recompute
+
+        def fail_on_day(resolution, keys):
+            if resolution == 'day':
+                raise RuntimeError('worker died')
+            recompute(resolution, keys)
+
+        with mock.patch.object(sensor_rollups, '_recompute', side_effect=fail_on_day):
+            with self.assertRaises(RuntimeError):
+                sensor_rollups.update()
+
+        # Merge and the rolled_up flag were rolled back together
+        self.assertEqual(sensor_rollups.update(), 1)
+        self.assertEqual(self.rollup('minute', old).count, 4)
+
+    def test_reading_committed_out_of_id_order_is_rolled_up(self):
+        ten = self.day + timedelta(hours=10)
+        self.add_readings(ten, [180, 190])
+        first, second = SensorReading.objects.order_by('id')
+        # Higher id already rolled up while the lower id was still uncommitted
+        SensorReading.objects.filter(pk=second.pk).update(rolled_up=True)
+
+        self.assertEqual(sensor_rollups.update(), 1)
+        self.assertEqual(self.rollup('minute', ten).count, 2)
+        self.assertEqual(sensor_rollups.prune()['readings'], 0)
@@ -0,0 +1,114 @@
+"""
+Tests for AvailabilitySlot generation from weekly templates.
+"""
+from datetime import datetime, timedelta, time as dt_time
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from services.booking_models import Room, AvailabilitySlot, SlotTemplate
+from services.slot_generator import slot_generator
+
+
+class SlotGeneratorTestCase(TestCase):
+    """Template expansion, priority windows and incremental horizon."""
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(
+            name='Suite A',
+            room_type='mensuite',
+            opening_time=dt_time(9, 0),
+            closing_time=dt_time(12, 0),
+        )
+        for weekday in range(7):
+            SlotTemplate.objects.create(room=self.room, weekday=weekday)
+        self.today = timezone.localdate()
+
+    def test_expands_room_hours_into_15_minute_slots(self):
+        result = slot_generator.generate(self.today, self.today)
+
+        slots = AvailabilitySlot.objects.filter(room=self.room, date=self.today)
+        self.assertEqual(result['created'], 12)
+        self.assertEqual(slots.count(), 12)
+
+        first = slots.first()
+        self.assertEqual((first.start_time, first.end_time), (dt_time(9, 0), dt_time(9, 15)))
+        slot_start = timezone.make_aware(datetime.combine(self.today, dt_time(9, 0)))
+        self.assertEqual(first.member_only_until, slot_start - timedelta(days=3))
+        self.assertEqual(first.vip_only_until, slot_start - timedelta(days=60))
+
+    def test_peak_template_overrides_by_priority(self):
+        SlotTemplate.objects.create(
+            room=self.room,
+            weekday=self.today.weekday(),
+            start_time=dt_time(11, 0),
+            priority=10,
+            base_price_modifier=Decimal('1.50'),
+            tags=['peak_hour'],
+        )
+        slot_generator.generate(self.today, self.today)
+
+        peak = AvailabilitySlot.objects.get(
+            room=self.room, date=self.today, start_time=dt_time(11, 30)
+        )
+        self.assertEqual(peak.base_price_modifier, Decimal('1.50'))
+        self.assertIn('peak_hour', peak.tags)
+        self.assertEqual(
+            AvailabilitySlot.objects.filter(room=self.room, date=self.today).count(), 12
+        )
+
+    def test_mixed_slot_lengths_do_not_overlap(self):
+        SlotTemplate.objects.create(
+            room=self.room,
+            weekday=self.today.weekday(),
+            start_time=dt_time(9, 50),
+            end_time=dt_time(11, 20),
+            slot_minutes=45,
+            priority=10,
+        )
+        slot_generator.generate(self.today, self.today)
+
+        slots = list(
+            AvailabilitySlot.objects.filter(room=self.room, date=self.today)
+            .order_by('start_time')
+            .values_list('start_time', 'end_time')
+        )
+        for (_, previous_end), (next_start, _) in zip(slots, slots[1:]):
+            self.assertLessEqual(previous_end, next_start)
+        self.assertIn((dt_time(9, 50), dt_time(10, 35)), slots)
+        self.assertIn((dt_time(10, 35), dt_time(11, 20)), slots)
+        # 09:45-09:50 не вміщує 15-хвилинний слот, після 11:20 відлік з 11:20
+        self.assertEqual(slots[2], (dt_time(9, 30), dt_time(9, 45)))
+        self.assertEqual(slots[5], (dt_time(11, 20), dt_time(11, 35)))
+        self.assertEqual(len(slots), 7)
+
+    def test_rerun_keeps_existing_bookings(self):
+        slot_generator.generate(self.today, self.today)
+        slot = AvailabilitySlot.objects.get(
+            room=self.room, date=self.today, start_time=dt_time(9, 0)
+        )
+        slot.current_bookings = 1
+        slot.save()
+
+        result = slot_generator.generate(self.today, self.today)
+        slot.refresh_from_db()
+        self.assertEqual(slot.current_bookings, 1)
+        self.assertEqual((result['created'], result['skipped']), (0, 12))
+
+    def test_extend_horizon_only_adds_new_days(self):
+        slot_generator.extend_horizon(days=5)
+        self.assertEqual(AvailabilitySlot.objects.count(), 6 * 12)
+
+        result = slot_generator.extend_horizon(days=7)
+        self.assertEqual(result['days'], 2)
+        self.assertEqual(AvailabilitySlot.objects.count(), 8 * 12)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_availability_slots', '--days', '1', stdout=out)
+        self.assertIn('Generated 24 slots, skipped 0 existing', out.getvalue())
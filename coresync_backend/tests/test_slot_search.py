@@ -0,0 +1,84 @@
+"""
+Tests for the "next available" slot search.
+"""
+from datetime import datetime, timedelta, time as dt_time
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from services.booking_models import AvailabilitySlot
+from services.slot_search import slot_search
+from tests.test_technician_availability import TechnicianFixturesMixin
+
+
+class SlotSearchTestCase(TechnicianFixturesMixin, TestCase):
+    """Room interval merge, technician free/busy and priority windows."""
+
+    def setUp(self):
+        self.create_fixtures()
+        # 15-minute slots 9:00-11:00, the 9:30 slot is full
+        start = datetime.combine(self.day, dt_time(9, 0))
+        for i in range(8):
+            slot_start = start + timedelta(minutes=15 * i)
+            AvailabilitySlot.objects.create(
+                room=self.room,
+                date=self.day,
+                start_time=slot_start.time(),
+                end_time=(slot_start + timedelta(minutes=15)).time(),
+                member_only_until=timezone.now() - timedelta(days=1),
+                current_bookings=1 if i == 2 else 0,
+            )
+        self.after = timezone.make_aware(datetime.combine(self.day, dt_time(0, 0)))
+
+    def search(self, **kwargs):
+        kwargs.setdefault('after', self.after)
+        return slot_search.find_next(self.service, **kwargs)
+
+    def starts(self, result):
+        return [(row['start_time'], row['technician_id']) for row in result['results']]
+
+    def test_duration_must_fit_merged_room_interval(self):
+        result = self.search()
+        self.assertTrue(result['complete'])
+        self.assertEqual(self.starts(result), [('09:45', self.anna.id), ('10:00', self.anna.id)])
+        self.assertEqual(result['results'][0]['end_time'], '10:45')
+
+    def test_busy_technicians_are_skipped(self):
+        self.book(self.anna, dt_time(10, 0))
+        self.book(self.bob, dt_time(9, 0))
+
+        self.assertEqual(self.starts(self.search()), [('10:00', self.bob.id)])
+        self.assertEqual(
+            self.starts(self.search(require_technician=False)),
+            [('09:45', None), ('10:00', self.bob.id)]
+        )
+        self.assertEqual(self.search(technician_id=self.anna.id)['results'], [])
+
+    def test_priority_window_hides_slots_from_non_members(self):
+        AvailabilitySlot.objects.filter(start_time__gte=dt_time(10, 0)).update(
+            member_only_until=timezone.now() + timedelta(days=5)
+        )
+        self.assertEqual(self.search()['results'], [])
+
+    def test_repeat_search_is_served_from_indexes(self):
+        self.search()
+        with self.assertNumQueries(0):
+            self.search(count=1)
+
+    @override_settings(SLOT_SEARCH_TIME_BUDGET=0)
+    def test_time_budget_returns_partial_answer(self):
+        self.assertFalse(self.search()['complete'])
+
+    def test_rest_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.client_user)
+        response = client.get('/api/bookings/next_available/', {
+            'service_id': self.service.id,
+            'after': self.day.isoformat(),
+            'count': 1,
+        })
+        data = response.json()
+        self.assertEqual(data['results'][0]['start_time'], '09:45')
+        self.assertEqual(data['results'][0]['room_id'], self.room.id)
+        self.assertEqual(data['searched_until'], self.day.isoformat())
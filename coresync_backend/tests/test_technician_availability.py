@@ -0,0 +1,328 @@
+"""
+Tests for the technician free/busy index.
+"""
+from datetime import datetime, timedelta, time as dt_time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from services.booking_models import Booking, Room
+from services.booking_validator import BookingValidator
+from services.models import Service, ServiceCategory
+from technicians.assignment import assignment_solver, hungarian
+from technicians.availability import technician_availability
+from technicians.models import Schedule, Technician
+
+User = get_user_model()
+
+
+class TechnicianFixturesMixin:
+    """Technicians with a 9-17 schedule, a service and a room."""
+
+    def create_fixtures(self):
+        cache.clear()
+        # Schedule signal queues a Celery task - no broker in tests
+        patcher = mock.patch('technicians.tasks.update_technician_availability.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.anna = self.create_technician('Anna', ['massage'])
+        self.bob = self.create_technician('Bob', ['all'])
+        self.cara = self.create_technician('Cara', ['facial'])
+        for tech in (self.anna, self.bob, self.cara):
+            Schedule.objects.create(
+                technician=tech,
+                weekday=self.day.weekday(),
+                start_time=dt_time(9, 0),
+                end_time=dt_time(17, 0),
+            )
+
+        self.client_user = User.objects.create_user(
+            username='client', email='client@test.com', password='testpass123'
+        )
+        category = ServiceCategory.objects.create(name='Mensuite', slug='mensuite')
+        self.service = Service.objects.create(
+            name='Deep Tissue Massage',
+            slug='deep-tissue-massage',
+            description='Test',
+            category=category,
+            member_price=Decimal('80.00'),
+            non_member_price=Decimal('100.00'),
+            duration=60,
+        )
+        self.room = Room.objects.create(name='Suite A', room_type='mensuite')
+
+    def create_technician(self, name, specialties):
+        user = User.objects.create_user(
+            username=name.lower(),
+            email=f'{name.lower()}@test.com',
+            password='testpass123',
+            first_name=name,
+        )
+        return Technician.objects.create(
+            user=user, specialties=specialties, hourly_rate=Decimal('30.00')
+        )
+
+    def book(self, technician, start, status='confirmed'):
+        return Booking.objects.create(
+            user=self.client_user,
+            service=self.service,
+            room=self.room,
+            technician=technician,
+            booking_date=self.day,
+            start_time=start,
+            duration=60,
+            base_price=Decimal('100.00'),
+            final_total=Decimal('100.00'),
+            status=status,
+        )
+
+
+class TechnicianAvailabilityTestCase(TechnicianFixturesMixin, TestCase):
+    """Free/busy answered from the per-day index."""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_free_technicians_by_specialty(self):
+        free = technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0), specialty='massage'
+        )
+        self.assertEqual(free, [self.anna.id, self.bob.id])
+
+    def test_busy_and_off_schedule_excluded(self):
+        self.book(self.anna, dt_time(10, 30))
+
+        free = technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0), specialty='massage'
+        )
+        self.assertEqual(free, [self.bob.id])
+
+        # Outside schedule hours
+        free = technician_availability.free_technicians(
+            self.day, dt_time(16, 30), dt_time(17, 30), specialty='massage'
+        )
+        self.assertEqual(free, [])
+
+    def test_day_built_in_two_queries_then_cached(self):
+        with self.assertNumQueries(2):
+            technician_availability.free_technicians(self.day, dt_time(10, 0), dt_time(11, 0))
+        with self.assertNumQueries(0):
+            technician_availability.free_technicians(self.day, dt_time(12, 0), dt_time(13, 0))
+
+    def test_booking_and_schedule_changes_invalidate(self):
+        technician_availability.free_technicians(self.day, dt_time(10, 0), dt_time(11, 0))
+
+        booking = self.book(self.bob, dt_time(10, 0))
+        self.assertNotIn(self.bob.id, technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0)
+        ))
+
+        booking.status = 'cancelled'
+        booking.save()
+        Schedule.objects.create(
+            technician=self.cara,
+            is_recurring=False,
+            specific_date=self.day,
+            start_time=dt_time(18, 0),
+            end_time=dt_time(20, 0),
+        )
+        self.assertIn(self.bob.id, technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0)
+        ))
+        self.assertTrue(technician_availability.is_scheduled(self.cara.id, self.day, dt_time(19, 0)))
+
+    def test_rescheduled_booking_frees_old_day(self):
+        booking = self.book(self.bob, dt_time(10, 0))
+        self.assertNotIn(self.bob.id, technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0)
+        ))
+
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.booking_date = self.day + timedelta(days=7)
+        booking.save()
+        self.assertIn(self.bob.id, technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0)
+        ))
+
+    def test_day_cached_before_commit_is_dropped_after_commit(self):
+        technician_availability.get_day(self.day)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.bob, dt_time(10, 0))
+            # Concurrent read rebuilds the day before the booking is visible
+            stale = technician_availability.build_day(self.day)
+            stale[self.bob.id].update(busy_start=[], busy_end=[], busy_max_end=[], busy_ids=[])
+            cache.set(technician_availability._day_key(self.day, technician_availability._get_version()), stale)
+
+        self.assertNotIn(self.bob.id, technician_availability.free_technicians(
+            self.day, dt_time(10, 0), dt_time(11, 0)
+        ))
+
+    def test_alternatives_do_not_require_schedule(self):
+        dora = self.create_technician('Dora', ['massage'])
+        booking_datetime = datetime.combine(self.day, dt_time(10, 0))
+
+        alternatives = BookingValidator.get_alternative_technicians('massage', booking_datetime, 60)
+        self.assertIn(dora, alternatives)
+
+    def test_validator_uses_index(self):
+        self.book(self.anna, dt_time(10, 0))
+        booking_datetime = datetime.combine(self.day, dt_time(10, 0))
+
+        alternatives = BookingValidator.get_alternative_technicians(
+            'massage', booking_datetime, 60
+        )
+        self.assertEqual(alternatives, [self.bob])
+
+        schedule = BookingValidator.validate_technician_schedule(
+            self.cara.id, datetime.combine(self.day, dt_time(8, 0))
+        )
+        self.assertFalse(schedule['valid'])
+
+
+class BatchConflictValidationTestCase(TechnicianFixturesMixin, TestCase):
+    """Sweep-line batch validation and bulk assign_technician."""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def proposal(self, technician, start, end, **extra):
+        return dict(
+            technician_id=technician.id,
+            booking_date=self.day,
+            start_time=start,
+            end_time=end,
+            **extra
+        )
+
+    def test_batch_reports_existing_and_in_batch_overlaps(self):
+        existing = self.book(self.anna, dt_time(10, 0))
+        proposals = [
+            self.proposal(self.anna, dt_time(10, 30), dt_time(11, 30)),  # vs existing
+            self.proposal(self.bob, dt_time(12, 0), dt_time(13, 0)),
+            self.proposal(self.bob, dt_time(12, 30), dt_time(13, 30)),   # vs row 1
+            self.proposal(self.bob, dt_time(13, 30), dt_time(14, 0)),    # adjacent - ok
+        ]
+
+        # One query for all existing intervals (no rooms in this batch)
+        with self.assertNumQueries(1):
+            report = BookingValidator.validate_batch(proposals)
+
+        valid = [row['valid'] for row in report['rows']]
+        self.assertEqual(valid, [False, False, False, True])
+        self.assertEqual(report['rows'][0]['conflicts'][0]['booking_id'], existing.id)
+        self.assertEqual(report['rows'][2]['conflicts'][0]['row'], 1)
+        self.assertEqual(report['conflict_count'], 2)
+
+    def test_moved_booking_does_not_conflict_with_itself(self):
+        booking = self.book(self.anna, dt_time(10, 0))
+        report = BookingValidator.validate_batch([
+            self.proposal(self.anna, dt_time(10, 0), dt_time(11, 0), booking_id=booking.id)
+        ])
+        self.assertTrue(report['valid'])
+
+    def test_command_move_day(self):
+        self.book(self.anna, dt_time(10, 0))
+        self.book(self.anna, dt_time(14, 0))
+        self.book(self.bob, dt_time(14, 30))
+
+        out = StringIO()
+        call_command(
+            'assign_technician',
+            '--move-day', self.day.isoformat(),
+            '--from-technician', str(self.anna.id),
+            '--to-technician', str(self.bob.id),
+            stdout=out
+        )
+
+        self.assertIn('Assigned 1 bookings, 1 rejected', out.getvalue())
+        self.assertEqual(
+            Booking.objects.filter(technician=self.bob, booking_date=self.day).count(), 2
+        )
+
+
+class AssignmentSolverTestCase(TechnicianFixturesMixin, TestCase):
+    """Min-cost batch assignment of unassigned bookings."""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_hungarian_matches_optimal_cost(self):
+        cost = [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+        self.assertEqual(hungarian(cost), [(0, 1), (1, 0), (2, 2)])
+        # Rectangular - one booking per technician
+        self.assertEqual(len(hungarian([[1, 2], [3, 4], [5, 6]])), 2)
+
+    def test_assigns_all_feasible_bookings_without_overlaps(self):
+        # Anna (massage) and Bob (all) can take massages; Cara only facials
+        self.book(self.bob, dt_time(9, 0))
+        open_bookings = [
+            self.book(None, dt_time(9, 0)),
+            self.book(None, dt_time(9, 30)),    # both qualified technicians busy
+            self.book(None, dt_time(10, 0)),
+            self.book(None, dt_time(16, 30)),   # runs past every schedule
+        ]
+
+        result = assignment_solver.solve_day(self.day)
+
+        self.assertEqual(result['unassigned'], [open_bookings[1].id, open_bookings[3].id])
+        assigned = dict(result['assigned'])
+        self.assertEqual(assigned[open_bookings[0].id], self.anna.id)
+        self.assertNotIn(self.cara.id, assigned.values())
+
+        # Saved in bulk and no technician double-booked
+        report = BookingValidator.validate_batch([
+            dict(
+                technician_id=booking.technician_id,
+                booking_date=booking.booking_date,
+                start_time=booking.start_time,
+                end_time=booking.end_time,
+                booking_id=booking.id,
+            )
+            for booking in Booking.objects.filter(technician__isnull=False)
+        ])
+        self.assertTrue(report['valid'])
+        self.assertEqual(Booking.objects.filter(technician__isnull=True).count(), 2)
+
+    def test_busy_map_read_from_db_not_stale_cache(self):
+        technician_availability.get_day(self.day)
+        # Booking іншого процесу - локальний cache про нього не знає
+        taken = self.book(None, dt_time(10, 0))
+        Booking.objects.filter(pk=taken.pk).update(technician=self.anna)
+        open_booking = self.book(None, dt_time(10, 0))
+
+        result = assignment_solver.solve_day(self.day)
+        self.assertEqual(result['assigned'], [(open_booking.id, self.bob.id)])
+
+    def test_manual_assignment_made_meanwhile_is_kept(self):
+        open_booking = self.book(None, dt_time(11, 0))
+        cost_matrix = assignment_solver._cost_matrix
+
+        def assign_manually(*args):
+            Booking.objects.filter(pk=open_booking.pk).update(technician=self.cara)
+            return cost_matrix(*args)
+
+        with mock.patch.object(assignment_solver, '_cost_matrix', side_effect=assign_manually):
+            result = assignment_solver.solve_day(self.day)
+
+        self.assertEqual(result['assigned'], [])
+        self.assertEqual(result['skipped'], [open_booking.id])
+        open_booking.refresh_from_db()
+        self.assertEqual(open_booking.technician_id, self.cara.id)
+
+    def test_command_dry_run(self):
+        self.book(None, dt_time(11, 0))
+        out = StringIO()
+        call_command(
+            'auto_assign_technicians', '--date', self.day.isoformat(), '--dry-run', stdout=out
+        )
+        self.assertIn('1 assigned, 0 unassigned', out.getvalue())
+        self.assertFalse(Booking.objects.filter(technician__isnull=False).exists())
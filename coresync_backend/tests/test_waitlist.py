@@ -0,0 +1,142 @@
+"""
+Tests for slot waitlists and promotion on cancellation.
+"""
+from datetime import timedelta, time as dt_time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from memberships.models import Membership, MembershipPlan
+from services.booking_models import Booking, WaitlistEntry
+from services.waitlist import waitlist
+from tests.test_booking_api import BookingTestMixin
+
+User = get_user_model()
+
+
+class WaitlistTestCase(BookingTestMixin, APITestCase):
+    """Tier-ordered queue, join / leave API and promotion."""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.slot = self.create_slot(max_bookings=1)
+        self.plan = MembershipPlan.objects.create(
+            name='Premium', slug='premium', description='Test plan',
+            price=Decimal('300.00'), duration_months=1, discount_percentage=20,
+        )
+        self.book(self.user)
+
+    def create_user(self, name, member=False):
+        user = User.objects.create_user(
+            username=name, email=f'{name}@test.com', password='testpass123'
+        )
+        if member:
+            today = timezone.now().date()
+            Membership.objects.create(
+                user=user, plan=self.plan,
+                start_date=today - timedelta(days=1),
+                end_date=today + timedelta(days=30),
+            )
+        return user
+
+    def request(self, user, action, payload=None):
+        self.client.force_authenticate(user)
+        payload = payload if payload is not None else {
+            'service_id': self.service.id,
+            'room_id': self.room.id,
+            'date': self.target_date.isoformat(),
+            'start_time': '10:00',
+        }
+        return self.client.post(f'/api/bookings/{action}/', payload, format='json')
+
+    def book(self, user):
+        return self.request(user, 'create_booking')
+
+    def test_full_slot_offers_waitlist(self):
+        response = self.book(self.create_user('late'))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertTrue(response.json()['waitlist_available'])
+
+    def test_queue_ordered_by_tier_then_time(self):
+        guest = self.create_user('guest')
+        member = self.create_user('member', member=True)
+
+        self.assertEqual(self.request(guest, 'join_waitlist').json()['position'], 1)
+        response = self.request(member, 'join_waitlist')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['position'], 1)
+
+        guest_entry = WaitlistEntry.objects.get(user=guest)
+        self.assertEqual(waitlist.position(guest_entry), 2)
+
+        # Duplicate join is rejected
+        self.assertEqual(
+            self.request(guest, 'join_waitlist').status_code, status.HTTP_409_CONFLICT
+        )
+
+    def test_cannot_join_slot_with_capacity(self):
+        open_slot = self.create_slot(start=dt_time(11, 0), end=dt_time(12, 0))
+        response = self.request(self.create_user('early'), 'join_waitlist', {
+            'service_id': self.service.id,
+            'room_id': self.room.id,
+            'date': self.target_date.isoformat(),
+            'start_time': open_slot.start_time.strftime('%H:%M'),
+        })
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    @mock.patch('notifications.tasks.send_waitlist_promotion.delay')
+    def test_cancel_promotes_head_of_queue(self, notify):
+        guest = self.create_user('guest')
+        member = self.create_user('member', member=True)
+        self.request(guest, 'join_waitlist')
+        self.request(member, 'join_waitlist')
+
+        booking = Booking.objects.get(user=self.user)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/bookings/{booking.id}/cancel_booking/')
+        self.assertEqual(response.json()['waitlist_promoted'], 1)
+
+        # Freed place went straight to the member - the slot stays full
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.current_bookings, 1)
+        entry = WaitlistEntry.objects.get(user=member)
+        self.assertEqual(entry.status, 'promoted')
+        self.assertEqual(entry.booking.user, member)
+        self.assertEqual(entry.booking.discount_applied, Decimal('24.00'))
+        notify.assert_called_once_with(entry.booking.id)
+
+        guest_entry = WaitlistEntry.objects.get(user=guest)
+        self.assertEqual(guest_entry.status, 'waiting')
+        self.assertEqual(waitlist.position(guest_entry), 1)
+
+    @mock.patch('notifications.tasks.send_waitlist_promotion.delay')
+    def test_promote_expires_head_that_already_holds_booking(self, notify):
+        guest = self.create_user('guest')
+        self.request(guest, 'join_waitlist')
+        # self.user already holds the slot's booking but sits at the queue head
+        stale = WaitlistEntry.objects.create(
+            slot=self.slot, user=self.user, service=self.service, tier_rank=0,
+        )
+        self.slot.max_bookings = 2
+        self.slot.save()
+
+        promoted = waitlist.promote(pk=self.slot.pk)
+
+        self.assertEqual([booking.user for booking in promoted], [guest])
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'expired')
+        self.assertEqual(Booking.objects.filter(user=self.user).count(), 1)
+
+    def test_leave(self):
+        guest = self.create_user('guest')
+        entry_id = self.request(guest, 'join_waitlist').json()['id']
+
+        response = self.request(guest, 'leave_waitlist', {'entry_id': entry_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(WaitlistEntry.objects.get(id=entry_id).status, 'cancelled')
+        self.assertEqual(waitlist.promote(pk=self.slot.pk), [])